@@ -6,8 +6,16 @@ import requests
 import json
 import time
 from datetime import datetime
+import math
+import numbers
 import pandas as pd
 from typing import Dict, List, Optional
+from config import Config
+from ai_cache import AIResultCache, fingerprint
+from groq_client import GroqClient, AIOHTTP_AVAILABLE
+from model_registry import model_registry, classify_http_error
+
+VALID_RECOMMENDATIONS = {'BUY', 'HOLD', 'SELL'}
 
 class AIStockAnalyzer:
     def __init__(self):
@@ -17,6 +25,26 @@ class AIStockAnalyzer:
 
         # Groq API endpoint (OpenAI compatible)
         self.groq_url = "https://api.groq.com/openai/v1/chat/completions"
+        self.groq_client = None
+
+        # Groq models in order of preference (best to fallback)
+        self.groq_models = [
+            "llama-3.1-70b-versatile",  # Best reasoning model
+            "llama-3.1-8b-instant",     # Faster alternative
+            "mixtral-8x7b-32768",       # Good for analysis
+            "gemma-7b-it"               # Fallback option
+        ]
+
+        # Context window (prompt + answer tokens) of each model, for sizing batches
+        self.groq_context_tokens = {
+            "llama-3.1-70b-versatile": 131072,
+            "llama-3.1-8b-instant": 131072,
+            "mixtral-8x7b-32768": 32768,
+            "gemma-7b-it": 8192
+        }
+
+        # Analyses are reused while the rounded inputs stay the same
+        self.result_cache = AIResultCache() if Config.USE_AI_CACHE else None
 
         self._check_available_models()
 
@@ -32,6 +60,10 @@ class AIStockAnalyzer:
         if self.groq_api_key and len(self.groq_api_key) > 10:
             self.available_models.append('groq')
             print("✓ Groq AI available (Primary)")
+            if Config.USE_ASYNC_GROQ and AIOHTTP_AVAILABLE:
+                self.groq_client = GroqClient(self.groq_api_key, self.groq_models)
+                print(f"✓ Async Groq client: {Config.GROQ_REQUESTS_PER_MINUTE} req/min, "
+                      f"{Config.GROQ_TOKENS_PER_MINUTE} tokens/min, {Config.GROQ_MAX_IN_FLIGHT} in flight")
         else:
             print("⚠ Groq API key not configured")
 
@@ -54,6 +86,11 @@ class AIStockAnalyzer:
         if not self.available_models:
             return self._fallback_analysis(stock_data)
 
+        cache_key = fingerprint(stock_data, sentiment_data)
+        cached = self._cached_analysis(cache_key)
+        if cached:
+            return cached
+
         # Prepare data for AI analysis with sentiment context
         analysis_prompt = self._create_analysis_prompt(stock_data, sentiment_data)
 
@@ -63,7 +100,9 @@ class AIStockAnalyzer:
                 try:
                     result = self._analyze_with_model(analysis_prompt, model)
                     if result:
-                        return self._parse_ai_response(result, stock_data)
+                        analysis = self._parse_ai_response(result, stock_data)
+                        self._cache_analysis(cache_key, analysis, stock_data.get('symbol'))
+                        return analysis
                 except Exception as e:
                     print(f"Error with {model}: {e}")
                     continue
@@ -71,6 +110,253 @@ class AIStockAnalyzer:
         # Fallback to rule-based
         return self._fallback_analysis(stock_data)
 
+    def _cached_analysis(self, cache_key: str) -> Optional[Dict]:
+        """Cached analysis for a fingerprint, marked as coming from the cache"""
+        if self.result_cache is None:
+            return None
+        cached = self.result_cache.get(cache_key)
+        if cached:
+            cached['from_cache'] = True
+        return cached
+
+    def _cache_analysis(self, cache_key: str, analysis: Dict, symbol: str = None):
+        """Store real AI answers only, so fallbacks are retried next time"""
+        analysis['from_cache'] = False
+        if self.result_cache is not None and analysis.get('analysis_source') == 'AI':
+            self.result_cache.put(cache_key, analysis, symbol)
+
+    def analyze_stocks_with_ai(self, stocks: List[Dict], sentiments: Dict[str, Dict] = None) -> Dict[str, Dict]:
+        """Analyze many stocks with as few LLM calls as possible
+
+        Stocks are packed into batch prompts of compact metrics and the model
+        answers with one JSON array. Entries that are missing or fail
+        validation are re-requested in a smaller batch, then per stock.
+        Returns {symbol: analysis} in the analyze_stock_with_ai format.
+        """
+        sentiments = sentiments or {}
+        results = {}
+        if not stocks:
+            return results
+
+        if 'groq' not in self.available_models:
+            for stock in stocks:
+                results[stock['symbol']] = self.analyze_stock_with_ai(stock, sentiments.get(stock['symbol']))
+            return results
+
+        by_symbol = {stock['symbol']: stock for stock in stocks}
+        cache_keys = {symbol: fingerprint(stock, sentiments.get(symbol)) for symbol, stock in by_symbol.items()}
+        pending = []
+        for symbol in by_symbol:
+            cached = self._cached_analysis(cache_keys[symbol])
+            if cached:
+                results[symbol] = cached
+            else:
+                pending.append(symbol)
+        if len(pending) < len(by_symbol):
+            print(f"💾 {len(by_symbol) - len(pending)}/{len(by_symbol)} AI analyses served from cache")
+
+        records = {symbol: self._compact_record(by_symbol[symbol], sentiments.get(symbol)) for symbol in pending}
+
+        for attempt in range(Config.AI_BATCH_RETRIES + 1):
+            if not pending:
+                break
+            failed = []
+            batches = self._plan_batches(pending, records)
+            print(f"🤖 Batch AI analysis of {len(pending)} stocks in {len(batches)} prompts (attempt {attempt + 1})")
+            # The batches of one attempt are sent concurrently
+            answers = self._analyze_batches([[records[symbol] for symbol in batch] for batch in batches])
+            for batch, parsed in zip(batches, answers):
+                for symbol in batch:
+                    if symbol in parsed:
+                        results[symbol] = self._normalize_analysis(parsed[symbol], by_symbol[symbol])
+                        self._cache_analysis(cache_keys[symbol], results[symbol], symbol)
+                    else:
+                        failed.append(symbol)
+            pending = failed
+
+        # Whatever the batches could not answer goes through the single-stock path
+        if pending:
+            print(f"⚠ No valid batch result for {', '.join(pending)}, analyzing individually")
+            results.update(self.analyze_stocks_individually([by_symbol[symbol] for symbol in pending], sentiments))
+
+        return results
+
+    def analyze_stocks_individually(self, stocks: List[Dict], sentiments: Dict[str, Dict] = None) -> Dict[str, Dict]:
+        """One prompt per stock, sent concurrently within the Groq rate limits
+
+        Returns {symbol: analysis} in the analyze_stock_with_ai format.
+        """
+        sentiments = sentiments or {}
+        if 'groq' not in self.available_models:
+            return {stock['symbol']: self.analyze_stock_with_ai(stock, sentiments.get(stock['symbol']))
+                    for stock in stocks}
+
+        results = {}
+        pending = []
+        for stock in stocks:
+            cache_key = fingerprint(stock, sentiments.get(stock['symbol']))
+            cached = self._cached_analysis(cache_key)
+            if cached:
+                results[stock['symbol']] = cached
+            else:
+                pending.append((stock, cache_key))
+
+        prompts = [self._create_analysis_prompt(stock, sentiments.get(stock['symbol'])) for stock, _ in pending]
+        responses = self._complete_many([(prompt, 2000) for prompt in prompts])
+
+        for (stock, cache_key), prompt, response in zip(pending, prompts, responses):
+            symbol = stock['symbol']
+            if not response and 'huggingface' in self.available_models:
+                try:
+                    response = self._analyze_with_huggingface(prompt)
+                except Exception as e:
+                    print(f"Error with huggingface: {e}")
+            if response:
+                results[symbol] = self._parse_ai_response(response, stock)
+                self._cache_analysis(cache_key, results[symbol], symbol)
+            else:
+                results[symbol] = self._fallback_analysis(stock)
+
+        return results
+
+    def _compact_record(self, stock_data: Dict, sentiment_data: Dict = None) -> Dict:
+        """The metrics a batch prompt needs, rounded to keep tokens down"""
+        def number(key, default=None, digits=2):
+            value = stock_data.get(key, default)
+            if isinstance(value, numbers.Real) and not isinstance(value, bool) and not math.isnan(value):
+                return round(float(value), digits)
+            return None
+
+        sentiment_data = sentiment_data or {}
+        market_cap = number('market_cap', 0, 0)
+        record = {
+            'symbol': stock_data.get('symbol'),
+            'sector': stock_data.get('sector', 'Unknown'),
+            'price': number('current_price', 0),
+            'chg_pct': round((number('price_change', 0, 6) or 0) * 100, 2),
+            'mcap_cr': round(market_cap / 1e7, 0) if market_cap else None,
+            'pe': number('pe_ratio'),
+            'pb': number('pb_ratio'),
+            'roe': number('roe', digits=3),
+            'de': number('debt_to_equity'),
+            'div_yield': number('dividend_yield'),
+            'rsi': number('rsi', 50, 1),
+            'sma20': number('ma_20', digits=1),
+            'sma50': number('ma_50', digits=1),
+            'ema20': number('ema_20', digits=1),
+            'macd': number('macd_line'),
+            'macd_sig': number('macd_signal'),
+            'bb_up': number('bb_upper', digits=1),
+            'bb_low': number('bb_lower', digits=1),
+            'stoch_k': number('stoch_k', 50, 1),
+            'vol_ratio': number('volume_ratio', 1.0),
+            'volatility_pct': round((number('volatility', 0, 6) or 0) * 100, 2),
+            'sentiment': sentiment_data.get('overall_sentiment', 'neutral'),
+            'sent_score': round(float(sentiment_data.get('sentiment_score') or 0), 3),
+            'articles': int(sentiment_data.get('article_count', 0) or 0)
+        }
+        # Unknown values are left out rather than spelled out as null
+        return {key: value for key, value in record.items() if value is not None}
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Rough token count (about 4 characters per token)"""
+        return len(text) // 4 + 1
+
+    def _plan_batches(self, symbols: List[str], records: Dict[str, Dict]) -> List[List[str]]:
+        """Split symbols into batches that fit the model's context window
+
+        Each stock costs its compact record in the prompt plus
+        AI_BATCH_OUTPUT_TOKENS_PER_STOCK of answer. The window is that of
+        the model the chain will try first.
+        """
+        budget = self._context_tokens() - self._estimate_tokens(self._create_batch_prompt([]))
+        batches, current, used = [], [], 0
+        for symbol in symbols:
+            cost = self._estimate_tokens(json.dumps(records[symbol])) + Config.AI_BATCH_OUTPUT_TOKENS_PER_STOCK
+            if current and (used + cost > budget or len(current) >= Config.AI_BATCH_MAX_STOCKS):
+                batches.append(current)
+                current, used = [], 0
+            current.append(symbol)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _context_tokens(self) -> int:
+        """Context window of the model currently first in the fallback chain"""
+        chain = model_registry.order(self.groq_models)
+        if not chain:
+            return Config.AI_CONTEXT_TOKENS
+        return self.groq_context_tokens.get(chain[0], Config.AI_CONTEXT_TOKENS)
+
+    def _create_batch_prompt(self, records: List[Dict]) -> str:
+        """Prompt asking for a JSON array with one analysis per stock"""
+        stock_lines = '\n'.join(json.dumps(record, separators=(',', ':')) for record in records)
+        return f"""
+You are a professional Indian stock market analyst. Analyze each stock below (one JSON object per line).
+Fields: chg_pct = daily price change %, mcap_cr = market cap in ₹ Crores, de = debt/equity,
+vol_ratio = volume vs 20-day average, sentiment/sent_score (-1 to +1)/articles = news sentiment.
+Consider technicals, fundamentals, news sentiment and the Indian market context (NSE/BSE, sector trends, regulation).
+
+STOCKS:
+{stock_lines}
+
+Respond with ONLY a JSON array containing exactly one object per stock, in this format:
+[
+  {{
+    "symbol": "SYMBOL.NS",
+    "recommendation": "BUY/HOLD/SELL",
+    "confidence": "High/Medium/Low",
+    "target_price": number,
+    "risk_level": "Low/Medium/High",
+    "time_horizon": "Short/Medium/Long",
+    "catalysts": ["factor1", "factor2"],
+    "risks": ["risk1", "risk2"],
+    "technical_summary": "one sentence",
+    "investment_thesis": "one or two sentences",
+    "ai_score": number_0_to_100
+  }}
+]
+"""
+
+    def _analyze_batches(self, batches: List[List[Dict]]) -> List[Dict[str, Dict]]:
+        """Send one prompt per batch of records; the valid entries by symbol for each"""
+        calls = [
+            (self._create_batch_prompt(records), Config.AI_BATCH_OUTPUT_TOKENS_PER_STOCK * len(records) + 100)
+            for records in batches
+        ]
+        return [
+            self._parse_batch_response(response, {record['symbol'] for record in records}) if response else {}
+            for records, response in zip(batches, self._complete_many(calls))
+        ]
+
+    def _parse_batch_response(self, response: str, symbols) -> Dict[str, Dict]:
+        """Extract the JSON array and keep entries that pass validation"""
+        start_idx = response.find('[')
+        end_idx = response.rfind(']') + 1
+        if start_idx == -1 or end_idx <= start_idx:
+            print("⚠ Batch response contained no JSON array")
+            return {}
+
+        try:
+            entries = json.loads(response[start_idx:end_idx])
+        except json.JSONDecodeError as e:
+            print(f"⚠ Could not parse batch response: {e}")
+            return {}
+
+        valid = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or entry.get('symbol') not in symbols:
+                continue
+            if str(entry.get('recommendation', '')).upper() not in VALID_RECOMMENDATIONS:
+                continue
+            score = entry.get('ai_score')
+            if not isinstance(score, numbers.Real) or isinstance(score, bool) or not 0 <= score <= 100:
+                continue
+            entry['recommendation'] = entry['recommendation'].upper()
+            valid[entry['symbol']] = entry
+        return valid
+
     def _create_analysis_prompt(self, stock_data: Dict, sentiment_data: Dict = None) -> str:
         """Create comprehensive prompt for AI analysis with sentiment integration"""
 
@@ -189,42 +475,52 @@ Respond in JSON format:
 
 
 
-    def _analyze_with_groq(self, prompt: str) -> Optional[str]:
+    def _groq_messages(self, prompt: str) -> List[Dict]:
+        """Chat messages for a Groq request"""
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert Indian stock market analyst with deep knowledge of NSE/BSE markets, Indian economy, sector dynamics, and financial analysis. Provide detailed, professional investment analysis."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    def _complete_many(self, calls: List[tuple]) -> List[Optional[str]]:
+        """Groq replies for [(prompt, max_tokens), ...], concurrently when the async client is available"""
+        if self.groq_client is not None:
+            return self.groq_client.complete_many_sync(
+                [(self._groq_messages(prompt), max_tokens) for prompt, max_tokens in calls]
+            )
+        return [self._analyze_with_groq(prompt, max_tokens=max_tokens) for prompt, max_tokens in calls]
+
+    def _analyze_with_groq(self, prompt: str, max_tokens: int = 2000) -> Optional[str]:
         """Analyze using Groq API with best available models"""
 
+        if self.groq_client is not None:
+            return self.groq_client.complete_sync(self._groq_messages(prompt), max_tokens)
+
         headers = {
             "Authorization": f"Bearer {self.groq_api_key}",
             "Content-Type": "application/json"
         }
 
-        # Try multiple models in order of preference (best to fallback)
-        models_to_try = [
-            "llama-3.1-70b-versatile",  # Best reasoning model
-            "llama-3.1-8b-instant",     # Faster alternative
-            "mixtral-8x7b-32768",       # Good for analysis
-            "gemma-7b-it"               # Fallback option
-        ]
-
-        for model in models_to_try:
+        for model in model_registry.order(self.groq_models):
+            if not model_registry.allow(model):
+                continue
             data = {
                 "model": model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are an expert Indian stock market analyst with deep knowledge of NSE/BSE markets, Indian economy, sector dynamics, and financial analysis. Provide detailed, professional investment analysis."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                "messages": self._groq_messages(prompt),
                 "temperature": 0.3,
-                "max_tokens": 2000,
+                "max_tokens": max_tokens,
                 "top_p": 0.9
             }
 
             try:
                 print(f"🤖 Analyzing with Groq model: {model}")
+                started = time.monotonic()
                 response = requests.post(self.groq_url, headers=headers, json=data, timeout=30)
                 response.raise_for_status()
 
@@ -232,13 +528,24 @@ Respond in JSON format:
                 content = result['choices'][0]['message']['content']
 
                 if content and len(content) > 100:  # Ensure we got a substantial response
+                    model_registry.record_success(model, time.monotonic() - started)
                     print(f"✓ Groq analysis completed with {model}")
                     return content
                 else:
+                    model_registry.record_failure(model, 'short_response', f"{len(content or '')} characters")
                     print(f"⚠ Short response from {model}, trying next model")
                     continue
 
+            except requests.HTTPError as e:
+                model_registry.record_failure(model, classify_http_error(e.response.status_code, e.response.text), str(e))
+                print(f"✗ Error with {model}: {e}")
+                continue
+            except requests.Timeout as e:
+                model_registry.record_failure(model, 'timeout', str(e))
+                print(f"✗ Error with {model}: {e}")
+                continue
             except Exception as e:
+                model_registry.record_failure(model, 'network' if isinstance(e, requests.RequestException) else 'bad_response', str(e))
                 print(f"✗ Error with {model}: {e}")
                 continue
 
@@ -281,26 +588,30 @@ Respond in JSON format:
                 # Fallback parsing
                 ai_analysis = self._parse_text_response(ai_response)
 
-            # Ensure all required fields exist
-            return {
-                'recommendation': ai_analysis.get('recommendation', 'HOLD'),
-                'confidence': ai_analysis.get('confidence', 'Medium'),
-                'target_price': ai_analysis.get('target_price', stock_data.get('current_price', 0)),
-                'risk_level': ai_analysis.get('risk_level', 'Medium'),
-                'time_horizon': ai_analysis.get('time_horizon', 'Medium'),
-                'catalysts': ai_analysis.get('catalysts', ['Market growth', 'Sector expansion']),
-                'risks': ai_analysis.get('risks', ['Market volatility', 'Economic uncertainty']),
-                'technical_summary': ai_analysis.get('technical_summary', 'Mixed signals'),
-                'investment_thesis': ai_analysis.get('investment_thesis', 'Moderate investment potential'),
-                'ai_score': ai_analysis.get('ai_score', 50),
-                'analysis_source': 'AI',
-                'analysis_timestamp': datetime.now().isoformat()
-            }
+            return self._normalize_analysis(ai_analysis, stock_data)
 
         except Exception as e:
             print(f"Error parsing AI response: {e}")
             return self._fallback_analysis(stock_data)
 
+    def _normalize_analysis(self, ai_analysis: Dict, stock_data: Dict) -> Dict:
+        """Fill in every field the rest of the app expects"""
+        # Ensure all required fields exist
+        return {
+            'recommendation': ai_analysis.get('recommendation', 'HOLD'),
+            'confidence': ai_analysis.get('confidence', 'Medium'),
+            'target_price': ai_analysis.get('target_price', stock_data.get('current_price', 0)),
+            'risk_level': ai_analysis.get('risk_level', 'Medium'),
+            'time_horizon': ai_analysis.get('time_horizon', 'Medium'),
+            'catalysts': ai_analysis.get('catalysts', ['Market growth', 'Sector expansion']),
+            'risks': ai_analysis.get('risks', ['Market volatility', 'Economic uncertainty']),
+            'technical_summary': ai_analysis.get('technical_summary', 'Mixed signals'),
+            'investment_thesis': ai_analysis.get('investment_thesis', 'Moderate investment potential'),
+            'ai_score': ai_analysis.get('ai_score', 50),
+            'analysis_source': 'AI',
+            'analysis_timestamp': datetime.now().isoformat()
+        }
+
     def _parse_text_response(self, response: str) -> Dict:
         """Parse non-JSON AI response"""
 
@@ -0,0 +1,142 @@
+"""
+Cache of AI stock analyses keyed on quantized inputs.
+
+Prompts carry exact floats (price, RSI, volume ratio...), so they almost
+never repeat. The cache key is instead a fingerprint of the inputs rounded
+into Config.AI_CACHE_BUCKETS, so an analysis is reused until something
+material changes or its TTL runs out. Entries live in an in-process LRU
+and in SQLite.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+# Bump when the prompt changes so older analyses are not reused
+PROMPT_VERSION = 1
+
+
+def _bucket(value, size):
+    """Round a number to the nearest multiple of size, None if missing"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value):
+        return None
+    return round(round(value / size) * size, 6)
+
+
+def _log_bucket(value, step):
+    """Bucket a positive number on a relative grid (step = 0.01 is 1%)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value) or value <= 0:
+        return None
+    return round(math.log(value) / math.log1p(step))
+
+
+def fingerprint(stock_data, sentiment_data=None, buckets=None):
+    """Stable key for the material inputs of an analysis"""
+    buckets = buckets or Config.AI_CACHE_BUCKETS
+    sentiment_data = sentiment_data or {}
+
+    material = {
+        'v': PROMPT_VERSION,
+        'symbol': stock_data.get('symbol'),
+        'price': _log_bucket(stock_data.get('current_price'), buckets['current_price']),
+        'market_cap': _log_bucket(stock_data.get('market_cap'), buckets['market_cap']),
+        'sentiment': sentiment_data.get('overall_sentiment', 'neutral'),
+        'articles': int(sentiment_data.get('article_count', 0) or 0),
+        'sentiment_score': _bucket(sentiment_data.get('sentiment_score') or 0, buckets['sentiment_score']),
+    }
+    for field in ('price_change', 'rsi', 'volume_ratio', 'volatility', 'stoch_k'):
+        material[field] = _bucket(stock_data.get(field), buckets[field])
+
+    encoded = json.dumps(material, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class AIResultCache:
+    """TTL + LRU cache of analysis results with SQLite persistence"""
+
+    def __init__(self, path=None, max_entries=None, ttl_seconds=None):
+        self.path = path or Config.AI_CACHE_PATH
+        self.max_entries = max_entries or Config.AI_CACHE_SIZE
+        self.ttl = ttl_seconds or Config.AI_CACHE_TTL_SECONDS
+        self._memory = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._db = None
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache ("
+                "key TEXT PRIMARY KEY, symbol TEXT, result TEXT, expires_at REAL)"
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"⚠ AI cache database unavailable, using memory only: {e}")
+            self._db = None
+
+    def get(self, key):
+        """Cached result for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, result FROM ai_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(key, entry)
+
+            if entry is None:
+                return None
+            if entry[0] < now:
+                self._forget(key)
+                return None
+
+            self._memory.move_to_end(key)
+            return dict(entry[1])
+
+    def put(self, key, result, symbol=None):
+        """Store a result for ttl seconds"""
+        entry = (time.time() + self.ttl, dict(result))
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO ai_cache VALUES (?, ?, ?, ?)",
+                        (key, symbol, json.dumps(entry[1], default=str), entry[0])
+                    )
+                    # Expired rows are cleaned up as new ones come in
+                    self._db.execute("DELETE FROM ai_cache WHERE expires_at < ?", (time.time(),))
+                    self._db.commit()
+                except Exception as e:
+                    print(f"Error writing AI cache: {e}")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _forget(self, key):
+        self._memory.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+            self._db.commit()
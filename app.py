@@ -1,9 +1,11 @@
 from flask import Flask, render_template, jsonify, request
 import pandas as pd
 import json
+import os
 from datetime import datetime
 from config import Config
 from stock_filter import StockFilter
+from universe_snapshot import SnapshotManager
 import plotly.graph_objs as go
 import plotly.utils
 
@@ -11,25 +13,29 @@ app = Flask(__name__)
 app.config.from_object(Config)
 
 # Global variables to cache data
-cached_recommendations = None
 last_update = None
 stock_filter = StockFilter()  # Initialize the stock filter globally
+snapshots = SnapshotManager(stock_filter)  # One universe-wide analysis shared by all endpoints
 
-def get_recommendations(force_refresh=False):
-    """Get recommendations with caching"""
-    global cached_recommendations, last_update, stock_filter
+def get_snapshot(force_refresh=False):
+    """Get the universe snapshot, rebuilding it when stale (30 minutes)"""
+    global last_update
 
-    # Check if we need to refresh (cache for 30 minutes)
-    if (force_refresh or
-        cached_recommendations is None or
-        last_update is None or
-        (datetime.now() - last_update).seconds > 1800):
+    snapshot = snapshots.get(force_refresh)
+    last_update = snapshot.built_at
+    return snapshot
 
-        print("Refreshing recommendations...")
-        cached_recommendations = stock_filter.analyze_stocks()
-        last_update = datetime.now()
+def warm_snapshot():
+    """Start building the first snapshot so the first request does not pay for it"""
+    # With the debug reloader only the child process serves requests
+    if Config.DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+    if Config.SNAPSHOT_WARM_ON_START and snapshots.current is None:
+        snapshots.refresh_in_background()
 
-    return cached_recommendations
+def get_recommendations(force_refresh=False):
+    """Get recommendations for the whole universe"""
+    return get_snapshot(force_refresh).recommendations
 
 @app.route('/')
 def index():
@@ -44,8 +50,6 @@ def old_index():
 @app.route('/api/recommendations')
 def api_recommendations():
     """API endpoint for sector-specific recommendations"""
-    global last_update, stock_filter
-
     try:
         # Get sector parameter (required)
         sector = request.args.get('sector', '').upper()
@@ -67,14 +71,9 @@ def api_recommendations():
                 'data': []
             })
 
-        print(f"Analyzing {sector} sector...")
-
-        # Get stocks for the specific sector
-        sector_stocks = Config.STOCK_SECTORS[sector]
-
-        # Run analysis only for this sector's stocks
-        recommendations = stock_filter.analyze_sector_stocks(sector, sector_stocks, force_refresh)
-        last_update = datetime.now()
+        # Serve the sector as a slice of the shared universe snapshot
+        snapshot = get_snapshot(force_refresh)
+        recommendations = snapshot.sector(sector)
 
         if recommendations is None or recommendations.empty:
             return jsonify({
@@ -183,6 +182,7 @@ def api_recommendations():
             'sector': sector,
             'sector_display': sector.replace('_', ' ').title(),
             'last_updated': last_update.isoformat() if last_update else None,
+            'snapshot_version': snapshot.version,
             'total_count': len(data)
         })
 
@@ -301,12 +301,12 @@ def api_recommendations_by_sector(sector):
         if not sector_stocks:
             return jsonify({'status': 'error', 'message': f'Sector {sector} not found'})
 
-        recommendations = get_recommendations()
-        if recommendations.empty:
+        snapshot = get_snapshot()
+        if snapshot.empty:
             return jsonify({'status': 'error', 'message': 'No data available'})
 
-        # Filter by sector stocks
-        filtered = recommendations[recommendations['symbol'].isin(sector_stocks)]
+        # Slice the sector out of the snapshot
+        filtered = snapshot.sector(sector.upper())
         data = filtered.to_dict('records')
 
         # Format numbers
@@ -322,7 +322,8 @@ def api_recommendations_by_sector(sector):
             'status': 'success',
             'sector': sector.upper(),
             'data': data,
-            'count': len(data)
+            'count': len(data),
+            'snapshot_version': snapshot.version
         })
 
     except Exception as e:
@@ -352,12 +353,35 @@ def api_sectors():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/api/ai/models')
+def api_ai_models():
+    """Health of the AI models and the fallback chain currently in use"""
+    try:
+        from model_registry import model_registry
+
+        ai_analyzer = stock_filter.ai_analyzer
+        configured = ai_analyzer.groq_models if ai_analyzer else []
+        chain = model_registry.order(configured)
+        models = model_registry.snapshot()
+
+        return jsonify({
+            'status': 'success',
+            'configured_chain': configured,
+            'active_chain': chain,
+            'skipped': [model['model'] for model in models if model['skipped']],
+            'models': models
+        })
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
 @app.route('/api/stats')
 def api_stats():
     """Get summary statistics"""
     try:
         from config import Config
-        recommendations = get_recommendations()
+        snapshot = get_snapshot()
+        recommendations = snapshot.recommendations
 
         if recommendations.empty:
             return jsonify({'status': 'error', 'message': 'No data available'})
@@ -372,13 +396,13 @@ def api_stats():
             'avg_composite_score': round(recommendations['composite_score'].mean(), 1),
             'high_confidence_count': len(recommendations[recommendations['confidence'] == 'High']),
             'last_updated': last_update.isoformat() if last_update else None,
+            'snapshot_version': snapshot.version,
             'total_sectors': len(Config.STOCK_SECTORS)
         }
 
         # Sector-wise stats
         sector_stats = {}
-        for sector_name, stocks in Config.STOCK_SECTORS.items():
-            sector_recs = recommendations[recommendations['symbol'].isin(stocks)]
+        for sector_name, sector_recs in snapshot.sectors():
             if not sector_recs.empty:
                 sector_stats[sector_name] = {
                     'total': len(sector_recs),
@@ -403,17 +427,16 @@ def api_sector_heatmap():
     """Get sector-wise heatmap data for bullish/bearish analysis"""
     try:
         from config import Config
-        recommendations = get_recommendations()
+        snapshot = get_snapshot()
 
-        if recommendations.empty:
+        if snapshot.empty:
             return jsonify({'status': 'error', 'message': 'No data available'})
 
         # Calculate sector-wise metrics
         sector_data = []
 
-        for sector_name, stocks in Config.STOCK_SECTORS.items():
-            # Filter results for this sector
-            sector_results = recommendations[recommendations['symbol'].isin(stocks)]
+        for sector_name, sector_results in snapshot.sectors():
+            stocks = Config.STOCK_SECTORS[sector_name]
 
             if len(sector_results) == 0:
                 continue
@@ -482,7 +505,8 @@ def api_sector_heatmap():
         return jsonify({
             'status': 'success',
             'sectors': sector_data,
-            'last_updated': last_update.isoformat() if last_update else None
+            'last_updated': last_update.isoformat() if last_update else None,
+            'snapshot_version': snapshot.version
         })
 
     except Exception as e:
@@ -576,4 +600,5 @@ def api_sector_comparison_heatmap():
         return jsonify({'status': 'error', 'message': str(e)})
 
 if __name__ == '__main__':
+    warm_snapshot()
     app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
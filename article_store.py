@@ -0,0 +1,241 @@
+"""
+Persistent news article store for incremental ingestion.
+
+Articles are keyed by a hash of their normalized URL (scheme, "www.",
+fragments and tracking parameters removed), so the same story fetched
+again on a later refresh, or through another source, is stored once and
+scored once. A link table maps articles to the symbols they were found
+for and is indexed on (symbol, published_at). Each run therefore scores
+only unseen articles, and a symbol's lookback window is one indexed
+range query.
+
+With Config.USE_NEAR_DUPLICATES, each new article is also matched against
+recent stories through a MinHash-LSH index. Copies join the story's cluster
+and are never scored; the window returns one row per story with the
+number of copies the symbol saw in cluster_size.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, urlencode, parse_qsl
+import numpy as np
+import pandas as pd
+from config import Config
+from near_duplicates import MinHasher, MinHashIndex, article_text
+
+# Query parameters that identify a click, not an article
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'src', 'cmpid', 'ncid', 'guccounter'}
+
+ARTICLE_FIELDS = ['title', 'description', 'content', 'url', 'source', 'method']
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'  # Fixed width UTC, so text order is time order
+
+
+def normalize_url(url):
+    """Canonical form of an article URL for deduplication"""
+    if not isinstance(url, str) or not url.strip():
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else '')
+
+
+def url_hash(article):
+    """Store key of an article: its normalized URL, or its title when it has no URL"""
+    normalized = normalize_url(article.get('url'))
+    if normalized is None:
+        title = ' '.join(str(article.get('title') or '').lower().split())
+        normalized = f"title:{article.get('source') or ''}:{title}"
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _to_utc_text(value, default):
+    """Publication time as fixed-width UTC text; naive times are taken as local time"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            value = pd.to_datetime(value, utc=True, errors='coerce')
+    if value is pd.NaT or not isinstance(value, datetime):
+        return default.astimezone(timezone.utc).strftime(TIME_FORMAT)
+    return value.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+
+class ArticleStore:
+    """SQLite store of news articles, their sentiment and their symbols"""
+
+    def __init__(self, path=None):
+        self.path = path or Config.ARTICLE_STORE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url_hash TEXT PRIMARY KEY, url TEXT, title TEXT, description TEXT, content TEXT,
+                source TEXT, method TEXT, published_at TEXT, ingested_at TEXT,
+                sentiment TEXT, sentiment_score REAL, confidence REAL,
+                signature BLOB, cluster_id TEXT
+            );
+            CREATE TABLE IF NOT EXISTS article_symbols (
+                symbol TEXT, url_hash TEXT, published_at TEXT,
+                PRIMARY KEY (symbol, url_hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_article_symbols_window
+                ON article_symbols (symbol, published_at);
+        """)
+        # Stores created before near-duplicate detection lack these columns
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(articles)")}
+        for column, kind in (('signature', 'BLOB'), ('cluster_id', 'TEXT')):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE articles ADD COLUMN {column} {kind}")
+        self._db.commit()
+
+        self._hasher = MinHasher() if Config.USE_NEAR_DUPLICATES else None
+        self._story_index = None
+
+    def ingest(self, news_df):
+        """Insert unseen articles and link every article to its symbol
+
+        Returns the stories that still need sentiment (new ones, plus any
+        stored earlier but never scored) with their url_hash, one row each.
+        Near-duplicates of a known story are stored but not returned.
+        """
+        if news_df is None or news_df.empty:
+            return pd.DataFrame()
+
+        now = datetime.now(timezone.utc)
+        ingested_at = now.strftime(TIME_FORMAT)
+        records = news_df.to_dict('records')
+        keys = [url_hash(article) for article in records]
+        links = [(article['symbol'], key) for article, key in zip(records, keys) if article.get('symbol')]
+
+        with self._lock:
+            known = set(self._query("SELECT url_hash FROM articles WHERE url_hash IN ({})",
+                                    list(dict.fromkeys(keys)))['url_hash'])
+            articles = {}
+            copies = 0
+            for article, key in zip(records, keys):
+                if key in known or key in articles:
+                    continue
+                signature, cluster_id = self._match_story(key, article)
+                copies += cluster_id != key
+                articles[key] = [key] + [article.get(field) for field in ARTICLE_FIELDS] + [
+                    _to_utc_text(article.get('published_at'), now), ingested_at, signature, cluster_id
+                ]
+
+            self._db.executemany(
+                "INSERT OR IGNORE INTO articles (url_hash, title, description, content, url, source, method, "
+                "published_at, ingested_at, signature, cluster_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                list(articles.values())
+            )
+            # A story seen again keeps the publication time it was first stored with
+            self._db.executemany(
+                "INSERT OR IGNORE INTO article_symbols (symbol, url_hash, published_at) "
+                "SELECT ?, url_hash, published_at FROM articles WHERE url_hash = ?",
+                links
+            )
+            self._db.commit()
+            pending = self._query(
+                "SELECT url_hash, title, description, content, url, source, method, published_at "
+                "FROM articles WHERE sentiment IS NULL AND url_hash IN "
+                "(SELECT COALESCE(cluster_id, url_hash) FROM articles WHERE url_hash IN ({}))",
+                list(dict.fromkeys(keys))
+            )
+            pending = pending.drop_duplicates('url_hash', ignore_index=True)
+
+        print(f"🗄 Article store: {len(articles)} new of {len(set(keys))} fetched "
+              f"({copies} copies of known stories), {len(pending)} to score")
+        return pending
+
+    def _match_story(self, key, article):
+        """(signature bytes, cluster id) for a new article; the cluster id is its own key for a new story"""
+        if self._hasher is None:
+            return None, key
+        signature = self._hasher.signature(article_text(article))
+        if signature is None:
+            return None, key
+
+        index = self._load_story_index()
+        match = index.query(signature)
+        if match is None:
+            index.add(key, signature)
+            return signature.tobytes(), key
+        return signature.tobytes(), match
+
+    def _load_story_index(self):
+        """LSH index of stories ingested within NEAR_DUPLICATE_HORIZON_DAYS, loaded on first use"""
+        if self._story_index is None:
+            self._story_index = MinHashIndex()
+            since = (datetime.now(timezone.utc) - timedelta(days=Config.NEAR_DUPLICATE_HORIZON_DAYS)).strftime(TIME_FORMAT)
+            rows = self._db.execute(
+                "SELECT url_hash, signature FROM articles "
+                "WHERE cluster_id = url_hash AND signature IS NOT NULL AND ingested_at >= ?",
+                (since,)
+            )
+            for key, signature in rows:
+                self._story_index.add(key, np.frombuffer(signature, dtype=np.uint32))
+        return self._story_index
+
+    def save_sentiment(self, scored_df):
+        """Store sentiment results for rows returned by ingest()"""
+        if scored_df is None or scored_df.empty:
+            return
+        rows = [
+            (row['sentiment'], float(row['sentiment_score']), float(row['confidence']), row['url_hash'])
+            for row in scored_df[['url_hash', 'sentiment', 'sentiment_score', 'confidence']].to_dict('records')
+        ]
+        with self._lock:
+            self._db.executemany(
+                "UPDATE articles SET sentiment = ?, sentiment_score = ?, confidence = ? WHERE url_hash = ?",
+                rows
+            )
+            self._db.commit()
+
+    def window(self, symbols, days_back=None, now=None):
+        """Scored stories for the symbols published within the last days_back days
+
+        Copies of a story are folded into one row carrying the story's text
+        and sentiment, its first publication time and the number of copies.
+        """
+        days_back = Config.NEWS_LOOKBACK_DAYS if days_back is None else days_back
+        now = now or datetime.now(timezone.utc)
+        since = (now - timedelta(days=days_back)).strftime(TIME_FORMAT)
+
+        frames = []
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                frames.append(self._query(
+                    "SELECT s.symbol, r.title, r.description, r.content, r.url, MIN(s.published_at) AS published_at, "
+                    "r.source, r.method, r.sentiment, r.sentiment_score, r.confidence, r.url_hash, "
+                    "COUNT(*) AS cluster_size "
+                    "FROM article_symbols s JOIN articles a ON a.url_hash = s.url_hash "
+                    "JOIN articles r ON r.url_hash = COALESCE(a.cluster_id, a.url_hash) "
+                    "WHERE s.symbol = ? AND s.published_at >= ? AND r.sentiment IS NOT NULL "
+                    "GROUP BY r.url_hash ORDER BY published_at DESC",
+                    [symbol, since]
+                ))
+        frames = [frame for frame in frames if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _query(self, sql, params):
+        """Run a query into a DataFrame, expanding one IN (...) list in chunks"""
+        if '{}' not in sql:
+            return pd.read_sql_query(sql, self._db, params=params)
+        # SQLite limits the number of bound parameters per query
+        frames = [
+            pd.read_sql_query(sql.format(','.join('?' * len(params[start:start + 500]))), self._db,
+                              params=params[start:start + 500])
+            for start in range(0, len(params), 500)
+        ]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
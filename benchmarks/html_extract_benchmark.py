@@ -0,0 +1,87 @@
+"""
+Per-page parse time of the lxml extractor against the BeautifulSoup scrapers.
+
+Runs both on the saved pages in benchmarks/fixtures, checks they extract the
+same titles and URLs, and prints the median time per page.
+
+    python benchmarks/html_extract_benchmark.py [repeats]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from html_extract import get_extractor
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PAGES = {
+    'moneycontrol': 'moneycontrol_tag.html',
+    'economictimes': 'economictimes_topic.html',
+}
+
+
+def soup_moneycontrol(content):
+    """The scraper's BeautifulSoup extraction for MoneyControl"""
+    links = []
+    soup = BeautifulSoup(content, 'html.parser')
+    for item in soup.find_all('div', class_='news_item')[:5]:
+        title_elem = item.find('a')
+        if title_elem:
+            url = title_elem.get('href')
+            if url and not url.startswith('http'):
+                url = f"https://www.moneycontrol.com{url}"
+            links.append((title_elem.get_text(strip=True), url))
+    return links
+
+
+def soup_economictimes(content):
+    """The scraper's BeautifulSoup extraction for Economic Times"""
+    links = []
+    soup = BeautifulSoup(content, 'html.parser')
+    for item in soup.find_all('div', class_='eachStory')[:5]:
+        title_elem = item.find('h3')
+        link_elem = title_elem.find('a') if title_elem else None
+        if link_elem:
+            url = link_elem.get('href')
+            if url and not url.startswith('http'):
+                url = f"https://economictimes.indiatimes.com{url}"
+            links.append((link_elem.get_text(strip=True), url))
+    return links
+
+
+SOUP = {'moneycontrol': soup_moneycontrol, 'economictimes': soup_economictimes}
+
+
+def time_per_page(extract, content, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        extract(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(repeats=50):
+    print(f"{'page':<28}{'size':>9}{'bs4 html.parser':>18}{'lxml extractor':>17}{'speedup':>10}")
+    for site, page in PAGES.items():
+        with open(os.path.join(FIXTURES, page), 'rb') as f:
+            content = f.read()
+
+        extractor = get_extractor(site)
+        expected = SOUP[site](content)
+        actual = extractor.extract(content)
+        if actual != expected:
+            raise SystemExit(f"{page}: extractors disagree\n  bs4:  {expected}\n  lxml: {actual}")
+
+        soup_time = time_per_page(SOUP[site], content, repeats)
+        lxml_time = time_per_page(extractor.extract, content, repeats)
+        print(f"{page:<28}{len(content) // 1024:>7}KB{soup_time * 1000:>15.2f} ms{lxml_time * 1000:>14.2f} ms"
+              f"{soup_time / lxml_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -21,15 +21,257 @@ class Config:
     AI_FALLBACK_TO_RULES = True  # Use rule-based if AI fails
     PRIMARY_AI_MODEL = 'groq'  # Primary AI model to use (groq only)
 
+    # Batched AI analysis: several stocks per LLM call
+    AI_BATCH_ANALYSIS = True
+    AI_BATCH_MAX_STOCKS = 10        # Upper bound on stocks per prompt
+    AI_CONTEXT_TOKENS = 8000        # Prompt + answer budget for models without a known context size
+    AI_BATCH_OUTPUT_TOKENS_PER_STOCK = 300
+    AI_BATCH_RETRIES = 1            # Re-requests for entries that failed validation
+
+    # Async Groq client (needs aiohttp); limits should match the account's plan
+    USE_ASYNC_GROQ = True
+    GROQ_REQUESTS_PER_MINUTE = 30
+    GROQ_TOKENS_PER_MINUTE = 6000
+    GROQ_MAX_IN_FLIGHT = 4          # Concurrent requests to the API
+    GROQ_MAX_RETRIES = 3            # Retries per model on 429/5xx/network errors
+    GROQ_BACKOFF_BASE = 1.0         # Seconds; also the jitter range
+    GROQ_BACKOFF_MAX = 30.0
+    GROQ_TIMEOUT = 30
+
+    # Circuit breaking for the model fallback chain
+    MODEL_FAILURE_THRESHOLD = 3     # Failures in a row before a model is skipped
+    MODEL_COOLDOWN_SECONDS = 300    # Skip time before a probe request
+    MODEL_PERMANENT_COOLDOWN_SECONDS = 6 * 3600  # For decommissioned/unknown models
+    MODEL_LATENCY_ALPHA = 0.3       # Weight of the newest latency in the average
+
     # Stock filtering parameters
     MIN_SENTIMENT_SCORE = 0.1  # Minimum positive sentiment for buy recommendation
     MIN_VOLUME_RATIO = 1.5     # Minimum volume compared to average
     MAX_PRICE_CHANGE = 0.05    # Maximum daily price change (5%)
     MIN_MARKET_CAP = 10000000000  # Minimum market cap (₹100 Cr in INR)
 
+    # Stock data collection settings
+    USE_BULK_DOWNLOAD = True        # Fetch price history with multi-ticker requests
+    BULK_DOWNLOAD_BATCH_SIZE = 100  # Symbols per multi-ticker download request
+    INFO_FETCH_WORKERS = 8          # Concurrent ticker.info requests
+    USE_STAGED_SCREENING = True     # Screen on price data before fetching ticker.info
+    USE_VECTORIZED_INDICATORS = True  # Compute indicators over a dates x symbols panel
+
+    # Local price store (one Parquet file per symbol, needs pyarrow)
+    DATA_DIR = os.getenv('DATA_DIR', 'data')
+    USE_PRICE_STORE = True
+    PRICE_STORE_DIR = os.path.join(DATA_DIR, 'prices')
+    PRICE_STORE_BACKFILL_PERIOD = '1y'  # History downloaded the first time a symbol is seen
+
+    # Streaming indicators keep per-symbol state and only process new bars.
+    # They are computed over the whole stored history rather than the 1mo window.
+    USE_STREAMING_INDICATORS = False
+    INDICATOR_STATE_DIR = os.path.join(DATA_DIR, 'indicator_state')
+
+    # Pipelined analysis: each symbol moves to the next stage as soon as it is ready
+    USE_PIPELINE = True
+    PIPELINE_QUEUE_SIZE = 32        # Max items waiting between two stages
+    PIPELINE_NEWS_WORKERS = 4       # Concurrent per-symbol news collections
+    PIPELINE_SENTIMENT_BATCH = 16   # Symbols whose news is scored in one sentiment batch
+    PIPELINE_SENTIMENT_MAX_WAIT = 2.0  # Seconds a symbol may wait for its batch to fill
+
     # News analysis settings
     NEWS_LOOKBACK_DAYS = 7     # Days to look back for news
     MIN_NEWS_ARTICLES = 3      # Minimum articles needed for analysis
+    USE_ARTICLE_STORE = True   # Keep articles between runs, score only unseen ones
+    ARTICLE_STORE_PATH = os.path.join(DATA_DIR, 'articles.sqlite')
+
+    # Entity linking: attach market news to the companies it names and drop
+    # NewsAPI results that never mention the company searched for
+    USE_ENTITY_LINKING = True
+    ENTITY_ALIASES = {              # Matched case-insensitively unless written in capitals
+        'RELIANCE.NS': ['RIL'],
+        'TCS.NS': ['Tata Consultancy'],
+        'INFY.NS': ['Infosys'],
+        'HCLTECH.NS': ['HCL Tech', 'HCLTech'],
+        'TECHM.NS': ['TechM'],
+        'SBIN.NS': ['SBI'],
+        'KOTAKBANK.NS': ['Kotak Bank', 'Kotak Mahindra'],
+        'HINDUNILVR.NS': ['HUL'],
+        'M&M.NS': ['Mahindra and Mahindra', 'M&M'],
+        'MARUTI.NS': ['Maruti'],
+        'BAJAJ-AUTO.NS': ['Bajaj Auto'],
+        'SUNPHARMA.NS': ['Sun Pharma'],
+        'DRREDDY.NS': ["Dr Reddy's", 'Dr Reddys', "Dr. Reddy's"],
+        'IOC.NS': ['IndianOil', 'Indian Oil'],
+        'BPCL.NS': ['BPCL'],
+        'HINDPETRO.NS': ['HPCL'],
+        'ONGC.NS': ['ONGC'],
+        'LT.NS': ['L&T', 'Larsen & Toubro', 'Larsen and Toubro'],
+        'BHEL.NS': ['BHEL'],
+        'JINDALSTEL.NS': ['JSPL'],
+        'NATIONALUM.NS': ['NALCO'],
+        'MAZAGON.NS': ['Mazagon Dock'],
+    }
+
+    # Company names used to find each symbol in news text (entity linking).
+    # RAMPGREEN, VARUN and BHARAT have no unambiguous name and match by ticker.
+    COMPANY_NAMES = {
+        # Banking
+        'HDFCBANK.NS': 'HDFC Bank', 'ICICIBANK.NS': 'ICICI Bank', 'KOTAKBANK.NS': 'Kotak Mahindra Bank',
+        'AXISBANK.NS': 'Axis Bank', 'INDUSINDBK.NS': 'IndusInd Bank', 'SBIN.NS': 'State Bank of India',
+        'PNB.NS': 'Punjab National Bank', 'BANKBARODA.NS': 'Bank of Baroda', 'CANBK.NS': 'Canara Bank',
+        'UNIONBANK.NS': 'Union Bank of India', 'FEDERALBNK.NS': 'Federal Bank', 'IDFCFIRSTB.NS': 'IDFC First Bank',
+        'BANDHANBNK.NS': 'Bandhan Bank', 'RBLBANK.NS': 'RBL Bank', 'YESBANK.NS': 'Yes Bank',
+        'SOUTHBANK.NS': 'South Indian Bank', 'IOB.NS': 'Indian Overseas Bank', 'INDIANB.NS': 'Indian Bank',
+        'CENTRALBK.NS': 'Central Bank of India', 'MAHABANK.NS': 'Bank of Maharashtra',
+        'IRFC.NS': 'Indian Railway Finance Corporation', 'RECLTD.NS': 'REC Limited',
+        'PFC.NS': 'Power Finance Corporation', 'HUDCO.NS': 'Housing and Urban Development Corporation',
+        # IT
+        'TCS.NS': 'Tata Consultancy Services', 'INFY.NS': 'Infosys', 'HCLTECH.NS': 'HCL Technologies',
+        'WIPRO.NS': 'Wipro', 'TECHM.NS': 'Tech Mahindra', 'LTI.NS': 'Larsen & Toubro Infotech',
+        'MINDTREE.NS': 'Mindtree', 'MPHASIS.NS': 'Mphasis', 'LTTS.NS': 'L&T Technology Services',
+        'COFORGE.NS': 'Coforge', 'PERSISTENT.NS': 'Persistent Systems', 'SONATSOFTW.NS': 'Sonata Software',
+        'CYIENT.NS': 'Cyient', 'ZENSAR.NS': 'Zensar Technologies', 'HEXAWARE.NS': 'Hexaware Technologies',
+        'INTELLECT.NS': 'Intellect Design Arena', 'KPITTECH.NS': 'KPIT Technologies', 'NIITTECH.NS': 'NIIT Technologies',
+        'POLYCAB.NS': 'Polycab India', 'TATAELXSI.NS': 'Tata Elxsi', 'ECLERX.NS': 'eClerx Services',
+        'NEWGEN.NS': 'Newgen Software', 'BIRLASOFT.NS': 'Birlasoft', 'MASTEK.NS': 'Mastek',
+        # Energy, oil and gas, power
+        'RELIANCE.NS': 'Reliance Industries', 'ONGC.NS': 'Oil and Natural Gas Corporation',
+        'BPCL.NS': 'Bharat Petroleum', 'IOC.NS': 'Indian Oil Corporation', 'HINDPETRO.NS': 'Hindustan Petroleum',
+        'GAIL.NS': 'GAIL (India)', 'IGL.NS': 'Indraprastha Gas',
+        'MGL.NS': 'Mahanagar Gas', 'GSPL.NS': 'Gujarat State Petronet', 'ATGL.NS': 'Adani Total Gas',
+        'MRPL.NS': 'Mangalore Refinery and Petrochemicals', 'CPCL.NS': 'Chennai Petroleum',
+        'NRL.NS': 'Numaligarh Refinery', 'NTPC.NS': 'NTPC Limited', 'POWERGRID.NS': 'Power Grid Corporation',
+        'NHPC.NS': 'NHPC Limited', 'SJVN.NS': 'SJVN Limited', 'THERMAX.NS': 'Thermax',
+        'ADANIGREEN.NS': 'Adani Green Energy', 'TATAPOWER.NS': 'Tata Power', 'TORNTPOWER.NS': 'Torrent Power',
+        'CESC.NS': 'CESC Limited',
+        # FMCG and consumer
+        'HINDUNILVR.NS': 'Hindustan Unilever', 'ITC.NS': 'ITC Limited', 'NESTLEIND.NS': 'Nestle India',
+        'BRITANNIA.NS': 'Britannia Industries', 'DABUR.NS': 'Dabur India', 'TATACONSUM.NS': 'Tata Consumer Products',
+        'MARICO.NS': 'Marico', 'GODREJCP.NS': 'Godrej Consumer Products', 'EMAMILTD.NS': 'Emami',
+        'JYOTHYLAB.NS': 'Jyothy Labs', 'COLPAL.NS': 'Colgate-Palmolive India', 'PGHH.NS': 'Procter & Gamble Hygiene',
+        'GILLETTE.NS': 'Gillette India', 'VBL.NS': 'Varun Beverages', 'RADICO.NS': 'Radico Khaitan',
+        'BIKAJI.NS': 'Bikaji Foods', 'DEVYANI.NS': 'Devyani International', 'JUBLFOOD.NS': 'Jubilant FoodWorks',
+        'WESTLIFE.NS': 'Westlife Foodworld', 'WHIRLPOOL.NS': 'Whirlpool of India', 'VOLTAS.NS': 'Voltas',
+        'BLUESTAR.NS': 'Blue Star', 'AMBER.NS': 'Amber Enterprises', 'CROMPTON.NS': 'Crompton Greaves Consumer',
+        # Automotive
+        'MARUTI.NS': 'Maruti Suzuki', 'TATAMOTORS.NS': 'Tata Motors', 'M&M.NS': 'Mahindra & Mahindra',
+        'EICHERMOT.NS': 'Eicher Motors', 'ASHOKLEY.NS': 'Ashok Leyland', 'BAJAJ-AUTO.NS': 'Bajaj Auto',
+        'HEROMOTOCO.NS': 'Hero MotoCorp', 'TVSMOTORS.NS': 'TVS Motor', 'BAJAJHLDNG.NS': 'Bajaj Holdings',
+        'ESCORTS.NS': 'Escorts Kubota', 'BHARATFORG.NS': 'Bharat Forge', 'MOTHERSON.NS': 'Samvardhana Motherson',
+        'BALKRISIND.NS': 'Balkrishna Industries', 'MRF.NS': 'MRF Limited', 'APOLLOTYRE.NS': 'Apollo Tyres',
+        'BOSCHLTD.NS': 'Bosch Limited', 'EXIDEIND.NS': 'Exide Industries', 'AMARAJABAT.NS': 'Amara Raja',
+        'SUNDRMFAST.NS': 'Sundram Fasteners', 'MAHINDCIE.NS': 'Mahindra CIE Automotive',
+        'TIINDIA.NS': 'Tube Investments of India', 'MINDACORP.NS': 'Minda Corporation', 'SWARAJENG.NS': 'Swaraj Engines',
+        # Pharma and healthcare
+        'SUNPHARMA.NS': 'Sun Pharmaceutical', 'DRREDDY.NS': 'Dr Reddys Laboratories', 'CIPLA.NS': 'Cipla',
+        'DIVISLAB.NS': "Divi's Laboratories", 'BIOCON.NS': 'Biocon',
+        'LUPIN.NS': 'Lupin', 'AUROPHARMA.NS': 'Aurobindo Pharma', 'TORNTPHARM.NS': 'Torrent Pharmaceuticals',
+        'CADILAHC.NS': 'Cadila Healthcare', 'GLENMARK.NS': 'Glenmark Pharmaceuticals', 'ALKEM.NS': 'Alkem Laboratories',
+        'LALPATHLAB.NS': 'Dr Lal PathLabs', 'METROPOLIS.NS': 'Metropolis Healthcare', 'THYROCARE.NS': 'Thyrocare Technologies',
+        'KRBL.NS': 'KRBL Limited', 'GRANULES.NS': 'Granules India', 'STRIDES.NS': 'Strides Pharma',
+        'NATCOPHAR.NS': 'Natco Pharma', 'SUVEN.NS': 'Suven Pharmaceuticals', 'APOLLOHOSP.NS': 'Apollo Hospitals',
+        'FORTIS.NS': 'Fortis Healthcare', 'MAXHEALTH.NS': 'Max Healthcare', 'NARAYANA.NS': 'Narayana Hrudayalaya',
+        'RAINBOW.NS': "Rainbow Children's Medicare",
+        # Finance and NBFC
+        'BAJFINANCE.NS': 'Bajaj Finance', 'BAJAJFINSV.NS': 'Bajaj Finserv', 'HDFCAMC.NS': 'HDFC Asset Management',
+        'SBICARD.NS': 'SBI Cards', 'CHOLAFIN.NS': 'Cholamandalam Investment and Finance',
+        'LICI.NS': 'Life Insurance Corporation of India', 'SBILIFE.NS': 'SBI Life Insurance',
+        'HDFCLIFE.NS': 'HDFC Life Insurance', 'ICICIPRULI.NS': 'ICICI Prudential Life Insurance',
+        'MAXLIFE.NS': 'Max Life Insurance', 'RELCAPITAL.NS': 'Reliance Capital', 'IIFL.NS': 'IIFL Finance',
+        'MOTILALOFS.NS': 'Motilal Oswal Financial Services', 'ANGELONE.NS': 'Angel One',
+        'CDSL.NS': 'Central Depository Services', 'LICHSGFIN.NS': 'LIC Housing Finance',
+        'CANFINHOME.NS': 'Can Fin Homes', 'GRUH.NS': 'Gruh Finance', 'REPCO.NS': 'Repco Home Finance',
+        'APTUS.NS': 'Aptus Value Housing Finance', 'SPANDANA.NS': 'Spandana Sphoorty',
+        'CREDITACC.NS': 'CreditAccess Grameen', 'UJJIVAN.NS': 'Ujjivan Small Finance Bank',
+        'EQUITAS.NS': 'Equitas Small Finance Bank', 'SURYODAY.NS': 'Suryoday Small Finance Bank',
+        # Metals and mining
+        'TATASTEEL.NS': 'Tata Steel', 'JSWSTEEL.NS': 'JSW Steel', 'SAIL.NS': 'Steel Authority of India',
+        'JINDALSTEL.NS': 'Jindal Steel & Power', 'NMDC.NS': 'NMDC Limited',
+        'HINDALCO.NS': 'Hindalco Industries',
+        'NATIONALUM.NS': 'National Aluminium Company', 'BALRAMCHIN.NS': 'Balrampur Chini Mills',
+        'HINDZINC.NS': 'Hindustan Zinc', 'VEDL.NS': 'Vedanta', 'COALINDIA.NS': 'Coal India',
+        'GMRINFRA.NS': 'GMR Infrastructure', 'ADANIENT.NS': 'Adani Enterprises', 'WELCORP.NS': 'Welspun Corp',
+        'MOIL.NS': 'MOIL Limited', 'RATNAMANI.NS': 'Ratnamani Metals', 'APL.NS': 'APL Apollo Tubes',
+        'KALYANKJIL.NS': 'Kalyan Jewellers', 'MANAPPURAM.NS': 'Manappuram Finance', 'JSWENERGY.NS': 'JSW Energy',
+        'RSWM.NS': 'RSWM Limited', 'WELSPUNIND.NS': 'Welspun India', 'ORIENTREF.NS': 'Orient Refractories',
+        # Infrastructure, real estate and cement
+        'LT.NS': 'Larsen & Toubro', 'ULTRACEMCO.NS': 'UltraTech Cement', 'GRASIM.NS': 'Grasim Industries',
+        'SHREECEM.NS': 'Shree Cement', 'ACC.NS': 'ACC Limited', 'ADANIPORTS.NS': 'Adani Ports',
+        'CONCOR.NS': 'Container Corporation of India', 'ALLCARGO.NS': 'Allcargo Logistics', 'GATI.NS': 'Gati Limited',
+        'TCI.NS': 'Transport Corporation of India', 'IRCON.NS': 'Ircon International', 'IRB.NS': 'IRB Infrastructure',
+        'SADBHAV.NS': 'Sadbhav Engineering', 'DILIPBUILDCON.NS': 'Dilip Buildcon', 'ASHOKA.NS': 'Ashoka Buildcon',
+        'HCC.NS': 'Hindustan Construction Company', 'DLF.NS': 'DLF Limited', 'GODREJPROP.NS': 'Godrej Properties',
+        'OBEROIRLTY.NS': 'Oberoi Realty', 'PRESTIGE.NS': 'Prestige Estates', 'BRIGADE.NS': 'Brigade Enterprises',
+        'AMBUJACEM.NS': 'Ambuja Cements', 'DALMIACEMT.NS': 'Dalmia Bharat', 'RAMCOCEM.NS': 'Ramco Cements',
+        'JKCEMENT.NS': 'JK Cement', 'HEIDELBERG.NS': 'HeidelbergCement India', 'PRISM.NS': 'Prism Johnson',
+        'JKPAPER.NS': 'JK Paper', 'TNPL.NS': 'Tamil Nadu Newsprint and Papers', 'ORIENTCEM.NS': 'Orient Cement',
+        'INDIACEM.NS': 'India Cements', 'CENTURYPLY.NS': 'Century Plyboards', 'GREENPLY.NS': 'Greenply Industries',
+        'ASTRAL.NS': 'Astral Limited', 'SUPREME.NS': 'Supreme Industries', 'NILKAMAL.NS': 'Nilkamal',
+        'BIRLACEM.NS': 'Birla Corporation', 'MAGMA.NS': 'Magma Fincorp', 'KESORAMIND.NS': 'Kesoram Industries',
+        'BURNPUR.NS': 'Burnpur Cement',
+        # Defence and capital goods
+        'HAL.NS': 'Hindustan Aeronautics Limited', 'BEL.NS': 'Bharat Electronics Limited', 'BEML.NS': 'BEML Limited',
+        'GRSE.NS': 'Garden Reach Shipbuilders', 'COCHINSHIP.NS': 'Cochin Shipyard', 'MIDHANI.NS': 'Mishra Dhatu Nigam',
+        'MAZAGON.NS': 'Mazagon Dock Shipbuilders', 'RVNL.NS': 'Rail Vikas Nigam', 'DATAPATTNS.NS': 'Data Patterns',
+        'ZENTEC.NS': 'Zen Technologies', 'RTNPOWER.NS': 'RattanIndia Power', 'KECL.NS': 'Kirloskar Electric',
+        'RAILTEL.NS': 'RailTel Corporation', 'ABB.NS': 'ABB India', 'KIRLOSENG.NS': 'Kirloskar Oil Engines',
+        'ELECON.NS': 'Elecon Engineering', 'BHEL.NS': 'Bharat Heavy Electricals',
+        # Other listings
+        'NABARD.NS': 'National Bank for Agriculture and Rural Development', 'ONGCPETRO.NS': 'ONGC Petro Additions',
+        'JSHL.NS': 'Jindal Stainless Hisar', 'TATAMTRDVR.NS': 'Tata Motors DVR', 'TIITAN.NS': 'Titan Company',
+        'ORDNFAC.NS': 'Ordnance Factory Board',
+    }
+
+    # Near-duplicate articles (MinHash-LSH): copies of a story are scored once
+    USE_NEAR_DUPLICATES = True
+    NEAR_DUPLICATE_THRESHOLD = 0.6      # Estimated Jaccard similarity of title + description words
+    NEAR_DUPLICATE_NUM_PERM = 64        # MinHash signature length
+    NEAR_DUPLICATE_BANDS = 16           # LSH bands of NUM_PERM / BANDS values each
+    NEAR_DUPLICATE_HORIZON_DAYS = 30    # Stored stories new articles are compared with
+
+    # Sentiment analysis settings
+    SENTIMENT_BACKEND = os.getenv('SENTIMENT_BACKEND', 'pytorch')  # 'pytorch' or 'onnx' (int8, CPU)
+    ONNX_MODEL_DIR = os.path.join(DATA_DIR, 'onnx_finbert')
+    ONNX_NUM_THREADS = 4            # ONNX Runtime intra-op threads
+    SENTIMENT_BATCH_SIZE = 32       # Articles per transformer forward pass
+    USE_SENTIMENT_CACHE = True      # Reuse scores for headlines seen before
+    SENTIMENT_CACHE_PATH = os.path.join(DATA_DIR, 'sentiment_cache.sqlite')
+    SENTIMENT_CACHE_SIZE = 10000    # Results kept in the in-memory LRU
+
+    # Shared sentiment server (python sentiment_server.py) that loads the model once
+    USE_SENTIMENT_SERVER = os.getenv('USE_SENTIMENT_SERVER', 'false').lower() == 'true'
+    SENTIMENT_SERVER_SOCKET = os.path.join(DATA_DIR, 'sentiment.sock')
+    SENTIMENT_SERVER_PORT = 8765            # Used where Unix sockets are unavailable
+    SENTIMENT_SERVER_MAX_BATCH = 64         # Most texts sent to the model at once
+    SENTIMENT_SERVER_MAX_WAIT_MS = 10       # How long a batch waits for more requests
+    SENTIMENT_SERVER_TIMEOUT = 60           # Client socket timeout (seconds)
+
+    # Decayed sentiment: articles weigh 2^(-age / half-life), state kept between runs
+    USE_DECAYED_SENTIMENT = False
+    SENTIMENT_HALF_LIFE_HOURS = 24
+    SENTIMENT_STATE_DIR = os.path.join(DATA_DIR, 'sentiment_state')
+
+    # Cascade: TextBlob scores every text, only uncertain ones go to the transformer
+    SENTIMENT_CASCADE = False
+    SENTIMENT_CASCADE_BAND = 0.3          # Escalate when |TextBlob polarity| is below this
+    SENTIMENT_CASCADE_AUDIT_RATE = 0.05   # Share of confident texts re-checked to measure divergence
+    SENTIMENT_CASCADE_AUDIT_SEED = 42     # Seed of the audit sample's random generator
+
+    # Concurrent news collection. Politeness comes from per-source token
+    # buckets: rate = requests/second, burst = bucket size, concurrency =
+    # simultaneous requests, timeout = seconds per HTTP request. yfinance
+    # makes its own requests with its own timeouts, so yahoo has none.
+    USE_CONCURRENT_NEWS = True
+    NEWS_SOURCE_LIMITS = {
+        'newsapi': {'rate': 1.0, 'burst': 5, 'concurrency': 2, 'timeout': 10},
+        'yahoo': {'rate': 4.0, 'burst': 8, 'concurrency': 4},
+        'moneycontrol': {'rate': 2.0, 'burst': 4, 'concurrency': 2, 'timeout': 10},
+        'economictimes': {'rate': 2.0, 'burst': 4, 'concurrency': 2, 'timeout': 10},
+    }
+
+    # Scraped pages are cached with their ETag/Last-Modified and parse result.
+    # Within Cache-Control max-age (never less than the floor) a page is not
+    # requested; after that it is revalidated and only re-parsed if it changed.
+    USE_HTTP_CACHE = True
+    HTTP_CACHE_PATH = os.path.join(DATA_DIR, 'http_cache.sqlite')
+    HTTP_CACHE_MIN_TTL_SECONDS = 600  # Floor on freshness, whatever Cache-Control says
 
     # Indian Stock universe organized by TOP 10 industry sectors (up to 25 stocks per sector)
     STOCK_SECTORS = {
@@ -65,7 +307,7 @@ class Config:
             # Gas Companies
             'GAIL.NS', 'IGL.NS', 'MGL.NS', 'GSPL.NS', 'ATGL.NS',
             # Petrochemicals
-            'ONGCPETRO.NS', 'MRPL.NS', 'CPCL.NS', 'NRL.NS', 'HPCL.NS',
+            'ONGCPETRO.NS', 'MRPL.NS', 'CPCL.NS', 'NRL.NS',
             # Power Generation
             'NTPC.NS', 'POWERGRID.NS', 'NHPC.NS', 'SJVN.NS', 'THERMAX.NS',
             # Renewable Energy
@@ -106,7 +348,7 @@ class Config:
             # Specialty Pharma
             'ALKEM.NS', 'LALPATHLAB.NS', 'METROPOLIS.NS', 'THYROCARE.NS', 'KRBL.NS',
             # API & Formulations
-            'DIVIS.NS', 'GRANULES.NS', 'STRIDES.NS', 'NATCOPHAR.NS', 'SUVEN.NS',
+            'GRANULES.NS', 'STRIDES.NS', 'NATCOPHAR.NS', 'SUVEN.NS',
             # Healthcare Services
             'APOLLOHOSP.NS', 'FORTIS.NS', 'MAXHEALTH.NS', 'NARAYANA.NS', 'RAINBOW.NS'
         ],
@@ -128,13 +370,13 @@ class Config:
             # Steel Companies
             'TATASTEEL.NS', 'JSWSTEEL.NS', 'SAIL.NS', 'JINDALSTEL.NS', 'NMDC.NS',
             # Aluminum & Copper
-            'HINDALCO.NS', 'NALCO.NS', 'BALRAMCHIN.NS', 'HINDZINC.NS', 'VEDL.NS',
+            'HINDALCO.NS', 'NATIONALUM.NS', 'BALRAMCHIN.NS', 'HINDZINC.NS', 'VEDL.NS',
             # Coal & Mining
             'COALINDIA.NS', 'GMRINFRA.NS', 'ADANIENT.NS', 'WELCORP.NS', 'MOIL.NS',
             # Specialty Metals
             'RATNAMANI.NS', 'APL.NS', 'KALYANKJIL.NS', 'TIITAN.NS', 'MANAPPURAM.NS',
             # Metal Processing
-            'JSWENERGY.NS', 'JSPL.NS', 'RSWM.NS', 'WELSPUNIND.NS', 'ORIENTREF.NS'
+            'JSWENERGY.NS', 'RSWM.NS', 'WELSPUNIND.NS', 'ORIENTREF.NS'
         ],
 
         'INFRASTRUCTURE': [
@@ -189,6 +431,26 @@ class Config:
     MAX_RECOMMENDATIONS = 11   # Maximum number of buy recommendations
     RISK_TOLERANCE = 'medium'  # low, medium, high
 
+    # AI result cache keyed on inputs rounded into these buckets
+    USE_AI_CACHE = True
+    AI_CACHE_TTL_SECONDS = 6 * 3600
+    AI_CACHE_SIZE = 2000            # Results kept in the in-memory LRU
+    AI_CACHE_PATH = os.path.join(DATA_DIR, 'ai_cache.sqlite')
+    AI_CACHE_BUCKETS = {
+        'rsi': 2.0,                 # RSI to the nearest 2
+        'price_change': 0.0025,     # Daily change to 0.25%
+        'volume_ratio': 0.25,
+        'volatility': 0.02,
+        'stoch_k': 5.0,
+        'sentiment_score': 0.1,
+        'current_price': 0.01,      # Relative grid: 1% steps
+        'market_cap': 0.05,         # Relative grid: 5% steps
+    }
+
+    # Universe snapshot shared by the web endpoints
+    SNAPSHOT_MAX_AGE_SECONDS = 1800  # Rebuild the snapshot after 30 minutes
+    SNAPSHOT_WARM_ON_START = True    # Build the first snapshot in the background at startup
+
     # Web app settings
     DEBUG = True
     HOST = '127.0.0.1'
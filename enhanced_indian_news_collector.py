@@ -4,6 +4,12 @@ from datetime import datetime, timedelta
 from config import Config
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rate_limit import SourceRateLimiter
+from entity_linker import EntityLinker
+from http_cache import HTTPCache
+from html_extract import LXML_AVAILABLE, build_articles, extract_links
 
 # Try to import optional dependencies
 try:
@@ -25,13 +31,26 @@ class EnhancedIndianNewsCollector:
         print(f"🔍 NewsAPI available: {NEWSAPI_AVAILABLE}")
         print(f"🔑 NEWS_API_KEY configured: {'✓ YES' if Config.NEWS_API_KEY else '✗ NO'}")
 
-        self.news_api = NewsApiClient(api_key=Config.NEWS_API_KEY) if (NEWSAPI_AVAILABLE and Config.NEWS_API_KEY) else None
+        # Per-source rate limits, concurrency and request timeouts
+        self.rate_limiter = SourceRateLimiter()
+
+        # NewsAPI's client has a fixed timeout; the session replaces it with the configured one
+        self.news_api = NewsApiClient(
+            api_key=Config.NEWS_API_KEY, session=self.rate_limiter.session('newsapi')
+        ) if (NEWSAPI_AVAILABLE and Config.NEWS_API_KEY) else None
 
         if self.news_api:
             print("✅ NewsAPI client initialized successfully")
         else:
             print("❌ NewsAPI client not initialized - will use fallback methods only")
 
+        # Scraped pages are revalidated instead of re-downloaded and re-parsed
+        self.http_cache = HTTPCache() if Config.USE_HTTP_CACHE else None
+
+        # One bounded thread pool per source
+        self._source_pools = {}
+        self._pool_lock = threading.Lock()
+
         # Enhanced Indian financial news sources
         self.indian_news_sources = {
             'primary': [
@@ -56,42 +75,19 @@ class EnhancedIndianNewsCollector:
             ]
         }
 
-        # Company name mapping (same as before but enhanced)
-        self.indian_company_names = {
-            # Banking
-            'HDFCBANK.NS': 'HDFC Bank', 'ICICIBANK.NS': 'ICICI Bank', 'KOTAKBANK.NS': 'Kotak Mahindra Bank',
-            'SBIN.NS': 'State Bank of India', 'AXISBANK.NS': 'Axis Bank', 'INDUSINDBK.NS': 'IndusInd Bank',
-
-            # IT
-            'TCS.NS': 'Tata Consultancy Services', 'INFY.NS': 'Infosys', 'HCLTECH.NS': 'HCL Technologies',
-            'WIPRO.NS': 'Wipro', 'TECHM.NS': 'Tech Mahindra',
-
-            # Energy
-            'RELIANCE.NS': 'Reliance Industries', 'ONGC.NS': 'Oil and Natural Gas Corporation',
-            'BPCL.NS': 'Bharat Petroleum', 'IOC.NS': 'Indian Oil Corporation',
-
-            # Auto
-            'MARUTI.NS': 'Maruti Suzuki', 'TATAMOTORS.NS': 'Tata Motors', 'M&M.NS': 'Mahindra & Mahindra',
-            'BAJAJ-AUTO.NS': 'Bajaj Auto', 'HEROMOTOCO.NS': 'Hero MotoCorp',
-
-            # Pharma
-            'SUNPHARMA.NS': 'Sun Pharmaceutical', 'DRREDDY.NS': 'Dr Reddys Laboratories', 'CIPLA.NS': 'Cipla',
+        # Company names come from the config, the one place symbols are named
+        self.indian_company_names = Config.COMPANY_NAMES
 
-            # FMCG
-            'HINDUNILVR.NS': 'Hindustan Unilever', 'ITC.NS': 'ITC Limited', 'NESTLEIND.NS': 'Nestle India',
-
-            # Defence
-            'HAL.NS': 'Hindustan Aeronautics Limited', 'BEL.NS': 'Bharat Electronics Limited',
-            'BEML.NS': 'BEML Limited', 'GRSE.NS': 'Garden Reach Shipbuilders',
-            'COCHINSHIP.NS': 'Cochin Shipyard', 'MIDHANI.NS': 'Mishra Dhatu Nigam',
-            'ORDNFAC.NS': 'Ordnance Factory Board', 'MAZAGON.NS': 'Mazagon Dock Shipbuilders',
-            'BHEL.NS': 'Bharat Heavy Electricals', 'DATAPATTNS.NS': 'Data Patterns',
-
-            # Add more as needed...
-        }
+        # Names, tickers and aliases compiled once for linking news to symbols
+        self.entity_linker = (
+            EntityLinker(self.indian_company_names) if Config.USE_ENTITY_LINKING else None
+        )
 
     def get_stock_news_enhanced(self, symbol, days_back=7):
         """Enhanced news collection for Indian stocks"""
+        if Config.USE_CONCURRENT_NEWS:
+            return self._collect_concurrent([symbol], days_back)[0]
+
         all_articles = []
         print(f"📰 Collecting news for {symbol}...")
 
@@ -143,6 +139,7 @@ class EnhancedIndianNewsCollector:
 
             for query in search_queries[:2]:  # Limit to avoid API quota
                 try:
+                    self.rate_limiter.wait('newsapi')
                     response = self.news_api.get_everything(
                         q=query,
                         from_param=(datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d'),
@@ -169,6 +166,14 @@ class EnhancedIndianNewsCollector:
                 except Exception as e:
                     print(f"NewsAPI query error for {query}: {e}")
 
+            # Loose queries also return general market stories; keep those naming the company.
+            # Without a known name only the ticker could be checked, so keep everything.
+            if self.entity_linker and self.entity_linker.has_name(symbol):
+                relevant = [article for article in articles if self.entity_linker.mentions(article, symbol)]
+                if len(relevant) < len(articles):
+                    print(f"   🔗 NewsAPI: dropped {len(articles) - len(relevant)} articles not mentioning {company_name}")
+                articles = relevant
+
         except Exception as e:
             print(f"NewsAPI error for {symbol}: {e}")
 
@@ -181,6 +186,7 @@ class EnhancedIndianNewsCollector:
         try:
             import yfinance as yf
             ticker = yf.Ticker(symbol)
+            self.rate_limiter.wait('yahoo')
             news = ticker.news
 
             for item in news[:10]:
@@ -204,8 +210,8 @@ class EnhancedIndianNewsCollector:
         """Scrape MoneyControl for Indian stock news"""
         articles = []
 
-        if not BS4_AVAILABLE:
-            print("BeautifulSoup not available, skipping MoneyControl scraping")
+        if not (LXML_AVAILABLE or BS4_AVAILABLE):
+            print("Neither lxml nor BeautifulSoup available, skipping MoneyControl scraping")
             return articles
 
         try:
@@ -215,53 +221,48 @@ class EnhancedIndianNewsCollector:
             # Search URL for MoneyControl
             search_url = f"https://www.moneycontrol.com/news/tags/{mc_symbol.lower()}.html"
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
+            links = self._fetch_page('moneycontrol', search_url, self._parse_moneycontrol)
+            articles = build_articles('moneycontrol', links, symbol)
 
-            response = requests.get(search_url, headers=headers, timeout=10)
+        except Exception as e:
+            print(f"MoneyControl scraping error for {symbol}: {e}")
 
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+        return articles
 
-                # Find news articles (MoneyControl structure)
-                news_items = soup.find_all('div', class_='news_item')[:5]  # Limit to 5
+    def _parse_moneycontrol(self, content):
+        """(title, url) pairs of the articles on a MoneyControl tag page"""
+        if LXML_AVAILABLE:
+            return extract_links('moneycontrol', content)
 
-                for item in news_items:
-                    try:
-                        title_elem = item.find('a')
-                        if title_elem:
-                            title = title_elem.get_text(strip=True)
-                            url = title_elem.get('href')
+        links = []
+        soup = BeautifulSoup(content, 'html.parser')
 
-                            # Make URL absolute if relative
-                            if url and not url.startswith('http'):
-                                url = f"https://www.moneycontrol.com{url}"
+        # Find news articles (MoneyControl structure)
+        news_items = soup.find_all('div', class_='news_item')[:5]  # Limit to 5
 
-                            articles.append({
-                                'title': title,
-                                'description': title,  # MoneyControl doesn't always have separate description
-                                'content': title,
-                                'url': url,
-                                'published_at': datetime.now().isoformat(),
-                                'source': 'MoneyControl',
-                                'symbol': symbol,
-                                'method': 'MoneyControl Scraping'
-                            })
-                    except Exception as e:
-                        continue
+        for item in news_items:
+            try:
+                title_elem = item.find('a')
+                if title_elem:
+                    title = title_elem.get_text(strip=True)
+                    url = title_elem.get('href')
 
-        except Exception as e:
-            print(f"MoneyControl scraping error for {symbol}: {e}")
+                    # Make URL absolute if relative
+                    if url and not url.startswith('http'):
+                        url = f"https://www.moneycontrol.com{url}"
 
-        return articles
+                    links.append((title, url))
+            except Exception as e:
+                continue
+
+        return links
 
     def _scrape_economic_times(self, symbol):
         """Scrape Economic Times for Indian stock news"""
         articles = []
 
-        if not BS4_AVAILABLE:
-            print("BeautifulSoup not available, skipping Economic Times scraping")
+        if not (LXML_AVAILABLE or BS4_AVAILABLE):
+            print("Neither lxml nor BeautifulSoup available, skipping Economic Times scraping")
             return articles
 
         try:
@@ -270,48 +271,59 @@ class EnhancedIndianNewsCollector:
             # Economic Times search
             search_url = f"https://economictimes.indiatimes.com/topic/{company_name.replace(' ', '-').lower()}"
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-
-            response = requests.get(search_url, headers=headers, timeout=10)
-
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-
-                # Find news articles (ET structure)
-                news_items = soup.find_all('div', class_='eachStory')[:5]
-
-                for item in news_items:
-                    try:
-                        title_elem = item.find('h3')
-                        if title_elem:
-                            link_elem = title_elem.find('a')
-                            if link_elem:
-                                title = link_elem.get_text(strip=True)
-                                url = link_elem.get('href')
-
-                                if url and not url.startswith('http'):
-                                    url = f"https://economictimes.indiatimes.com{url}"
-
-                                articles.append({
-                                    'title': title,
-                                    'description': title,
-                                    'content': title,
-                                    'url': url,
-                                    'published_at': datetime.now().isoformat(),
-                                    'source': 'Economic Times',
-                                    'symbol': symbol,
-                                    'method': 'ET Scraping'
-                                })
-                    except Exception as e:
-                        continue
+            links = self._fetch_page('economictimes', search_url, self._parse_economic_times)
+            articles = build_articles('economictimes', links, symbol)
 
         except Exception as e:
             print(f"Economic Times scraping error for {symbol}: {e}")
 
         return articles
 
+    def _parse_economic_times(self, content):
+        """(title, url) pairs of the articles on an Economic Times topic page"""
+        if LXML_AVAILABLE:
+            return extract_links('economictimes', content)
+
+        links = []
+        soup = BeautifulSoup(content, 'html.parser')
+
+        # Find news articles (ET structure)
+        news_items = soup.find_all('div', class_='eachStory')[:5]
+
+        for item in news_items:
+            try:
+                title_elem = item.find('h3')
+                if title_elem:
+                    link_elem = title_elem.find('a')
+                    if link_elem:
+                        title = link_elem.get_text(strip=True)
+                        url = link_elem.get('href')
+
+                        if url and not url.startswith('http'):
+                            url = f"https://economictimes.indiatimes.com{url}"
+
+                        links.append((title, url))
+            except Exception as e:
+                continue
+
+        return links
+
+    def _fetch_page(self, source, url, parse):
+        """parse(page content) for a scraped page, through the HTTP cache when enabled"""
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        timeout = self.rate_limiter.timeout(source)
+
+        if self.http_cache:
+            links = self.http_cache.fetch_parsed(url, parse, headers=headers, timeout=timeout,
+                                                 before_request=lambda: self.rate_limiter.wait(source))
+            return links or []
+
+        self.rate_limiter.wait(source)
+        response = requests.get(url, headers=headers, timeout=timeout)
+        return parse(response.content) if response.status_code == 200 else []
+
     def get_indian_market_news(self):
         """Get general Indian market news from multiple sources"""
         articles = []
@@ -319,6 +331,7 @@ class EnhancedIndianNewsCollector:
         # NewsAPI for market news
         if self.news_api:
             try:
+                self.rate_limiter.wait('newsapi')
                 response = self.news_api.get_everything(
                     q='Sensex OR Nifty OR "Indian stock market" OR BSE OR NSE',
                     language='en',
@@ -344,13 +357,37 @@ class EnhancedIndianNewsCollector:
 
         return articles
 
+    def link_market_news(self, articles):
+        """Copies of market articles for every symbol they mention"""
+        if not self.entity_linker:
+            return []
+
+        linked = []
+        for article in articles:
+            for symbol in self.entity_linker.link_article(article):
+                linked.append({**article, 'symbol': symbol, 'method': f"{article.get('method')} (linked)"})
+        if linked:
+            print(f"🔗 Linked {len(articles)} market articles to {len(linked)} symbol mentions")
+        return linked
+
+    def get_linked_market_news(self):
+        """Market news attributed to the symbols it mentions, as {symbol: [articles]}"""
+        by_symbol = {}
+        for article in self.link_market_news(self.get_indian_market_news()):
+            by_symbol.setdefault(article['symbol'], []).append(article)
+        return by_symbol
+
     def collect_all_news_enhanced(self, symbols):
         """Enhanced news collection for all symbols"""
+        if Config.USE_CONCURRENT_NEWS:
+            return self._collect_all_concurrent(symbols)
+
         all_news = []
 
         print("Collecting Indian market news...")
         market_news = self.get_indian_market_news()
         all_news.extend(market_news)
+        all_news.extend(self.link_market_news(market_news))
 
         print(f"Collecting enhanced news for {len(symbols)} Indian stocks...")
         for i, symbol in enumerate(symbols):
@@ -368,3 +405,68 @@ class EnhancedIndianNewsCollector:
 
         print(f"Total articles collected: {len(all_news)}")
         return pd.DataFrame(all_news)
+
+    def _collect_all_concurrent(self, symbols):
+        """Fetch market news and every source for every symbol in parallel"""
+        print(f"Collecting news for {len(symbols)} Indian stocks from all sources concurrently...")
+        start_time = time.time()
+
+        market_future = self._pool('newsapi').submit(self.get_indian_market_news) if self.news_api else None
+        per_symbol = self._collect_concurrent(symbols, Config.NEWS_LOOKBACK_DAYS)
+
+        all_news = market_future.result() if market_future else []
+        all_news.extend(self.link_market_news(all_news))
+        for articles in per_symbol:
+            all_news.extend(articles)
+
+        print(f"Total articles collected: {len(all_news)} in {time.time() - start_time:.1f}s")
+        return pd.DataFrame(all_news)
+
+    def _collect_concurrent(self, symbols, days_back):
+        """Run all source requests for all symbols at once, returning one article list per symbol
+
+        Each source has its own thread pool sized by its concurrency limit, so a
+        slow site only queues its own requests. Request rates are held by the
+        per-source token buckets inside the fetch methods.
+        """
+        sources = self._news_sources(days_back)
+        futures = [
+            [(name, self._pool(name).submit(fetch, symbol)) for name, fetch in sources]
+            for symbol in symbols
+        ]
+
+        results = []
+        for symbol, symbol_futures in zip(symbols, futures):
+            articles = []
+            counts = []
+            for name, future in symbol_futures:
+                try:
+                    source_articles = future.result()
+                except Exception as e:
+                    print(f"News source {name} failed for {symbol}: {e}")
+                    source_articles = []
+                articles.extend(source_articles)
+                counts.append(f"{name} {len(source_articles)}")
+            print(f"📊 Total articles for {symbol}: {len(articles)} ({', '.join(counts)})")
+            results.append(articles)
+        return results
+
+    def _news_sources(self, days_back):
+        """(source name, fetch function) pairs in the order articles are combined"""
+        sources = []
+        if self.news_api:
+            sources.append(('newsapi', lambda symbol: self._get_newsapi_indian(symbol, days_back)))
+        sources.append(('yahoo', self._get_yahoo_news))
+        sources.append(('moneycontrol', self._scrape_moneycontrol))
+        sources.append(('economictimes', self._scrape_economic_times))
+        return sources
+
+    def _pool(self, source):
+        """Thread pool for one source, created on first use"""
+        with self._pool_lock:
+            if source not in self._source_pools:
+                self._source_pools[source] = ThreadPoolExecutor(
+                    max_workers=self.rate_limiter.concurrency(source),
+                    thread_name_prefix=f"news-{source}"
+                )
+            return self._source_pools[source]
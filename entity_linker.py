@@ -0,0 +1,160 @@
+"""
+Entity linking of news text to stock symbols with an Aho-Corasick automaton.
+
+All company names, NSE tickers and aliases (Config.ENTITY_ALIASES) are
+compiled into one automaton, so an article is scanned once, in time linear
+in its length, however many companies are known. Names and aliases match
+case-insensitively. Tickers match only when written in capitals, so "ITC"
+is found but "itc" inside ordinary words is not. Every match must start
+and end on a word boundary. When one match lies inside a longer one, only
+the longer one counts, so "State Bank of India" does not also report
+"Bank of India".
+"""
+
+from collections import deque
+from config import Config
+
+MIN_TICKER_LENGTH = 3  # Two-letter tickers collide with ordinary abbreviations
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every pattern in one pass"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(pattern length, payload)]
+        self._built = False
+
+    def add(self, pattern, payload):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), payload))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._built = True
+
+    def find(self, text):
+        """Yield (start, end, payload) for every pattern occurrence"""
+        if not self._built:
+            self.build()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, payload in self._output[state]:
+                yield position - length + 1, position + 1, payload
+
+
+def _is_boundary(text, index):
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+class EntityLinker:
+    """Finds which symbols a piece of news text mentions"""
+
+    def __init__(self, company_names=None, symbols=None, aliases=None):
+        company_names = company_names or {}
+        symbols = symbols if symbols is not None else Config.STOCK_SYMBOLS
+        aliases = aliases if aliases is not None else Config.ENTITY_ALIASES
+
+        self._automaton = AhoCorasick()
+        self._named = set()  # Symbols with a company name or alias, not just a ticker
+        patterns = set()
+
+        def add(pattern, symbol, case_sensitive):
+            pattern = pattern.strip()
+            key = (pattern if case_sensitive else pattern.lower(), symbol, case_sensitive)
+            if pattern and key not in patterns:
+                patterns.add(key)
+                # The automaton runs over lowercased text; case is checked on a match
+                self._automaton.add(pattern.lower(), (symbol, pattern if case_sensitive else None))
+
+        for symbol, name in company_names.items():
+            self._named.add(symbol)
+            add(name, symbol, False)
+            for suffix in (' Limited', ' Ltd'):
+                if name.endswith(suffix):
+                    # "NTPC Limited" -> "NTPC", which like a ticker must be in capitals
+                    short = name[:-len(suffix)]
+                    add(short, symbol, short.isupper())
+        for symbol in set(symbols) | set(company_names):
+            ticker = symbol.split('.')[0]
+            if len(ticker) >= MIN_TICKER_LENGTH:
+                add(ticker, symbol, True)
+        for symbol, names in aliases.items():
+            self._named.add(symbol)
+            for name in names:
+                add(name, symbol, name.isupper())
+
+        self._automaton.build()
+        self.pattern_count = len(patterns)
+
+    def has_name(self, symbol):
+        """Whether the symbol can be found by name, not only by its capitalised ticker"""
+        return symbol in self._named
+
+    def link(self, text):
+        """Symbols mentioned in text, in order of first mention"""
+        if not isinstance(text, str) or not text:
+            return []
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters lowercase to two; keep positions aligned with text
+            lowered = ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+        matches = []
+        for start, end, (symbol, exact) in self._automaton.find(lowered):
+            if not (_is_boundary(text, start - 1) and _is_boundary(text, end)):
+                continue
+            if exact is not None and text[start:end] != exact:
+                continue
+            matches.append((start, end, symbol))
+
+        # Drop matches inside a longer one ("Bank of India" in "State Bank of India")
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        symbols = []
+        covered_until = -1
+        for start, end, symbol in matches:
+            if end <= covered_until:
+                continue
+            covered_until = max(covered_until, end)
+            if symbol not in symbols:
+                symbols.append(symbol)
+        return symbols
+
+    def link_article(self, article):
+        """Symbols mentioned anywhere in an article's title, description or content"""
+        text = ' \n '.join(
+            article.get(field) for field in ('title', 'description', 'content')
+            if isinstance(article.get(field), str)
+        )
+        return self.link(text)
+
+    def mentions(self, article, symbol):
+        """Whether the article names the symbol's company"""
+        return symbol in self.link_article(article)
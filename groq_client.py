@@ -0,0 +1,224 @@
+"""
+Async, rate-limit-aware client for the Groq chat completions API.
+
+Requests share one aiohttp session (and its connection pool) and pass two
+token buckets first: one for requests per minute and one for tokens per
+minute, sized from Config.GROQ_REQUESTS_PER_MINUTE and
+Config.GROQ_TOKENS_PER_MINUTE. At most Config.GROQ_MAX_IN_FLIGHT requests
+run at once. A 429 or 5xx answer is retried on the same model after its
+Retry-After delay (or an exponential backoff) plus jitter, and a 429 pauses
+every other request until the delay has passed. Tokens reserved for an
+attempt are given back unless it returned a completion, and then only the
+unused part is. Models are tried in the order model_registry suggests,
+skipping those whose circuit is open.
+
+The client runs its own event loop in a background thread, so the
+synchronous analyzer can call complete_sync / complete_many_sync from any
+thread and still share the session and limits.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from config import Config
+from rate_limit import TokenBucket
+from model_registry import model_registry, classify_http_error
+
+# aiohttp is optional; without it the analyzer keeps using requests
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class GroqClient:
+    """Shared async Groq client with RPM/TPM budgets and Retry-After handling"""
+
+    def __init__(self, api_key, models, url=GROQ_URL, requests_per_minute=None,
+                 tokens_per_minute=None, max_in_flight=None):
+        self.api_key = api_key
+        self.models = list(models)
+        self.url = url
+        self.max_in_flight = max_in_flight or Config.GROQ_MAX_IN_FLIGHT
+
+        rpm = requests_per_minute or Config.GROQ_REQUESTS_PER_MINUTE
+        tpm = tokens_per_minute or Config.GROQ_TOKENS_PER_MINUTE
+        self.request_bucket = TokenBucket(rpm / 60.0, rpm)
+        self.token_bucket = TokenBucket(tpm / 60.0, tpm)
+
+        self._resume_at = 0.0  # monotonic time before which nothing is sent
+        self._session = None
+        self._semaphore = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="groq-client", daemon=True)
+        self._thread.start()
+
+    # Synchronous entry points, safe to call from any thread
+
+    def complete_sync(self, messages, max_tokens=2000, **params):
+        """Blocking complete(); returns the reply text or None"""
+        future = asyncio.run_coroutine_threadsafe(self.complete(messages, max_tokens, **params), self._loop)
+        return future.result()
+
+    def complete_many_sync(self, requests, **params):
+        """Blocking complete_many() for [(messages, max_tokens), ...]"""
+        future = asyncio.run_coroutine_threadsafe(self.complete_many(requests, **params), self._loop)
+        return future.result()
+
+    def close(self):
+        """Close the session and stop the background loop"""
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # Async API
+
+    async def complete_many(self, requests, **params):
+        """Run [(messages, max_tokens), ...] concurrently within the limits, in order"""
+        return await asyncio.gather(
+            *(self.complete(messages, max_tokens, **params) for messages, max_tokens in requests)
+        )
+
+    async def complete(self, messages, max_tokens=2000, temperature=0.3, top_p=0.9):
+        """Reply text from the first healthy model that answers, None if all fail"""
+        for model in model_registry.order(self.models):
+            if not model_registry.allow(model):
+                continue
+            payload = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "top_p": top_p
+            }
+            content, error_class, message, latency = await self._request(payload)
+            if content and len(content) > 100:  # Ensure we got a substantial response
+                model_registry.record_success(model, latency)
+                print(f"✓ Groq analysis completed with {model}")
+                return content
+            if content:
+                error_class, message = 'short_response', f"{len(content)} characters"
+                print(f"⚠ Short response from {model}, trying next model")
+            model_registry.record_failure(model, error_class, message)
+
+        print("✗ All Groq models failed")
+        return None
+
+    async def _request(self, payload):
+        """Send one completion with retries; (content, error class, message, latency)"""
+        model = payload['model']
+        prompt_tokens = sum(estimate_tokens(message['content']) for message in payload['messages'])
+        reserved = min(prompt_tokens + payload['max_tokens'], self.token_bucket.capacity)
+        error_class, message = 'error', None
+
+        for attempt in range(Config.GROQ_MAX_RETRIES + 1):
+            await self._take(self.request_bucket, 1)
+            await self._take(self.token_bucket, reserved)
+            # Tokens go back to the bucket unless a completion used them
+            refund = reserved
+
+            delay = None
+            try:
+                async with self._get_semaphore():
+                    await self._wait_for_resume()
+                    started = time.monotonic()
+                    try:
+                        print(f"🤖 Analyzing with Groq model: {model}")
+                        session = await self._get_session()
+                        async with session.post(self.url, json=payload) as response:
+                            if response.status in RETRY_STATUSES:
+                                error_class = classify_http_error(response.status)
+                                message = f"HTTP {response.status}"
+                                delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                                if response.status == 429:
+                                    # Everyone waits, not just this request
+                                    self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                                print(f"⚠ Groq {model} returned {response.status}, retrying in {delay:.1f}s")
+                            elif response.status >= 400:
+                                body = await response.text()
+                                print(f"✗ Error with {model}: HTTP {response.status}")
+                                return None, classify_http_error(response.status, body), body, None
+                            else:
+                                result = await response.json()
+                                content = result['choices'][0]['message']['content']
+                                used = (result.get('usage') or {}).get('total_tokens')
+                                refund = max(0, reserved - used) if used is not None else 0
+                                return content, None, None, time.monotonic() - started
+                    except asyncio.TimeoutError as e:
+                        error_class, message = 'timeout', repr(e)
+                        delay = self._retry_delay(attempt)
+                        print(f"✗ Error with {model}: timeout, retrying in {delay:.1f}s")
+                    except aiohttp.ClientError as e:
+                        error_class, message = 'network', repr(e)
+                        delay = self._retry_delay(attempt)
+                        print(f"✗ Error with {model}: {e!r}, retrying in {delay:.1f}s")
+                    except (KeyError, IndexError, TypeError, ValueError) as e:
+                        print(f"✗ Error with {model}: unexpected response {e!r}")
+                        return None, 'bad_response', repr(e), None
+            finally:
+                if refund:
+                    self.token_bucket.release(refund)
+
+            if attempt < Config.GROQ_MAX_RETRIES:
+                await asyncio.sleep(delay)
+
+        print(f"✗ Giving up on {model} after {Config.GROQ_MAX_RETRIES + 1} attempts")
+        return None, error_class, message, None
+
+    def _retry_delay(self, attempt, retry_after=None):
+        """Retry-After if the server sent one, else capped exponential backoff, plus jitter"""
+        delay = retry_after_seconds(retry_after)
+        if delay is None:
+            delay = min(Config.GROQ_BACKOFF_MAX, Config.GROQ_BACKOFF_BASE * 2 ** attempt)
+        return delay + random.uniform(0, Config.GROQ_BACKOFF_BASE)
+
+    async def _take(self, bucket, tokens):
+        while not bucket.try_acquire(tokens):
+            await asyncio.sleep(max(0.01, bucket.wait_time(tokens)))
+
+    async def _wait_for_resume(self):
+        while True:
+            remaining = self._resume_at - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=Config.GROQ_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight)
+            )
+        return self._session
@@ -0,0 +1,153 @@
+"""
+HTTP cache with conditional requests for the news scrapers.
+
+Each page is stored with its ETag, Last-Modified, a hash of its body and
+the result of parsing it. While a page is fresh (Cache-Control max-age,
+never less than Config.HTTP_CACHE_MIN_TTL_SECONDS) it is not requested at
+all. Once stale it is revalidated with If-None-Match / If-Modified-Since;
+on a 304, or a 200 whose body hashes the same as before, the stored parse
+result is returned and the page is not parsed again.
+
+Parse results are stored as JSON and handed back exactly as stored, so a
+parse function should return only what the body determines; the news
+collector caches (title, url) pairs and builds timestamped articles from
+them on every fetch.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import requests
+from config import Config
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+
+def freshness_seconds(headers, floor=None):
+    """Seconds a response stays fresh, None if it must not be stored
+
+    Cache-Control max-age is honoured, but never below the floor, so pages
+    sent with no-cache or a tiny max-age are still fetched at most once
+    per floor. no-store is respected.
+    """
+    floor = Config.HTTP_CACHE_MIN_TTL_SECONDS if floor is None else floor
+    cache_control = headers.get('Cache-Control', '') or ''
+    if 'no-store' in cache_control.lower():
+        return None
+    match = _MAX_AGE.search(cache_control)
+    max_age = int(match.group(1)) if match else 0
+    return max(max_age, floor)
+
+
+class HTTPCache:
+    """SQLite-backed page cache: conditional GETs plus stored parse results"""
+
+    def __init__(self, path=None, min_ttl_seconds=None):
+        self.path = path or Config.HTTP_CACHE_PATH
+        self.min_ttl = Config.HTTP_CACHE_MIN_TTL_SECONDS if min_ttl_seconds is None else min_ttl_seconds
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self.stats = {'fresh': 0, 'not_modified': 0, 'unchanged': 0, 'parsed': 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body_hash TEXT, "
+            "body BLOB, parsed TEXT, expires_at REAL)"
+        )
+        self._db.commit()
+
+    def fetch_parsed(self, url, parse, headers=None, timeout=None, before_request=None):
+        """parse(body) for the page at url, parsing again only when the body changed
+
+        before_request is called right before any network request, so rate
+        limits are only spent on pages that are actually fetched. Returns
+        None when the page cannot be fetched (non-200 response).
+        """
+        entry = self._load(url)
+        if entry and entry['parsed'] is not None and entry['expires_at'] > time.time():
+            self._count('fresh')
+            return json.loads(entry['parsed'])
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        if before_request:
+            before_request()
+        response = self._session.get(url, headers=request_headers, timeout=timeout)
+        ttl = freshness_seconds(response.headers, self.min_ttl)
+        etag = response.headers.get('ETag') or (entry and entry['etag'])
+        last_modified = response.headers.get('Last-Modified') or (entry and entry['last_modified'])
+
+        if response.status_code == 304 and entry:
+            self._count('not_modified')
+            if entry['parsed'] is None:
+                return self._parse_and_store(url, zlib.decompress(entry['body']), parse, ttl, etag, last_modified)
+            self._touch(url, ttl, etag, last_modified)
+            return json.loads(entry['parsed'])
+
+        if response.status_code != 200:
+            return None
+
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        if entry and entry['body_hash'] == body_hash and entry['parsed'] is not None:
+            self._count('unchanged')
+            self._touch(url, ttl, etag, last_modified)
+            return json.loads(entry['parsed'])
+
+        return self._parse_and_store(url, body, parse, ttl, response.headers.get('ETag'),
+                                     response.headers.get('Last-Modified'))
+
+    def _parse_and_store(self, url, body, parse, ttl, etag, last_modified):
+        self._count('parsed')
+        result = parse(body)
+        with self._lock:
+            if ttl is None:
+                self._db.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, hashlib.sha256(body).hexdigest(), zlib.compress(body),
+                     json.dumps(result, default=str), time.time() + ttl)
+                )
+            self._db.commit()
+        return result
+
+    def _touch(self, url, ttl, etag, last_modified):
+        """Extend a revalidated entry with the validators of the latest response"""
+        with self._lock:
+            if ttl is None:
+                self._db.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            else:
+                self._db.execute(
+                    "UPDATE http_cache SET etag = ?, last_modified = ?, expires_at = ? WHERE url = ?",
+                    (etag, last_modified, time.time() + ttl, url)
+                )
+            self._db.commit()
+
+    def _load(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, body_hash, body, parsed, expires_at FROM http_cache WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('etag', 'last_modified', 'body_hash', 'body', 'parsed', 'expires_at'), row))
+
+    def _count(self, outcome):
+        with self._lock:
+            self.stats[outcome] += 1
@@ -0,0 +1,232 @@
+"""
+Vectorized technical indicators over a dates x symbols price panel.
+
+The functions here work on whole panels (rows = dates, columns = symbols)
+with NumPy array operations, so a universe of thousands of symbols costs
+one pass per indicator instead of one pandas call per symbol. Results match
+the per-symbol calculations in StockDataCollector.
+"""
+
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def build_panels(histories):
+    """Turn {symbol: OHLCV DataFrame} into {field: dates x symbols DataFrame}"""
+    symbols = list(histories)
+    if not symbols:
+        return {}
+
+    frames = [histories[symbol].reindex(columns=PANEL_FIELDS) for symbol in symbols]
+    all_dates = frames[0].index.append([frame.index for frame in frames[1:]])
+    dates = all_dates.unique().sort_values()
+
+    # Scatter every symbol's bars into the panel with one indexed assignment
+    rows = dates.get_indexer(all_dates)
+    columns = np.repeat(np.arange(len(symbols)), [len(frame) for frame in frames])
+    stacked = np.concatenate([frame.to_numpy(dtype=float) for frame in frames])
+
+    panels = {}
+    for k, field in enumerate(PANEL_FIELDS):
+        values = np.full((len(dates), len(symbols)), np.nan)
+        values[rows, columns] = stacked[:, k]
+        panels[field] = pd.DataFrame(values, index=dates, columns=symbols)
+    return panels
+
+
+def align_right(panels):
+    """Drop each symbol's missing bars and align its history to the last row
+
+    Symbols trade on different days, so a shared date index leaves gaps.
+    After alignment row -1 is every symbol's latest bar, row -2 the bar
+    before it and so on, which makes windows count bars the same way as the
+    per-symbol calculations. Returns {field: 2-D array} and the number of
+    bars per symbol.
+    """
+    close = panels['Close']
+    valid = close.notna().to_numpy()
+    order = np.argsort(valid, axis=0, kind='stable')
+    padding = ~np.take_along_axis(valid, order, axis=0)
+
+    aligned = {}
+    for field in PANEL_FIELDS:
+        if field not in panels:
+            continue
+        values = panels[field].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float)
+        values = np.take_along_axis(values, order, axis=0)
+        values[padding] = np.nan
+        aligned[field] = values
+
+    return aligned, valid.sum(axis=0)
+
+
+def _tail_mean(values, window):
+    """Mean of the non-missing values in the last `window` rows"""
+    tail = values[-window:]
+    count = np.sum(~np.isnan(tail), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, np.nansum(tail, axis=0) / count, np.nan)
+
+
+def _tail_std(values, window):
+    """Sample standard deviation of the non-missing values in the last `window` rows"""
+    tail = values[-window:]
+    count = np.sum(~np.isnan(tail), axis=0)
+    mean = _tail_mean(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.nansum((tail - mean) ** 2, axis=0) / (count - 1)
+    return np.where(count > 1, np.sqrt(variance), np.nan)
+
+
+def _ewm(values, span, adjust=True):
+    """Exponentially weighted mean down the rows, like DataFrame.ewm(span).mean()
+
+    Leading NaN rows (symbols with shorter history) are skipped until each
+    column's first observation.
+    """
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    result = np.full(values.shape, np.nan)
+    numerator = np.zeros(values.shape[1])
+    denominator = np.zeros(values.shape[1])
+    started = np.zeros(values.shape[1], dtype=bool)
+
+    for i, row in enumerate(values):
+        present = ~np.isnan(row)
+        if adjust:
+            numerator = np.where(present, row + decay * numerator, numerator)
+            denominator = np.where(present, 1.0 + decay * denominator, denominator)
+        else:
+            first = present & ~started
+            numerator = np.where(first, row, np.where(present, decay * numerator + alpha * row, numerator))
+            denominator = np.where(present, 1.0, denominator)
+        started |= present
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[i] = np.where(started, numerator / denominator, np.nan)
+
+    return result
+
+
+def panel_ema(close, bar_counts, period):
+    """EMA (adjust=False); symbols with fewer bars than the period use the mean"""
+    ema = _ewm(close, period, adjust=False)[-1]
+    return np.where(bar_counts >= period, ema, _tail_mean(close, len(close)))
+
+
+def panel_rsi(close, bar_counts, period=14):
+    """RSI from simple means of the last `period` gains and losses"""
+    delta = np.diff(close, axis=0)[-period:]
+    gain = np.sum(np.where(delta > 0, delta, 0.0), axis=0) / period
+    loss = np.sum(np.where(delta < 0, -delta, 0.0), axis=0) / period
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = 100 - (100 / (1 + gain / loss))
+    return np.where(bar_counts >= period, rsi, np.nan)
+
+
+def panel_macd(close, bar_counts, fast=12, slow=26, signal=9):
+    """MACD line, signal and histogram; zero for symbols with short history"""
+    macd_line = _ewm(close, fast) - _ewm(close, slow)
+    macd_signal = _ewm(macd_line, signal)
+
+    enough = bar_counts >= slow
+    line = np.where(enough, macd_line[-1], 0.0)
+    sig = np.where(enough, macd_signal[-1], 0.0)
+    return line, sig, line - sig
+
+
+def panel_bollinger_bands(close, bar_counts, period=20, std_dev=2):
+    """Bollinger upper, middle and lower bands; current price for short history"""
+    sma = _tail_mean(close, period)
+    std = _tail_std(close, period)
+
+    enough = bar_counts >= period
+    current = close[-1]
+    upper = np.where(enough, sma + std * std_dev, current)
+    middle = np.where(enough, sma, current)
+    lower = np.where(enough, sma - std * std_dev, current)
+    return upper, middle, lower
+
+
+def panel_stochastic(high, low, close, bar_counts, k_period=14, d_period=3):
+    """Stochastic %K and %D; 50 for symbols with short history"""
+    k_rows = []
+    for offset in range(d_period - 1, -1, -1):
+        end = len(close) - offset
+        start = end - k_period
+        if start < 0:
+            k_rows.append(np.full(close.shape[1], np.nan))
+            continue
+        lowest_low = np.min(low[start:end], axis=0)
+        highest_high = np.max(high[start:end], axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            k_rows.append(100 * ((close[end - 1] - lowest_low) / (highest_high - lowest_low)))
+
+    k_percent = k_rows[-1]
+    d_percent = np.mean(k_rows, axis=0)
+
+    enough = bar_counts >= k_period
+    return np.where(enough, k_percent, 50.0), np.where(enough, d_percent, 50.0)
+
+
+def compute_price_metrics(panels):
+    """Compute every OHLCV-derived metric of get_stock_data for a whole panel
+
+    Takes {field: dates x symbols DataFrame} as returned by build_panels and
+    returns a DataFrame indexed by symbol with one column per metric.
+    Missing values get the same defaults as the per-symbol path.
+    """
+    if not panels or panels['Close'].empty:
+        return pd.DataFrame()
+
+    symbols = panels['Close'].columns
+    aligned, bar_counts = align_right(panels)
+    close = aligned['Close']
+    volume = aligned['Volume']
+
+    current_price = close[-1]
+    prev_close = np.where(bar_counts > 1, close[-2], current_price) if len(close) > 1 else current_price
+    with np.errstate(invalid='ignore', divide='ignore'):
+        price_change = (current_price - prev_close) / prev_close
+
+        avg_volume = _tail_mean(volume, 20)
+        volume_ratio = np.where(avg_volume > 0, volume[-1] / avg_volume, 1)
+
+        returns = close[1:] / close[:-1] - 1
+    volatility = _tail_std(returns, 20) * np.sqrt(252)
+
+    ma_20 = np.where(bar_counts >= 5, _tail_mean(close, 20), current_price)
+    ma_50 = np.where(bar_counts >= 10, _tail_mean(close, 50), ma_20)
+    ma_200 = np.where(bar_counts >= 50, _tail_mean(close, 200), ma_50)
+
+    macd_line, macd_signal, macd_histogram = panel_macd(close, bar_counts)
+    bb_upper, bb_middle, bb_lower = panel_bollinger_bands(close, bar_counts)
+    stoch_k, stoch_d = panel_stochastic(aligned['High'], aligned['Low'], close, bar_counts)
+
+    def fill(values, default):
+        return np.where(np.isnan(values), default, values)
+
+    metrics = pd.DataFrame({
+        'current_price': fill(current_price, 0.0),
+        'price_change': fill(price_change, 0.0),
+        'volume_ratio': fill(volume_ratio, 1.0),
+        'volatility': fill(volatility, 0.0),
+        'ma_20': fill(ma_20, current_price),
+        'ma_50': fill(ma_50, current_price),
+        'ma_200': fill(ma_200, current_price),
+        'ema_20': fill(panel_ema(close, bar_counts, 20), current_price),
+        'ema_50': fill(panel_ema(close, bar_counts, 50), current_price),
+        'ema_200': fill(panel_ema(close, bar_counts, 200), current_price),
+        'rsi': fill(panel_rsi(close, bar_counts), 50.0),
+        'macd_line': fill(macd_line, 0.0),
+        'macd_signal': fill(macd_signal, 0.0),
+        'macd_histogram': fill(macd_histogram, 0.0),
+        'bb_upper': fill(bb_upper, current_price),
+        'bb_middle': fill(bb_middle, current_price),
+        'bb_lower': fill(bb_lower, current_price),
+        'stoch_k': fill(stoch_k, 50.0),
+        'stoch_d': fill(stoch_d, 50.0),
+    }, index=pd.Index(symbols, name='symbol'))
+
+    return metrics[bar_counts > 0]
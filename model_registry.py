@@ -0,0 +1,195 @@
+"""
+Process-wide health registry for the LLM fallback chain.
+
+Every Groq call records its outcome here: latency, whether the answer was
+usable, and the class of error when it was not. After
+Config.MODEL_FAILURE_THRESHOLD failures in a row a model's circuit opens
+and the model is skipped. Once Config.MODEL_COOLDOWN_SECONDS have passed,
+one probe request is let through. If the probe succeeds the circuit
+closes; if it fails, the circuit opens again. Errors that will not go
+away (a decommissioned or unknown model) open the circuit at once for
+Config.MODEL_PERMANENT_COOLDOWN_SECONDS. Rate limiting (HTTP 429) is
+recorded but is not a failure of the model: the client's global back-off
+deals with it, and it never opens a circuit.
+
+The chain is reordered by expected cost, i.e. average latency divided by
+the smoothed success rate. Models with no observations keep their
+configured order behind the measured ones.
+"""
+
+import threading
+import time
+from config import Config
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Errors that mean the model itself is gone, not that it is having a bad minute
+PERMANENT_ERRORS = {'not_found', 'decommissioned'}
+
+# Errors that say the account is being throttled, not that the model is unhealthy
+RATE_LIMIT_ERRORS = {'rate_limited'}
+
+
+def classify_http_error(status, body=''):
+    """Error class for an HTTP error response from the provider"""
+    body = (body or '').lower()
+    if status == 429:
+        return 'rate_limited'
+    if status >= 500:
+        return 'server_error'
+    if status in (401, 403):
+        return 'auth'
+    if 'decommissioned' in body or 'model_not_found' in body or 'does not exist' in body:
+        return 'decommissioned'
+    if status == 404:
+        return 'not_found'
+    return 'client_error'
+
+
+class ModelHealth:
+    """Observed behaviour and circuit state of one model"""
+
+    def __init__(self, model):
+        self.model = model
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None  # exponentially weighted average, seconds
+        self.errors = {}     # error class -> count
+        self.last_error = None
+        self.state = CLOSED
+        self.opened_at = None
+        self.cooldown = 0.0
+        self.probing = False
+
+    @property
+    def success_rate(self):
+        """Success rate smoothed towards 1/2 while there are few observations"""
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    @property
+    def expected_cost(self):
+        """Average seconds per usable answer, None before the first success"""
+        if self.latency is None:
+            return None
+        return self.latency / self.success_rate
+
+    def to_dict(self, now):
+        reopens_in = None
+        if self.state == OPEN:
+            reopens_in = max(0.0, round(self.opened_at + self.cooldown - now, 1))
+        return {
+            'model': self.model,
+            'state': self.state,
+            'skipped': self.state == OPEN and reopens_in > 0,
+            'reopens_in_seconds': reopens_in,
+            'successes': self.successes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'success_rate': round(self.success_rate, 3),
+            'avg_latency_seconds': round(self.latency, 3) if self.latency is not None else None,
+            'errors': dict(self.errors),
+            'last_error': self.last_error
+        }
+
+
+class ModelRegistry:
+    """Thread-safe circuit breakers and latency/quality stats per model"""
+
+    def __init__(self, failure_threshold=None, cooldown_seconds=None, permanent_cooldown_seconds=None,
+                 latency_alpha=None):
+        self.failure_threshold = failure_threshold or Config.MODEL_FAILURE_THRESHOLD
+        self.cooldown = cooldown_seconds or Config.MODEL_COOLDOWN_SECONDS
+        self.permanent_cooldown = permanent_cooldown_seconds or Config.MODEL_PERMANENT_COOLDOWN_SECONDS
+        self.latency_alpha = latency_alpha or Config.MODEL_LATENCY_ALPHA
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _health(self, model):
+        health = self._models.get(model)
+        if health is None:
+            health = self._models[model] = ModelHealth(model)
+        return health
+
+    def order(self, models):
+        """The chain to try now: measured models by expected cost, then the rest as configured
+
+        Models whose circuit is open and still cooling down are left out.
+        """
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for position, model in enumerate(models):
+                health = self._health(model)
+                if health.state == OPEN and now < health.opened_at + health.cooldown:
+                    continue
+                cost = health.expected_cost
+                candidates.append((cost is None, cost or 0.0, position, model))
+        return [model for *_, model in sorted(candidates)]
+
+    def allow(self, model):
+        """Whether to send a request to the model now; claims the probe of a cooled-down circuit"""
+        now = time.time()
+        with self._lock:
+            health = self._health(model)
+            if health.state == CLOSED:
+                return True
+            if health.state == OPEN and now >= health.opened_at + health.cooldown:
+                health.state = HALF_OPEN
+                health.probing = False
+            if health.state == HALF_OPEN and not health.probing:
+                print(f"🔌 Probing {model} after cool-down")
+                health.probing = True
+                return True
+            return False
+
+    def record_success(self, model, latency):
+        with self._lock:
+            health = self._health(model)
+            health.successes += 1
+            health.consecutive_failures = 0
+            if health.latency is None:
+                health.latency = latency
+            else:
+                health.latency += self.latency_alpha * (latency - health.latency)
+            if health.state != CLOSED:
+                print(f"✓ {model} recovered, closing its circuit")
+            health.state = CLOSED
+            health.probing = False
+
+    def record_failure(self, model, error_class, message=None):
+        with self._lock:
+            health = self._health(model)
+            health.errors[error_class] = health.errors.get(error_class, 0) + 1
+            health.last_error = {'class': error_class, 'message': (message or '')[:200], 'at': time.time()}
+            if error_class in RATE_LIMIT_ERRORS:
+                # A throttled probe proves nothing; let the next request probe again
+                health.probing = False
+                return
+
+            health.failures += 1
+            health.consecutive_failures += 1
+            if error_class in PERMANENT_ERRORS:
+                self._open(health, self.permanent_cooldown)
+            elif health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+                self._open(health, self.cooldown)
+
+    def _open(self, health, cooldown):
+        health.state = OPEN
+        health.opened_at = time.time()
+        health.cooldown = cooldown
+        health.probing = False
+        print(f"⛔ Circuit open for {health.model} ({health.last_error['class']}), "
+              f"skipping it for {cooldown:.0f}s")
+
+    def snapshot(self):
+        """Health of every model seen so far"""
+        now = time.time()
+        with self._lock:
+            return [health.to_dict(now) for health in self._models.values()]
+
+
+# Shared by every analyzer in the process
+model_registry = ModelRegistry()
@@ -0,0 +1,137 @@
+"""
+Near-duplicate detection for news articles with MinHash-LSH.
+
+The same wire story arrives through NewsAPI, Yahoo, MoneyControl and ET
+with small title changes. Each article's title and description become a
+set of word tokens, summarised by a MinHash signature of
+Config.NEAR_DUPLICATE_NUM_PERM values. The signature is cut into
+Config.NEAR_DUPLICATE_BANDS bands; articles sharing any band are
+candidates and only candidates are compared, so a lookup does not scan the
+whole index. Candidates whose estimated Jaccard similarity reaches
+Config.NEAR_DUPLICATE_THRESHOLD belong to the same cluster.
+
+Only cluster representatives are indexed. A new article is therefore
+compared with the first copy of each story, and clusters do not chain.
+"""
+
+import hashlib
+import re
+import numpy as np
+from config import Config
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_PRIME = (1 << 31) - 1  # Products of two values below this fit in uint64
+
+
+def article_text(article):
+    """Text used to compare articles: title and description"""
+    parts = [article.get('title'), article.get('description')]
+    return ' '.join(part for part in parts if isinstance(part, str))
+
+
+class MinHasher:
+    """MinHash signatures over word tokens, stable across runs for a given seed"""
+
+    def __init__(self, num_perm=None, seed=1):
+        self.num_perm = num_perm or Config.NEAR_DUPLICATE_NUM_PERM
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _PRIME, self.num_perm).astype(np.uint64)
+        self.b = rng.randint(0, _PRIME, self.num_perm).astype(np.uint64)
+
+    def signature(self, text):
+        """uint32 signature of a text, None if it has no tokens"""
+        tokens = set(_TOKEN.findall(text.lower()))
+        if not tokens:
+            return None
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little') % _PRIME
+             for token in tokens),
+            dtype=np.uint64, count=len(tokens)
+        )
+        return ((np.outer(hashes, self.a) + self.b) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+class MinHashIndex:
+    """Banded LSH index of signatures, answering "which indexed item is this a copy of?" """
+
+    def __init__(self, bands=None, threshold=None):
+        self.bands = bands or Config.NEAR_DUPLICATE_BANDS
+        self.threshold = threshold or Config.NEAR_DUPLICATE_THRESHOLD
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _band_keys(self, signature):
+        rows = len(signature) // self.bands
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def query(self, signature):
+        """Key of the most similar indexed item at or above the threshold, or None"""
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(band_key, ()))
+
+        best, best_similarity = None, self.threshold
+        for key in candidates:
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        return best
+
+    def add(self, key, signature):
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, []).append(key)
+
+
+def assign_clusters(texts, index=None, hasher=None):
+    """Cluster key (position of the representative) for each text
+
+    Texts are taken in order, so the first copy of a story represents it.
+    """
+    index = index if index is not None else MinHashIndex()
+    hasher = hasher or MinHasher()
+    clusters = []
+    for position, text in enumerate(texts):
+        signature = hasher.signature(text)
+        match = index.query(signature) if signature is not None else None
+        if match is None:
+            match = position
+            if signature is not None:
+                index.add(position, signature)
+        clusters.append(match)
+    return clusters
+
+
+def collapse_near_duplicates(news_df):
+    """One row per story and symbol, with the number of copies in cluster_size
+
+    Each row keeps the symbol, time and URL of the symbol's first copy and
+    the text of the story's representative, so identical texts are scored
+    once even when the story was found for several symbols.
+    """
+    if news_df.empty:
+        return news_df
+
+    records = news_df.to_dict('records')
+    clusters = assign_clusters([article_text(article) for article in records])
+
+    news = news_df.reset_index(drop=True).assign(_cluster=clusters)
+    news['cluster_size'] = news.groupby(['symbol', '_cluster'], sort=False)['_cluster'].transform('size')
+    news = news.loc[~news.duplicated(['symbol', '_cluster'])]
+
+    for column in ('title', 'description'):
+        if column in news.columns:
+            news[column] = news_df[column].to_numpy()[news['_cluster'].to_numpy()]
+
+    removed = len(news_df) - len(news)
+    if removed:
+        print(f"🧬 Near-duplicates: {len(news_df)} articles -> {len(news)} stories ({removed} copies merged)")
+    return news.drop(columns='_cluster')
+
+
+def cluster_weight(cluster_size):
+    """Weight of a story reported cluster_size times (1 for a single copy)"""
+    return 1.0 + np.log(np.maximum(cluster_size, 1))
@@ -0,0 +1,169 @@
+"""
+Quantized ONNX Runtime backend for FinBERT.
+
+The PyTorch model is exported to ONNX once, quantized to int8 with dynamic
+quantization and cached under Config.ONNX_MODEL_DIR. OnnxSentimentPipeline
+is called like the transformers sentiment pipeline, so SentimentAnalyzer
+can use either one.
+
+Run this module directly for a parity check against the PyTorch model and
+a throughput comparison:
+
+    python onnx_sentiment.py
+"""
+
+import os
+import time
+import numpy as np
+from config import Config
+
+# ONNX Runtime, PyTorch and transformers are optional
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    ort = None
+
+try:
+    import torch
+    from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+ONNX_SENTIMENT_AVAILABLE = ONNXRUNTIME_AVAILABLE and TRANSFORMERS_AVAILABLE
+
+SAMPLE_HEADLINES = [
+    "Reliance Industries shares jump after strong quarterly profit",
+    "TCS misses revenue estimates as deal wins slow",
+    "HDFC Bank board to meet on Saturday to consider fund raising",
+    "Infosys raises full-year guidance on robust demand",
+    "Adani Ports stock falls 5% amid regulatory concerns",
+    "Sensex ends flat as investors await RBI policy decision",
+    "Tata Motors reports record JLR sales, shares hit 52-week high",
+    "ITC announces demerger of hotels business",
+]
+
+
+def export_quantized_model(model_id="ProsusAI/finbert", output_dir=None):
+    """Export a sequence classification model to int8 ONNX, once
+
+    Returns the path of the quantized model. An existing export is reused.
+    """
+    output_dir = output_dir or Config.ONNX_MODEL_DIR
+    quantized_path = os.path.join(output_dir, "model.int8.onnx")
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Exporting {model_id} to ONNX...")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModelForSequenceClassification.from_pretrained(model_id)
+    model.eval()
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+
+    sample = tokenizer(SAMPLE_HEADLINES[:2], padding=True, return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    float_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    print("Applying dynamic int8 quantization...")
+    quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QInt8)
+    os.remove(float_path)
+    print(f"✓ Quantized model saved to {quantized_path}")
+    return quantized_path
+
+
+class OnnxSentimentPipeline:
+    """Drop-in replacement for the transformers sentiment-analysis pipeline"""
+
+    def __init__(self, model_id="ProsusAI/finbert", model_dir=None, num_threads=None):
+        model_dir = model_dir or Config.ONNX_MODEL_DIR
+        model_path = export_quantized_model(model_id, model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        config = AutoConfig.from_pretrained(model_dir)
+        self.id2label = {int(k): v for k, v in config.id2label.items()}
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or Config.ONNX_NUM_THREADS
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def __call__(self, texts, batch_size=None, truncation=True, **kwargs):
+        """Classify one text or a list of texts into [{'label', 'score'}, ...]"""
+        if isinstance(texts, str):
+            texts = [texts]
+        batch_size = batch_size or len(texts) or 1
+
+        results = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            encoded = self.tokenizer(batch, padding=True, truncation=truncation, max_length=512, return_tensors="np")
+            feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            logits = self.session.run(None, feed)[0]
+
+            # Softmax, then the top label like the transformers pipeline
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+            best = probabilities.argmax(axis=1)
+            results.extend(
+                {'label': self.id2label[int(label)], 'score': float(probabilities[i, label])}
+                for i, label in enumerate(best)
+            )
+        return results
+
+
+def compare_with_pytorch(texts=None, batch_size=None, rounds=5):
+    """Parity check and throughput comparison against the PyTorch pipeline"""
+    from transformers import pipeline
+
+    texts = texts or SAMPLE_HEADLINES * 8
+    batch_size = batch_size or Config.SENTIMENT_BATCH_SIZE
+
+    torch_pipeline = pipeline("sentiment-analysis", model="ProsusAI/finbert", tokenizer="ProsusAI/finbert")
+    onnx_pipeline = OnnxSentimentPipeline()
+
+    torch_results = torch_pipeline(texts, batch_size=batch_size, truncation=True)
+    onnx_results = onnx_pipeline(texts, batch_size=batch_size)
+
+    agreement = np.mean([a['label'] == b['label'] for a, b in zip(torch_results, onnx_results)])
+    score_diff = max(abs(a['score'] - b['score']) for a, b in zip(torch_results, onnx_results))
+    print(f"Label agreement: {agreement:.1%}, max score difference: {score_diff:.4f}")
+
+    timings = {}
+    for name, classify in (('pytorch', torch_pipeline), ('onnx-int8', onnx_pipeline)):
+        classify(texts[:batch_size], batch_size=batch_size, truncation=True)  # warm-up
+        start = time.perf_counter()
+        for _ in range(rounds):
+            classify(texts, batch_size=batch_size, truncation=True)
+        elapsed = time.perf_counter() - start
+        timings[name] = len(texts) * rounds / elapsed
+        print(f"{name}: {timings[name]:.1f} texts/s")
+
+    print(f"Speedup: {timings['onnx-int8'] / timings['pytorch']:.2f}x")
+    return {'label_agreement': agreement, 'max_score_diff': score_diff, 'texts_per_second': timings}
+
+
+if __name__ == "__main__":
+    if not ONNX_SENTIMENT_AVAILABLE:
+        print("❌ Needs onnxruntime, torch and transformers: pip install onnxruntime onnx torch transformers")
+    else:
+        compare_with_pytorch()
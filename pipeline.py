@@ -0,0 +1,321 @@
+"""
+Stage-overlapped analysis pipeline.
+
+Instead of running every stage over the whole universe before the next one
+starts, each symbol moves on as soon as its own work is done:
+
+    price screen (batch) -> fundamentals -> news -> sentiment -> scoring
+
+Stages are connected by bounded queues and run in their own worker threads,
+so a slow news source for one symbol no longer holds up sentiment and
+scoring for the others, and at most PIPELINE_QUEUE_SIZE items wait between
+any two stages.
+
+Sentiment is scored in micro-batches: the news of up to
+PIPELINE_SENTIMENT_BATCH symbols goes through the model together, and a
+batch is sent early once its first symbol has waited
+PIPELINE_SENTIMENT_MAX_WAIT seconds.
+
+With a fallback_sentiment, rows are held back from scoring until some
+symbol has real sentiment. If none has once all news is in, the fallback's
+sentiment is used for every held row, so each stock is still scored once.
+"""
+
+import queue
+import threading
+import time
+import pandas as pd
+from config import Config
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class _Stage:
+    """A pool of worker threads reading from one queue and writing to the next"""
+
+    def __init__(self, name, handler, inbox, outbox=None, workers=1, on_close=None, on_idle=None, max_wait=None):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.downstream = None
+        self.on_close = on_close
+        # on_idle is called when no input has arrived for max_wait seconds
+        self.on_idle = on_idle
+        self.max_wait = max_wait
+        self._remaining = workers
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"pipeline-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def close(self):
+        """Tell every worker of this stage that no more input is coming"""
+        for _ in range(self.workers):
+            self.inbox.put(_DONE)
+
+    def _work(self):
+        while True:
+            try:
+                item = self.inbox.get(timeout=self.max_wait)
+            except queue.Empty:
+                self._call(self.on_idle)
+                continue
+            if item is _DONE:
+                break
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                print(f"Pipeline {self.name} stage error: {e}")
+                result = None
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+
+        # The last worker to finish flushes the stage and closes the downstream queue
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            self._call(self.on_close)
+        if last and self.downstream is not None:
+            self.downstream.close()
+
+    def _call(self, callback):
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            print(f"Pipeline {self.name} stage error: {e}")
+
+
+class AnalysisPipeline:
+    """Runs StockFilter's analysis with stages overlapped per symbol"""
+
+    def __init__(self, stock_filter, queue_size=None, news_workers=None, info_workers=None):
+        self.stock_filter = stock_filter
+        self.queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+        self.news_workers = news_workers or Config.PIPELINE_NEWS_WORKERS
+        self.info_workers = info_workers or Config.INFO_FETCH_WORKERS
+        self._lock = threading.Lock()
+
+    def run(self, symbols, fallback_sentiment=None):
+        """Analyze symbols and return (stock_df, sentiment_summary, recommendations, rejections)
+
+        fallback_sentiment(symbols) supplies sentiment for every stock when
+        no news could be scored for any of them.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        self.rows = {}
+        self.sentiment_summary = {}
+        self.rejections = []
+        self.scored = []
+        self._fallback_sentiment = fallback_sentiment
+        self._held = []
+
+        start_time = time.time()
+        collector = self.stock_filter.stock_collector
+
+        # Market headlines are fetched once, behind the price screen, and
+        # handed to every symbol they mention
+        self._market_news = {}
+        self._market_news_ready = threading.Event()
+        threading.Thread(target=self._link_market_news, daemon=True).start()
+
+        # The price screen stays a single batch: one bulk download and one
+        # vectorized indicator pass are cheaper than any per-symbol split
+        print("1. Collecting price data and screening stocks...")
+        price_df, rejections = collector.screen_prices(symbols)
+        self.rejections.extend(rejections)
+
+        use_ai = bool(self.stock_filter.ai_analyzer and Config.USE_AI_ANALYSIS)
+
+        fundamentals_queue = queue.Queue(maxsize=self.queue_size)
+        news_queue = queue.Queue(maxsize=self.queue_size)
+        sentiment_queue = queue.Queue(maxsize=self.queue_size)
+        score_queue = queue.Queue(maxsize=self.queue_size)
+
+        fundamentals = _Stage('fundamentals', self._screen_fundamentals, fundamentals_queue, news_queue,
+                              workers=self.info_workers)
+        news = _Stage('news', self._collect_news, news_queue, sentiment_queue, workers=self.news_workers)
+        # Sentiment models are not thread-safe, so this stage has one worker. It
+        # passes rows on itself, a micro-batch at a time
+        self._sentiment_buffer = []
+        self._sentiment_outbox = score_queue if use_ai else None
+        sentiment = _Stage('sentiment', self._analyze_sentiment, sentiment_queue,
+                           on_close=self._close_sentiment, on_idle=self._flush_sentiment,
+                           max_wait=Config.PIPELINE_SENTIMENT_MAX_WAIT)
+        fundamentals.downstream = news
+        news.downstream = sentiment
+        stages = [fundamentals, news, sentiment]
+
+        if use_ai:
+            # AI scoring is slow, so it runs as its own stage; with batched AI
+            # analysis rows are buffered and scored AI_BATCH_MAX_STOCKS at a time.
+            # The async Groq client enforces the rate limits, so requests from
+            # several scoring workers can be in flight together
+            self._ai_buffer = []
+            ai_analyzer = self.stock_filter.ai_analyzer
+            scoring_workers = Config.GROQ_MAX_IN_FLIGHT if getattr(ai_analyzer, 'groq_client', None) else 1
+            scoring = _Stage('scoring', self._score_with_ai, score_queue, workers=scoring_workers,
+                             on_close=self._flush_ai_buffer)
+            sentiment.downstream = scoring
+            stages.append(scoring)
+
+        for stage in stages:
+            stage.start()
+
+        print(f"2-5. Streaming {len(price_df)} stocks through fundamentals, news, sentiment and scoring...")
+        for price_row in price_df.to_dict('records'):
+            fundamentals_queue.put(price_row)
+        fundamentals.close()
+
+        for stage in stages:
+            stage.join()
+
+        # Keep the input order so results do not depend on thread timing
+        stock_rows = [self.rows[symbol] for symbol in symbols if symbol in self.rows]
+        stock_df = pd.DataFrame(stock_rows)
+
+        if not use_ai and not stock_df.empty:
+            self._apply_fallback_sentiment(stock_df['symbol'].tolist())
+
+        if use_ai:
+            recommendations = pd.DataFrame(self.scored)
+            if not recommendations.empty:
+                order = {symbol: i for i, symbol in enumerate(symbols)}
+                recommendations = recommendations.sort_values(
+                    'symbol', key=lambda col: col.map(order)
+                ).sort_values('composite_score', ascending=False, kind='stable')
+        elif not stock_df.empty:
+            # Rule-based scoring is vectorized, one pass once all stocks are in
+            recommendations = self.stock_filter._generate_recommendations(stock_df, self.sentiment_summary)
+        else:
+            recommendations = pd.DataFrame()
+
+        rejections_df = pd.DataFrame(self.rejections, columns=['symbol', 'stage', 'reason'])
+        print(f"✅ Pipeline finished {len(stock_df)} stocks in {time.time() - start_time:.1f}s")
+        return stock_df, self.sentiment_summary, recommendations, rejections_df
+
+    def _screen_fundamentals(self, price_row):
+        row, rejections = self.stock_filter.stock_collector.screen_fundamentals(price_row)
+        with self._lock:
+            self.rejections.extend(rejections)
+            if row is not None:
+                self.rows[row['symbol']] = row
+        return row
+
+    def _link_market_news(self):
+        news_collector = self.stock_filter.news_collector
+        try:
+            if getattr(news_collector, 'entity_linker', None) and news_collector.news_api:
+                self._market_news = news_collector.get_linked_market_news()
+        except Exception as e:
+            print(f"Error linking market news: {e}")
+        finally:
+            self._market_news_ready.set()
+
+    def _collect_news(self, row):
+        symbol = row['symbol']
+        try:
+            articles = self.stock_filter.news_collector.get_stock_news_enhanced(symbol, Config.NEWS_LOOKBACK_DAYS)
+        except Exception as e:
+            print(f"Error collecting news for {symbol}: {e}")
+            articles = []
+
+        self._market_news_ready.wait()
+        articles = articles + self._market_news.get(symbol, [])
+
+        # Concurrent collection is throttled by per-source token buckets instead
+        if not Config.USE_CONCURRENT_NEWS:
+            # Rate limiting to be respectful to websites
+            time.sleep(0.2)
+        return row, articles
+
+    def _analyze_sentiment(self, item):
+        self._sentiment_buffer.append((time.monotonic(), item))
+        oldest = self._sentiment_buffer[0][0]
+        if (len(self._sentiment_buffer) >= Config.PIPELINE_SENTIMENT_BATCH
+                or time.monotonic() - oldest >= Config.PIPELINE_SENTIMENT_MAX_WAIT):
+            self._flush_sentiment()
+
+    def _flush_sentiment(self):
+        """Score the buffered symbols' news in one batch and pass their rows on"""
+        items, self._sentiment_buffer = [item for _, item in self._sentiment_buffer], []
+        if not items:
+            return
+
+        symbols = [row['symbol'] for row, _ in items]
+        articles = [article for _, symbol_articles in items for article in symbol_articles]
+        try:
+            # With the article store, earlier runs' articles count even if nothing new came in
+            if articles or self.stock_filter.article_store is not None:
+                news_df = self.stock_filter._score_news(pd.DataFrame(articles), symbols)
+                summary = {}
+                if not news_df.empty:
+                    summary = self.stock_filter.sentiment_analyzer.get_sentiment_summary(news_df)
+                with self._lock:
+                    self.sentiment_summary.update(
+                        {symbol: summary[symbol] for symbol in symbols if symbol in summary}
+                    )
+        except Exception as e:
+            print(f"Error analyzing sentiment for {len(symbols)} symbols: {e}")
+
+        if self._sentiment_outbox is not None:
+            rows = [row for row, _ in items]
+            with self._lock:
+                if self._fallback_sentiment is not None and not self.sentiment_summary:
+                    # Nothing scored yet: wait until it is known whether the fallback is needed
+                    self._held.extend(rows)
+                    return
+                rows, self._held = self._held + rows, []
+            for row in rows:
+                self._sentiment_outbox.put(row)
+
+    def _close_sentiment(self):
+        """Flush the last micro-batch and release held rows, with fallback sentiment if none was found"""
+        self._flush_sentiment()
+        with self._lock:
+            rows, self._held = self._held, []
+        if not rows:
+            return
+        self._apply_fallback_sentiment([row['symbol'] for row in rows])
+        for row in rows:
+            self._sentiment_outbox.put(row)
+
+    def _apply_fallback_sentiment(self, symbols):
+        if self._fallback_sentiment is None or self.sentiment_summary:
+            return
+        fallback = self._fallback_sentiment(symbols)
+        with self._lock:
+            self.sentiment_summary.update(fallback)
+
+    def _score_with_ai(self, row):
+        with self._lock:
+            self._ai_buffer.append(row)
+            full = not Config.AI_BATCH_ANALYSIS or len(self._ai_buffer) >= Config.AI_BATCH_MAX_STOCKS
+        if full:
+            self._flush_ai_buffer()
+
+    def _flush_ai_buffer(self):
+        with self._lock:
+            rows, self._ai_buffer = self._ai_buffer, []
+        if not rows:
+            return
+        with self._lock:
+            sentiment = {row['symbol']: self.sentiment_summary[row['symbol']]
+                         for row in rows if row['symbol'] in self.sentiment_summary}
+        recommendations = self.stock_filter._generate_recommendations(pd.DataFrame(rows), sentiment)
+        with self._lock:
+            self.scored.extend(recommendations.to_dict('records'))
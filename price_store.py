@@ -0,0 +1,117 @@
+import os
+import pandas as pd
+from config import Config
+
+# Parquet support needs pyarrow, but the agent still works without it
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Lookback windows for the yfinance period strings we use
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+
+class PriceStore:
+    """Local OHLCV store with one Parquet file per symbol"""
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or Config.PRICE_STORE_DIR
+        self.enabled = Config.USE_PRICE_STORE and PYARROW_AVAILABLE
+
+        if Config.USE_PRICE_STORE and not PYARROW_AVAILABLE:
+            print("⚠ pyarrow not installed, local price store disabled")
+
+        if self.enabled:
+            os.makedirs(self.base_dir, exist_ok=True)
+
+    def _path(self, symbol):
+        """File path of a symbol's partition"""
+        safe_symbol = symbol.replace(os.sep, '_').replace('^', '_')
+        return os.path.join(self.base_dir, f"{safe_symbol}.parquet")
+
+    def has(self, symbol):
+        return self.enabled and os.path.exists(self._path(symbol))
+
+    def load(self, symbol, period=None):
+        """Load stored bars for a symbol, optionally trimmed to a yfinance period"""
+        if not self.has(symbol):
+            return None
+
+        try:
+            bars = pd.read_parquet(self._path(symbol))
+        except Exception as e:
+            print(f"Error reading stored prices for {symbol}: {e}")
+            return None
+
+        return self.trim(bars, period)
+
+    def trim(self, bars, period):
+        """Bars inside a yfinance-style period window, all bars without one"""
+        if period and not bars.empty:
+            bars = bars[bars.index >= self._period_start(bars.index, period)]
+        return bars
+
+    def last_timestamps(self, symbol, count=2):
+        """Most recent stored bar timestamps, oldest first"""
+        bars = self.load(symbol)
+        if bars is None or bars.empty:
+            return []
+        return list(bars.index[-count:])
+
+    def write(self, symbol, bars):
+        """Replace a symbol's partition with the given bars and return what was stored"""
+        if not self.enabled or bars is None or bars.empty:
+            return None
+
+        bars = self._normalize(bars)
+        tmp_path = self._path(symbol) + '.tmp'
+        bars.to_parquet(tmp_path)
+        os.replace(tmp_path, self._path(symbol))
+        return bars
+
+    def append(self, symbol, bars, existing=None):
+        """Append new bars, replacing any stored bars with the same timestamp
+
+        Pass the already loaded partition as existing to skip reading it
+        again. Returns the stored bars.
+        """
+        if not self.enabled or bars is None or bars.empty:
+            return existing
+
+        if existing is None:
+            existing = self.load(symbol)
+        if existing is not None and not existing.empty:
+            bars = pd.concat([existing, self._normalize(bars)])
+            bars = bars[~bars.index.duplicated(keep='last')]
+
+        return self.write(symbol, bars)
+
+    def _normalize(self, bars):
+        """Keep OHLCV columns in a sorted, de-duplicated index"""
+        columns = [col for col in OHLCV_COLUMNS if col in bars.columns]
+        bars = bars[columns].dropna(subset=['Close']).sort_index()
+        return bars[~bars.index.duplicated(keep='last')]
+
+    def _period_start(self, index, period):
+        """First timestamp inside a yfinance-style period window"""
+        now = pd.Timestamp.now(tz=index.tz)
+        if period == 'ytd':
+            return now.normalize().replace(month=1, day=1)
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None:
+            return index.min()
+        return now - offset
@@ -0,0 +1,117 @@
+"""
+Token-bucket rate limiting for outbound requests.
+
+Each news source (one domain or API) gets its own bucket and concurrency
+limit from Config.NEWS_SOURCE_LIMITS, so requests to different sites run in
+parallel while each site still sees a polite request rate.
+"""
+
+import threading
+import time
+import requests
+from config import Config
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available without waiting"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+        """Seconds until `tokens` could be taken, 0 if they are available now"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (min(tokens, self.capacity) - self._tokens) / self.rate)
+
+    def release(self, tokens):
+        """Give back tokens that were taken but not used"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def acquire(self, tokens=1, timeout=None):
+        """Wait until tokens are available; False if the timeout passes first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class TimeoutSession(requests.Session):
+    """requests Session that applies one timeout to every request
+
+    For clients that take a session but hard-code their own timeout.
+    """
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs['timeout'] = self.timeout
+        return super().request(*args, **kwargs)
+
+
+class SourceRateLimiter:
+    """Per-source token buckets plus concurrency and timeout settings"""
+
+    DEFAULT_LIMITS = {'rate': 1.0, 'burst': 2, 'concurrency': 2, 'timeout': 10}
+
+    def __init__(self, limits=None):
+        self.limits = limits if limits is not None else Config.NEWS_SOURCE_LIMITS
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def settings(self, source):
+        """Limits for a source, falling back to DEFAULT_LIMITS"""
+        return {**self.DEFAULT_LIMITS, **self.limits.get(source, {})}
+
+    def wait(self, source):
+        """Block until the source's bucket allows one more request"""
+        with self._lock:
+            bucket = self._buckets.get(source)
+            if bucket is None:
+                settings = self.settings(source)
+                bucket = self._buckets[source] = TokenBucket(settings['rate'], settings['burst'])
+        bucket.acquire()
+
+    def concurrency(self, source):
+        """Maximum simultaneous requests to the source"""
+        return max(1, int(self.settings(source)['concurrency']))
+
+    def timeout(self, source):
+        """Request timeout in seconds for the source"""
+        return self.settings(source)['timeout']
+
+    def session(self, source):
+        """HTTP session whose requests use the source's timeout"""
+        return TimeoutSession(self.timeout(source))
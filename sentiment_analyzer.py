@@ -2,8 +2,13 @@ import pandas as pd
 import numpy as np
 from textblob import TextBlob
 import re
+import time
 from datetime import datetime
 from config import Config
+from sentiment_cache import SentimentCache
+from sentiment_state import SentimentStateStore, article_id
+from sentiment_server import SentimentClient
+from near_duplicates import cluster_weight
 
 # Try to import transformers, but don't fail if it's not available
 try:
@@ -13,12 +18,24 @@ except ImportError:
     TRANSFORMERS_AVAILABLE = False
     pipeline = None
 
+from onnx_sentiment import ONNX_SENTIMENT_AVAILABLE, OnnxSentimentPipeline
+
+
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, use_server=None):
         self.use_transformers = False
         self.sentiment_pipeline = None
+        self.model_id = 'textblob'
+        self.server_client = None
 
-        if TRANSFORMERS_AVAILABLE:
+        if use_server is None:
+            use_server = Config.USE_SENTIMENT_SERVER
+
+        if use_server and self._connect_server():
+            pass
+        elif Config.SENTIMENT_BACKEND == 'onnx' and self._load_onnx_backend():
+            pass
+        elif TRANSFORMERS_AVAILABLE:
             try:
                 # Try to load a financial sentiment model
                 self.sentiment_pipeline = pipeline(
@@ -27,50 +44,198 @@ class SentimentAnalyzer:
                     tokenizer="ProsusAI/finbert"
                 )
                 self.use_transformers = True
+                self.model_id = "ProsusAI/finbert"
                 print("✓ Using FinBERT for sentiment analysis")
             except:
                 try:
                     # Fallback to general sentiment model
                     self.sentiment_pipeline = pipeline("sentiment-analysis")
                     self.use_transformers = True
+                    self.model_id = getattr(self.sentiment_pipeline.model, 'name_or_path', 'transformer')
                     print("✓ Using general transformer model for sentiment analysis")
                 except:
                     print("⚠ Could not load transformer models, using TextBlob only")
         else:
             print("⚠ Transformers not installed, using TextBlob for sentiment analysis")
 
+        # Results are cached per model, so cached TextBlob scores never stand in for FinBERT
+        self.cache = SentimentCache() if Config.USE_SENTIMENT_CACHE else None
+        self.last_cascade_report = None
+
+        # Time-decayed per-symbol sentiment that persists between runs
+        self.sentiment_state = SentimentStateStore() if Config.USE_DECAYED_SENTIMENT else None
+
+    def _connect_server(self):
+        """Use the shared sentiment server instead of loading a model here"""
+        client = SentimentClient()
+        server_model = client.ping()
+        if server_model is None:
+            print("⚠ Sentiment server not reachable, loading a local model")
+            return False
+
+        self.server_client = client
+        print(f"✓ Using shared sentiment server ({server_model})")
+        return True
+
+    def _load_onnx_backend(self):
+        """Use the quantized ONNX FinBERT if onnxruntime is installed"""
+        if not ONNX_SENTIMENT_AVAILABLE:
+            print("⚠ onnxruntime not installed, falling back to the PyTorch sentiment backend")
+            return False
+
+        try:
+            self.sentiment_pipeline = OnnxSentimentPipeline("ProsusAI/finbert")
+            self.use_transformers = True
+            # Quantized scores differ slightly, so they get their own cache entries
+            self.model_id = "ProsusAI/finbert:onnx-int8"
+            print("✓ Using quantized ONNX FinBERT for sentiment analysis")
+            return True
+        except Exception as e:
+            print(f"⚠ Could not load ONNX FinBERT: {e}")
+            return False
+
     def analyze_text(self, text):
         """Analyze sentiment of a single text"""
-        if not text or pd.isna(text):
-            return {'sentiment': 'neutral', 'score': 0.0, 'confidence': 0.0}
+        return self._analyze_texts([text])[0]
 
-        # Clean text
-        text = self._clean_text(text)
-
-        # Use transformer model if available
-        if self.use_transformers and self.sentiment_pipeline:
+    def _analyze_texts(self, texts):
+        """Analyze many texts, scoring only cache misses with the model"""
+        if self.server_client:
             try:
-                result = self.sentiment_pipeline(text[:512])  # Limit text length
-                sentiment = result[0]['label'].lower()
-                confidence = result[0]['score']
-
-                # Convert to standardized format
-                if sentiment in ['positive', 'pos']:
-                    score = confidence
-                elif sentiment in ['negative', 'neg']:
-                    score = -confidence
+                return self.server_client.analyze(texts)
+            except Exception as e:
+                # No local model is loaded, so fall back to TextBlob below
+                print(f"Sentiment server request failed, using TextBlob: {e}")
+
+        results = [None] * len(texts)
+        pending = {}
+        for i, text in enumerate(texts):
+            if not text or pd.isna(text):
+                results[i] = {'sentiment': 'neutral', 'score': 0.0, 'confidence': 0.0}
+            else:
+                # Clean text
+                pending[i] = self._clean_text(text)
+
+        if not pending:
+            return results
+
+        # Identical texts are looked up and scored once
+        keys = {i: SentimentCache.key(self.model_id, text) for i, text in pending.items()}
+        unique = {}
+        for i, key in keys.items():
+            unique.setdefault(key, pending[i])
+
+        found = self.cache.get_many(list(unique)) if self.cache else {}
+        misses = [key for key in unique if key not in found]
+
+        if misses:
+            miss_texts = [unique[key] for key in misses]
+            fallback = set()
+            # Use transformer model if available
+            if self.use_transformers and self.sentiment_pipeline:
+                if Config.SENTIMENT_CASCADE:
+                    scored, fallback = self._cascade_batch(miss_texts)
                 else:
-                    score = 0.0
+                    scored, fallback = self._analyze_transformer_batch(miss_texts)
+            else:
+                scored = [self._textblob_sentiment(text) for text in miss_texts]
+
+            fresh = {key: result for key, result in zip(misses, scored)}
+            found.update(fresh)
+
+            # TextBlob results in transformer mode are not cached under the model's key
+            if self.cache:
+                self.cache.put_many(self.model_id, {
+                    key: result for k, (key, result) in enumerate(fresh.items()) if k not in fallback
+                })
+
+        if self.cache and len(unique) > 1:
+            print(f"Sentiment cache: {len(unique) - len(misses)}/{len(unique)} hits")
+
+        for i, key in keys.items():
+            results[i] = dict(found[key])
+        return results
+
+    def _cascade_batch(self, texts):
+        """TextBlob first for every text, the transformer only for uncertain ones
+
+        Texts whose TextBlob polarity lies inside the uncertainty band
+        (|polarity| < SENTIMENT_CASCADE_BAND) escalate to the transformer. A
+        random SENTIMENT_CASCADE_AUDIT_RATE share of the confident texts also
+        runs through the transformer to measure how often the cascade's label
+        differs from the full model. Returns the results and the positions
+        that kept their TextBlob result.
+        """
+        polarity = np.array([TextBlob(text).sentiment.polarity for text in texts], dtype=float)
+        labels = np.select([polarity > 0.1, polarity < -0.1], ['positive', 'negative'], 'neutral')
+        escalate = np.abs(polarity) < Config.SENTIMENT_CASCADE_BAND
+
+        confident = np.flatnonzero(~escalate)
+        audit_count = int(round(len(confident) * Config.SENTIMENT_CASCADE_AUDIT_RATE))
+        # A fresh generator per call, so the same texts always get the same audit sample
+        rng = np.random.default_rng(Config.SENTIMENT_CASCADE_AUDIT_SEED)
+        audited = rng.choice(confident, audit_count, replace=False) if audit_count else np.array([], dtype=int)
+
+        to_model = np.union1d(np.flatnonzero(escalate), audited)
+        model_results, model_fallback = self._analyze_transformer_batch([texts[k] for k in to_model])
+
+        results = [
+            {'sentiment': label, 'score': score, 'confidence': abs(score)}
+            for label, score in zip(labels.tolist(), polarity.tolist())
+        ]
+        fallback = set(confident.tolist())
+        for j, k in enumerate(to_model.tolist()):
+            results[k] = model_results[j]
+            if j in model_fallback:
+                fallback.add(k)
+            else:
+                fallback.discard(k)
+
+        # Divergence on the audited sample: cascade label vs full transformer label
+        audited_set = set(audited.tolist())
+        compared = [
+            (labels[k], model_results[j]['sentiment'])
+            for j, k in enumerate(to_model.tolist()) if k in audited_set and j not in model_fallback
+        ]
+        differing = sum(1 for cascade_label, model_label in compared if cascade_label != model_label)
+
+        self.last_cascade_report = {
+            'texts': len(texts),
+            'escalated': int(escalate.sum()),
+            'escalation_rate': float(escalate.mean()) if len(texts) else 0.0,
+            'audited': len(compared),
+            'label_divergence': differing / len(compared) if compared else None
+        }
+        report = self.last_cascade_report
+        message = (f"🔀 Sentiment cascade: {report['escalated']}/{report['texts']} texts escalated "
+                   f"({report['escalation_rate']:.0%})")
+        if compared:
+            message += f", {differing}/{len(compared)} audited labels differ from the transformer"
+        print(message)
+
+        return results, fallback
+
+    def _from_transformer(self, result):
+        """Convert a transformer pipeline result to the standard format"""
+        sentiment = result['label'].lower()
+        confidence = result['score']
+
+        # Convert to standardized format
+        if sentiment in ['positive', 'pos']:
+            score = confidence
+        elif sentiment in ['negative', 'neg']:
+            score = -confidence
+        else:
+            score = 0.0
 
-                return {
-                    'sentiment': sentiment,
-                    'score': score,
-                    'confidence': confidence
-                }
-            except Exception as e:
-                print(f"Transformer analysis failed: {e}")
+        return {
+            'sentiment': sentiment,
+            'score': score,
+            'confidence': confidence
+        }
 
-        # Fallback to TextBlob
+    def _textblob_sentiment(self, text):
+        """TextBlob polarity sentiment for cleaned text"""
         blob = TextBlob(text)
         polarity = blob.sentiment.polarity
 
@@ -108,29 +273,74 @@ class SentimentAnalyzer:
         if news_df.empty:
             return news_df
 
-        results = []
-
         print(f"Analyzing sentiment for {len(news_df)} articles...")
 
-        for idx, row in news_df.iterrows():
-            # Combine title and description for analysis
-            text = f"{row.get('title', '')} {row.get('description', '')}"
+        # Combine title and description for analysis
+        texts = [f"{title} {description}" for title, description in zip(
+            self._text_column(news_df, 'title'), self._text_column(news_df, 'description')
+        )]
 
-            sentiment_result = self.analyze_text(text)
-
-            results.append({
-                'index': idx,
-                'sentiment': sentiment_result['sentiment'],
-                'sentiment_score': sentiment_result['score'],
-                'confidence': sentiment_result['confidence']
-            })
+        sentiment_results = self._analyze_texts(texts)
 
         # Merge results back to dataframe
-        sentiment_df = pd.DataFrame(results).set_index('index')
+        sentiment_df = pd.DataFrame({
+            'sentiment': [result['sentiment'] for result in sentiment_results],
+            'sentiment_score': [result['score'] for result in sentiment_results],
+            'confidence': [result['confidence'] for result in sentiment_results]
+        }, index=news_df.index)
         news_df = news_df.join(sentiment_df)
 
         return news_df
 
+    def _text_column(self, news_df, column):
+        """Column values as row.get(column, '') would return them"""
+        if column in news_df.columns:
+            return news_df[column].tolist()
+        return [''] * len(news_df)
+
+    def _analyze_transformer_batch(self, texts):
+        """Run the transformer over many texts in length-bucketed batches
+
+        Takes cleaned, non-empty texts. They are tokenized once with the
+        pipeline's tokenizer and sorted by token count, so each batch holds
+        texts of similar length and little padding. A failed batch is retried
+        item by item, with TextBlob only for the items that still fail.
+        Returns the results and the positions that fell back to TextBlob.
+        """
+        results = [None] * len(texts)
+        fallback = set()
+        try:
+            tokenizer = self.sentiment_pipeline.tokenizer
+            lengths = [len(ids) for ids in tokenizer(texts, truncation=True)['input_ids']]
+        except Exception as e:
+            print(f"Tokenization failed, batching by character length: {e}")
+            lengths = [len(text) for text in texts]
+
+        # Length buckets: consecutive texts in token-length order
+        order = sorted(range(len(texts)), key=lambda k: lengths[k])
+        batch_size = max(1, Config.SENTIMENT_BATCH_SIZE)
+
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            bucket_texts = [texts[k] for k in bucket]
+            try:
+                outputs = self.sentiment_pipeline(bucket_texts, batch_size=len(bucket_texts), truncation=True)
+                for k, output in zip(bucket, outputs):
+                    results[k] = self._from_transformer(output)
+            except Exception as e:
+                print(f"Transformer batch failed, retrying {len(bucket_texts)} items one by one: {e}")
+                for k, text in zip(bucket, bucket_texts):
+                    try:
+                        # Truncate to the model's 512-token limit
+                        results[k] = self._from_transformer(self.sentiment_pipeline(text, truncation=True)[0])
+                    except Exception as item_error:
+                        print(f"Transformer analysis failed: {item_error}")
+                        # Fallback to TextBlob
+                        results[k] = self._textblob_sentiment(text)
+                        fallback.add(k)
+
+        return results, fallback
+
     def calculate_stock_sentiment(self, news_df, symbol):
         """Calculate overall sentiment score for a specific stock"""
         if news_df.empty:
@@ -191,12 +401,117 @@ class SentimentAnalyzer:
         }
 
     def get_sentiment_summary(self, news_df):
-        """Get sentiment summary for all stocks"""
-        symbols = news_df['symbol'].unique()
-        sentiment_summary = {}
+        """Get sentiment summary for all stocks
+
+        Same result as calculate_stock_sentiment for every symbol, computed
+        with one sort and one groupby instead of re-filtering news_df per symbol.
+        """
+        # Skip general market news
+        symbols = [symbol for symbol in news_df['symbol'].unique() if symbol != 'MARKET']
+        if not symbols:
+            return {}
+
+        news = news_df.loc[
+            news_df['symbol'].isin(symbols), ['symbol', 'sentiment', 'sentiment_score', 'confidence']
+        ].copy()
+        news['published_at'] = self._parse_published_at(news_df.loc[news.index, 'published_at'])
+
+        # Rank articles newest first within each symbol for the time decay weights
+        news = news.sort_values('published_at', ascending=False, kind='stable')
+        news['weight'] = np.exp(-news.groupby('symbol', sort=False).cumcount().to_numpy() * 0.1)
+        if 'cluster_size' in news_df.columns:
+            # A story carried by several outlets counts once, weighted up by its reach
+            sizes = news_df.loc[news.index, 'cluster_size'].fillna(1).to_numpy(dtype=float)
+            news['weight'] *= cluster_weight(sizes)
+        news['weighted_score'] = news['sentiment_score'] * news['weight']
+
+        groups = news.groupby('symbol', sort=False)
+        totals = groups.agg(
+            weighted_score=('weighted_score', 'sum'),
+            weight=('weight', 'sum'),
+            article_count=('symbol', 'size'),
+            confidence=('confidence', 'mean')
+        )
+        label_counts = groups['sentiment'].value_counts().unstack(fill_value=0)
 
+        sentiment_summary = {}
         for symbol in symbols:
-            if symbol != 'MARKET':  # Skip general market news
-                sentiment_summary[symbol] = self.calculate_stock_sentiment(news_df, symbol)
+            if symbol not in totals.index:
+                # Symbols that match no rows (NaN) get the empty-news result
+                sentiment_summary[symbol] = self.calculate_stock_sentiment(news_df.iloc[0:0], symbol)
+                continue
+
+            row = totals.loc[symbol]
+            counts = label_counts.loc[symbol]
+            overall_score = row['weighted_score'] / row['weight']
+
+            # Determine overall sentiment
+            if overall_score > 0.1:
+                overall_sentiment = 'positive'
+            elif overall_score < -0.1:
+                overall_sentiment = 'negative'
+            else:
+                overall_sentiment = 'neutral'
+
+            sentiment_summary[symbol] = {
+                'overall_sentiment': overall_sentiment,
+                'sentiment_score': overall_score,
+                'article_count': int(row['article_count']),
+                'positive_count': counts.get('positive', 0),
+                'negative_count': counts.get('negative', 0),
+                'neutral_count': counts.get('neutral', 0),
+                'confidence': row['confidence']
+            }
+
+        if self.sentiment_state:
+            self._apply_decayed_sentiment(news_df.loc[news.index], news['published_at'], sentiment_summary)
 
         return sentiment_summary
+
+    def _apply_decayed_sentiment(self, news, published_at, sentiment_summary):
+        """Fold new articles into each symbol's decayed state and report its current value
+
+        Score, label and confidence then come from every article seen so far,
+        weighted by real age with a SENTIMENT_HALF_LIFE_HOURS half-life.
+        Articles already in a symbol's state are skipped.
+        """
+        now = time.time()
+        timestamps = self._epoch_seconds(published_at).fillna(now)
+
+        for symbol, articles in news.groupby('symbol', sort=False):
+            state = self.sentiment_state.load(symbol)
+            for (_, article), timestamp in zip(articles.iterrows(), timestamps.loc[articles.index]):
+                state.update(timestamp, article['sentiment_score'], article['confidence'], article_id(article))
+            state.prune(now)
+            self.sentiment_state.save(state)
+
+            decayed = state.read(now)
+            overall_score = decayed['sentiment_score']
+            if overall_score > 0.1:
+                overall_sentiment = 'positive'
+            elif overall_score < -0.1:
+                overall_sentiment = 'negative'
+            else:
+                overall_sentiment = 'neutral'
+
+            sentiment_summary[symbol].update({
+                'overall_sentiment': overall_sentiment,
+                'sentiment_score': overall_score,
+                'confidence': decayed['confidence'],
+                'effective_articles': decayed['effective_articles']
+            })
+
+    def _epoch_seconds(self, published_at):
+        """Seconds since the epoch; naive timestamps are taken as UTC"""
+        if published_at.dt.tz is not None:
+            published_at = published_at.dt.tz_convert('UTC').dt.tz_localize(None)
+        seconds = published_at.astype('datetime64[ns]').astype('int64') / 1e9
+        return seconds.where(published_at.notna())
+
+    def _parse_published_at(self, published_at):
+        """Parse publication timestamps once for the whole frame"""
+        try:
+            return pd.to_datetime(published_at)
+        except (ValueError, TypeError):
+            # Sources mix naive and timezone-aware timestamps
+            return pd.to_datetime(published_at, utc=True, format='mixed', errors='coerce')
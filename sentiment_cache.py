@@ -0,0 +1,103 @@
+"""
+Content-addressed cache for sentiment results.
+
+Results are keyed by a SHA-256 of the model identifier and the cleaned text,
+so a headline seen on an earlier refresh is never scored twice by the same
+model. Hot entries live in an in-process LRU; every entry is also written
+to SQLite so the cache survives restarts.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from config import Config
+
+
+class SentimentCache:
+    """Two-tier (memory LRU + SQLite) sentiment result cache"""
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or Config.SENTIMENT_CACHE_PATH
+        self.max_entries = max_entries or Config.SENTIMENT_CACHE_SIZE
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+                "key TEXT PRIMARY KEY, model TEXT, sentiment TEXT, "
+                "score REAL, confidence REAL, created_at TEXT)"
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"⚠ Sentiment cache database unavailable, using memory only: {e}")
+            self._db = None
+
+    @staticmethod
+    def key(model_id, text):
+        """Cache key for a cleaned text scored by a given model"""
+        return hashlib.sha256(f"{model_id}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: result} for every key found in either tier"""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = dict(self._memory[key])
+                else:
+                    missing.append(key)
+
+            if missing and self._db is not None:
+                # SQLite limits the number of bound parameters per query
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, sentiment, score, confidence FROM sentiment_cache "
+                        f"WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    for key, sentiment, score, confidence in rows:
+                        result = {'sentiment': sentiment, 'score': score, 'confidence': confidence}
+                        self._remember(key, result)
+                        found[key] = dict(result)
+
+        return found
+
+    def put_many(self, model_id, results):
+        """Store {key: result} entries in both tiers"""
+        if not results:
+            return
+
+        now = datetime.now().isoformat()
+        with self._lock:
+            for key, result in results.items():
+                self._remember(key, result)
+
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO sentiment_cache VALUES (?, ?, ?, ?, ?, ?)",
+                        [(key, model_id, result['sentiment'], float(result['score']),
+                          float(result['confidence']), now) for key, result in results.items()]
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    print(f"Error writing sentiment cache: {e}")
+
+    def _remember(self, key, result):
+        """Insert into the LRU tier, evicting the least recently used entries"""
+        self._memory[key] = dict(result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
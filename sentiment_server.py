@@ -0,0 +1,252 @@
+"""
+Shared sentiment inference server with cross-request micro-batching.
+
+One process loads the sentiment model once and serves every SentimentAnalyzer
+in the web app, CLI and background refreshers over a local socket (a Unix
+socket, or localhost TCP where Unix sockets are unavailable). Texts from
+requests that arrive within SENTIMENT_SERVER_MAX_WAIT_MS of each other are
+scored together; the model never gets more than SENTIMENT_SERVER_MAX_BATCH
+texts at once, so larger batches are split. A client keeps one connection
+per thread, so concurrent workers of one process share batches too.
+
+Start it with:
+
+    python sentiment_server.py
+
+and set USE_SENTIMENT_SERVER=true for the clients.
+"""
+
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from config import Config
+
+USE_UNIX_SOCKET = hasattr(socket, 'AF_UNIX')
+
+
+def _server_address():
+    if USE_UNIX_SOCKET:
+        return Config.SENTIMENT_SERVER_SOCKET
+    return ('127.0.0.1', Config.SENTIMENT_SERVER_PORT)
+
+
+def _new_socket():
+    return socket.socket(socket.AF_UNIX if USE_UNIX_SOCKET else socket.AF_INET, socket.SOCK_STREAM)
+
+
+def send_message(sock, payload):
+    """Send one length-prefixed JSON message"""
+    data = json.dumps(payload, default=float).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(data)) + data)
+
+
+def receive_message(sock):
+    """Receive one length-prefixed JSON message, None if the peer closed"""
+    header = _receive_exactly(sock, 4)
+    if header is None:
+        return None
+    data = _receive_exactly(sock, struct.unpack('>I', header)[0])
+    if data is None:
+        return None
+    return json.loads(data.decode('utf-8'))
+
+
+def _receive_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class _PendingRequest:
+    """Texts from one client request waiting for the next batch"""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class SentimentServer:
+    """Serves SentimentAnalyzer results to local clients, batching across requests"""
+
+    def __init__(self, analyzer=None, max_batch_size=None, max_wait_ms=None):
+        if analyzer is None:
+            from sentiment_analyzer import SentimentAnalyzer
+            analyzer = SentimentAnalyzer(use_server=False)
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size or Config.SENTIMENT_SERVER_MAX_BATCH
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else Config.SENTIMENT_SERVER_MAX_WAIT_MS) / 1000.0
+        self._pending = queue.Queue()
+        self._running = False
+
+    def serve_forever(self):
+        """Accept client connections until interrupted"""
+        address = _server_address()
+        if USE_UNIX_SOCKET:
+            directory = os.path.dirname(address)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(address):
+                os.remove(address)
+
+        listener = _new_socket()
+        listener.bind(address)
+        listener.listen()
+        self._running = True
+        threading.Thread(target=self._batch_loop, name="sentiment-batcher", daemon=True).start()
+        print(f"✓ Sentiment server ({self.analyzer.model_id}) listening on {address}")
+
+        try:
+            while self._running:
+                connection, _ = listener.accept()
+                threading.Thread(target=self._handle_client, args=(connection,), daemon=True).start()
+        except KeyboardInterrupt:
+            print("Sentiment server stopped")
+        finally:
+            self._running = False
+            listener.close()
+            if USE_UNIX_SOCKET and os.path.exists(address):
+                os.remove(address)
+
+    def analyze(self, texts):
+        """Queue texts for the next batch and wait for their results"""
+        request = _PendingRequest(list(texts))
+        self._pending.put(request)
+        request.done.wait()
+        if request.error:
+            raise RuntimeError(request.error)
+        return request.results
+
+    def _handle_client(self, connection):
+        with connection:
+            while True:
+                try:
+                    message = receive_message(connection)
+                except (OSError, ValueError):
+                    return
+                if message is None:
+                    return
+
+                if message.get('op') == 'ping':
+                    send_message(connection, {'ok': True, 'model_id': self.analyzer.model_id})
+                    continue
+
+                try:
+                    send_message(connection, {'results': self.analyze(message.get('texts', []))})
+                except Exception as e:
+                    send_message(connection, {'error': str(e)})
+
+    def _batch_loop(self):
+        """Collect requests for up to max_wait after the first one, then score them together"""
+        while self._running:
+            batch = [self._pending.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            texts = [text for request in batch for text in request.texts]
+            try:
+                results = []
+                for start in range(0, len(texts), self.max_batch_size):
+                    results.extend(self.analyzer._analyze_texts(texts[start:start + self.max_batch_size]))
+                offset = 0
+                for request in batch:
+                    request.results = results[offset:offset + len(request.texts)]
+                    offset += len(request.texts)
+            except Exception as e:
+                print(f"Sentiment batch of {len(texts)} texts failed: {e}")
+                for request in batch:
+                    request.error = str(e)
+
+            for request in batch:
+                request.done.set()
+
+
+class SentimentClient:
+    """Connections to a running SentimentServer, one per calling thread"""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or Config.SENTIMENT_SERVER_TIMEOUT
+        self._local = threading.local()
+        self._sockets = set()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = _new_socket()
+            sock.settimeout(self.timeout)
+            sock.connect(_server_address())
+            self._local.sock = sock
+            with self._lock:
+                self._sockets.add(sock)
+        return sock
+
+    def _disconnect(self):
+        """Drop this thread's connection after an error"""
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            with self._lock:
+                self._sockets.discard(sock)
+            sock.close()
+
+    def _request(self, payload):
+        # Each thread talks over its own connection, so requests from
+        # several threads reach the server together and can share a batch
+        try:
+            sock = self._connect()
+            send_message(sock, payload)
+            response = receive_message(sock)
+        except OSError:
+            self._disconnect()
+            raise
+        if response is None:
+            self._disconnect()
+            raise ConnectionError("Sentiment server closed the connection")
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def ping(self):
+        """Model id of the server, or None if it is not reachable"""
+        try:
+            return self._request({'op': 'ping'})['model_id']
+        except Exception:
+            return None
+
+    def analyze(self, texts):
+        """Sentiment results for texts, in the analyze_text format"""
+        return self._request({'texts': list(texts)})['results']
+
+    def close(self):
+        """Close every thread's connection"""
+        with self._lock:
+            sockets, self._sockets = self._sockets, set()
+        for sock in sockets:
+            sock.close()
+        self._local = threading.local()
+
+
+if __name__ == "__main__":
+    SentimentServer().serve_forever()
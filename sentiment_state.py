@@ -0,0 +1,146 @@
+"""
+Per-symbol sentiment with true time-based exponential decay.
+
+An article published at time t_i contributes with weight
+2 ** (-(t - t_i) / half_life) when read at time t. The state keeps the
+decayed sums of weights, weighted scores and weighted confidences at a
+reference time, so adding an article is O(1) and a read at any time is
+exact: all sums decay by the same factor, which cancels in the averages.
+"""
+
+import hashlib
+import json
+import math
+import os
+from config import Config
+
+# Articles this many half-lives old weigh less than 1e-6 and are forgotten
+FORGET_AFTER_HALF_LIVES = 20
+
+
+def article_id(article):
+    """Stable identifier of an article, so refreshes do not count it twice"""
+    url = article.get('url')
+    if isinstance(url, str) and url:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+    title = article.get('title')
+    return hashlib.sha1(str(title).encode('utf-8')).hexdigest()
+
+
+class DecayedSentimentState:
+    """Exponentially decayed sentiment accumulator for one symbol"""
+
+    def __init__(self, symbol, half_life_seconds=None):
+        self.symbol = symbol
+        self.half_life = float(half_life_seconds or Config.SENTIMENT_HALF_LIFE_HOURS * 3600)
+        self.reference_time = None
+        self.weight = 0.0
+        self.weighted_score = 0.0
+        self.weighted_confidence = 0.0
+        self.seen = {}  # article id -> published timestamp
+
+    def _decay(self, seconds):
+        return 2.0 ** (-seconds / self.half_life)
+
+    def update(self, timestamp, score, confidence=0.0, article_key=None):
+        """Add one article published at `timestamp` (epoch seconds); False if already seen"""
+        if article_key is not None:
+            if article_key in self.seen:
+                return False
+            self.seen[article_key] = timestamp
+
+        if score is None or math.isnan(score):
+            return True
+        if confidence is None or math.isnan(confidence):
+            confidence = 0.0
+
+        if self.reference_time is None:
+            self.reference_time = timestamp
+
+        if timestamp > self.reference_time:
+            # Move the reference time forward, decaying the existing sums
+            factor = self._decay(timestamp - self.reference_time)
+            self.weight *= factor
+            self.weighted_score *= factor
+            self.weighted_confidence *= factor
+            self.reference_time = timestamp
+            weight = 1.0
+        else:
+            # Late arrival: weigh it by its age at the reference time
+            weight = self._decay(self.reference_time - timestamp)
+
+        self.weight += weight
+        self.weighted_score += weight * score
+        self.weighted_confidence += weight * confidence
+        return True
+
+    def read(self, timestamp=None):
+        """Decayed sentiment at `timestamp` (defaults to the reference time)"""
+        if self.reference_time is None or self.weight == 0:
+            return {'sentiment_score': 0.0, 'confidence': 0.0, 'effective_articles': 0.0}
+
+        timestamp = self.reference_time if timestamp is None else timestamp
+        return {
+            'sentiment_score': self.weighted_score / self.weight,
+            'confidence': self.weighted_confidence / self.weight,
+            'effective_articles': self.weight * self._decay(timestamp - self.reference_time)
+        }
+
+    def prune(self, now):
+        """Forget article ids too old to matter"""
+        horizon = now - FORGET_AFTER_HALF_LIVES * self.half_life
+        self.seen = {key: ts for key, ts in self.seen.items() if ts >= horizon}
+
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'half_life': self.half_life,
+            'reference_time': self.reference_time,
+            'weight': self.weight,
+            'weighted_score': self.weighted_score,
+            'weighted_confidence': self.weighted_confidence,
+            'seen': self.seen
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['symbol'], data['half_life'])
+        state.reference_time = data['reference_time']
+        state.weight = data['weight']
+        state.weighted_score = data['weighted_score']
+        state.weighted_confidence = data['weighted_confidence']
+        state.seen = data['seen']
+        return state
+
+
+class SentimentStateStore:
+    """JSON files holding each symbol's decayed sentiment state"""
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or Config.SENTIMENT_STATE_DIR
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _path(self, symbol):
+        safe_symbol = symbol.replace(os.sep, '_').replace('^', '_')
+        return os.path.join(self.base_dir, f"{safe_symbol}.json")
+
+    def load(self, symbol):
+        """Stored state for a symbol, or a fresh one with the configured half-life"""
+        half_life = Config.SENTIMENT_HALF_LIFE_HOURS * 3600
+        try:
+            with open(self._path(symbol)) as f:
+                state = DecayedSentimentState.from_dict(json.load(f))
+            # A changed half-life invalidates the stored sums
+            if state.half_life == half_life:
+                return state
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading sentiment state for {symbol}: {e}")
+        return DecayedSentimentState(symbol, half_life)
+
+    def save(self, state):
+        tmp_path = self._path(state.symbol) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp_path, self._path(state.symbol))
@@ -78,7 +78,7 @@ def run_web_app():
         print("Starting Stock News Analysis Agent Web App...")
         print("="*50)
         
-        from app import app
+        from app import app, warm_snapshot
         from config import Config
         
         print(f"🚀 Starting server at http://{Config.HOST}:{Config.PORT}")
@@ -90,6 +90,7 @@ def run_web_app():
         print("- Interactive charts and dashboard")
         print("\nNote: First run may take longer as it downloads data...")
         
+        warm_snapshot()
         app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
         
     except KeyboardInterrupt:
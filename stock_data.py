@@ -1,26 +1,92 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from config import Config
+from price_store import PriceStore
+import indicators
+from streaming_indicators import IndicatorStateStore, SymbolIndicatorState
+
+
+def _safe_float(value, default=0.0):
+    """Safely convert to float, handling NaN and None"""
+    try:
+        if pd.isna(value) or value is None:
+            return default
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+# Column order of the rows returned by get_stock_data
+STOCK_DATA_COLUMNS = [
+    'symbol', 'current_price', 'price_change', 'volume_ratio', 'volatility', 'market_cap',
+    'pe_ratio', 'pb_ratio', 'book_value', 'beta',
+    'ma_20', 'ma_50', 'ma_200',
+    'ema_20', 'ema_50', 'ema_200',
+    'rsi', 'macd_line', 'macd_signal', 'macd_histogram',
+    'bb_upper', 'bb_middle', 'bb_lower', 'stoch_k', 'stoch_d',
+    'dividend_yield', 'roe', 'debt_to_equity', 'current_ratio',
+    'sector', 'industry', 'recommendation', 'target_price', 'analyst_count', 'last_updated'
+]
+
+# Screening rules as (stage, column, check). Price rules only need OHLCV
+# data, fundamental rules need ticker.info.
+SCREENING_RULES = [
+    ('price', 'volume_ratio', lambda df: df['volume_ratio'] >= 0.5),  # Active stocks
+    ('price', 'price_change', lambda df: abs(df['price_change']) <= Config.MAX_PRICE_CHANGE),  # No extreme moves
+    ('price', 'rsi', lambda df: df['rsi'] <= 80),  # Not overbought
+    ('price', 'current_price', lambda df: df['current_price'] > 0),  # Valid price data
+    ('fundamentals', 'market_cap', lambda df: df['market_cap'] >= Config.MIN_MARKET_CAP),
+]
+
 
 class StockDataCollector:
     def __init__(self):
-        self.cache = {}
+        self.price_store = PriceStore()
+        self.indicator_states = (
+            IndicatorStateStore() if Config.USE_STREAMING_INDICATORS and self.price_store.enabled else None
+        )
 
     def get_stock_data(self, symbol, period='1mo'):
         """Get stock price data and metrics"""
         try:
             ticker = yf.Ticker(symbol)
 
-            # Get historical data
-            hist = ticker.history(period=period)
+            # Get historical data, from the local store when it is enabled
+            if self.price_store.enabled:
+                hist = self._get_histories([symbol], period).get(symbol, pd.DataFrame())
+            else:
+                hist = ticker.history(period=period)
             if hist.empty:
                 return None
 
             # Get stock info
             info = ticker.info
 
+            return self._build_stock_data(symbol, hist, info)
+
+        except Exception as e:
+            print(f"Error fetching data for {symbol}: {e}")
+            return None
+
+    def _build_stock_data(self, symbol, hist, info):
+        """Build the stock metrics dict from price history and ticker info"""
+        price_data = self._price_metrics(symbol, hist)
+        if price_data is None:
+            return None
+        return self._merge_fundamentals(price_data, info)
+
+    def _merge_fundamentals(self, price_data, info):
+        """Combine price metrics with fundamentals in the usual column order"""
+        stock_data = {**price_data, **self._fundamental_metrics(info)}
+        stock_data['last_updated'] = datetime.now().isoformat()
+        return {key: stock_data[key] for key in STOCK_DATA_COLUMNS}
+
+    def _price_metrics(self, symbol, hist):
+        """Calculate the metrics that only need OHLCV history"""
+        try:
             # Calculate metrics
             current_price = hist['Close'].iloc[-1]
             prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
@@ -52,36 +118,14 @@ class StockDataCollector:
             stoch_k, stoch_d = self._calculate_stochastic(hist)
 
             # Clean and validate all numeric values to prevent NaN
-            def safe_float(value, default=0.0):
-                """Safely convert to float, handling NaN and None"""
-                try:
-                    if pd.isna(value) or value is None:
-                        return default
-                    return float(value)
-                except (ValueError, TypeError):
-                    return default
-
-            # Get additional financial metrics
-            dividend_yield = safe_float(info.get('dividendYield'), 0.0) * 100 if info.get('dividendYield') else 0.0
-            book_value = safe_float(info.get('bookValue'), None)
-            pb_ratio = safe_float(info.get('priceToBook'), None)
-            roe = safe_float(info.get('returnOnEquity'), None)
-            debt_to_equity = safe_float(info.get('debtToEquity'), None)
-            current_ratio = safe_float(info.get('currentRatio'), None)
-
-            stock_data = {
+            safe_float = _safe_float
+
+            return {
                 'symbol': symbol,
                 'current_price': safe_float(current_price, 0.0),
                 'price_change': safe_float(price_change, 0.0),
                 'volume_ratio': safe_float(volume_ratio, 1.0),
                 'volatility': safe_float(volatility, 0.0),
-                'market_cap': safe_float(info.get('marketCap', 0), 0),
-
-                # Valuation Metrics
-                'pe_ratio': safe_float(info.get('trailingPE'), None),
-                'pb_ratio': pb_ratio,
-                'book_value': book_value,
-                'beta': safe_float(info.get('beta'), None),
 
                 # Moving Averages
                 'ma_20': safe_float(ma_20, current_price),
@@ -103,28 +147,113 @@ class StockDataCollector:
                 'bb_lower': safe_float(bb_lower, current_price),
                 'stoch_k': safe_float(stoch_k, 50.0),
                 'stoch_d': safe_float(stoch_d, 50.0),
-
-                # Financial Health
-                'dividend_yield': dividend_yield,
-                'roe': roe,
-                'debt_to_equity': debt_to_equity,
-                'current_ratio': current_ratio,
-
-                # Company Info
-                'sector': str(info.get('sector', 'Unknown')),
-                'industry': str(info.get('industry', 'Unknown')),
-                'recommendation': str(info.get('recommendationKey', 'none')),
-                'target_price': safe_float(info.get('targetMeanPrice'), None),
-                'analyst_count': safe_float(info.get('numberOfAnalystOpinions', 0), 0),
-                'last_updated': datetime.now().isoformat()
             }
 
-            return stock_data
-
         except Exception as e:
-            print(f"Error fetching data for {symbol}: {e}")
+            print(f"Error calculating metrics for {symbol}: {e}")
             return None
 
+    def _price_metrics_batch(self, histories):
+        """Calculate price metrics for many symbols, vectorized over a panel when enabled"""
+        if self.indicator_states is not None and histories:
+            return self._streaming_price_metrics(list(histories))
+
+        if Config.USE_VECTORIZED_INDICATORS and histories:
+            try:
+                metrics = indicators.compute_price_metrics(indicators.build_panels(histories))
+                return {
+                    symbol: {'symbol': symbol, **row}
+                    for symbol, row in zip(metrics.index, metrics.to_dict('records'))
+                }
+            except Exception as e:
+                print(f"Vectorized indicators failed, calculating per symbol: {e}")
+
+        price_data = {}
+        for symbol, hist in histories.items():
+            data = self._price_metrics(symbol, hist)
+            if data:
+                price_data[symbol] = data
+        return price_data
+
+    def _streaming_price_metrics(self, symbols):
+        """Advance each symbol's saved indicator state with its new stored bars
+
+        The newest stored bar may still change, so it is previewed rather than
+        committed; it gets committed on a later refresh once a newer bar exists.
+        """
+        price_data = {}
+
+        for symbol in symbols:
+            try:
+                bars = self.price_store.load(symbol)
+                if bars is None or bars.empty:
+                    continue
+
+                state = self.indicator_states.load(symbol)
+                if state is not None and not self._state_matches(state, bars):
+                    print(f"Stored prices changed for {symbol}, rebuilding indicator state")
+                    state = None
+                if state is None:
+                    state = SymbolIndicatorState(symbol)
+                    new_bars = bars
+                else:
+                    new_bars = bars[bars.index > pd.Timestamp(state.last_timestamp)]
+
+                committed = new_bars[new_bars.index < bars.index[-1]]
+                for timestamp, high, low, close, volume in committed[['High', 'Low', 'Close', 'Volume']].itertuples(name=None):
+                    state.update(timestamp.isoformat(), high, low, close, volume)
+                if not committed.empty:
+                    self.indicator_states.save(state)
+
+                latest = bars.iloc[-1]
+                metrics = state.peek(bars.index[-1].isoformat(), latest['High'], latest['Low'],
+                                     latest['Close'], latest['Volume'])
+                price_data[symbol] = {'symbol': symbol, **metrics}
+
+            except Exception as e:
+                print(f"Error updating streaming indicators for {symbol}: {e}")
+
+        return price_data
+
+    def _state_matches(self, state, bars):
+        """Check that the state's last committed bar is still in the store unchanged"""
+        if state.last_timestamp is None:
+            return False
+        timestamp = pd.Timestamp(state.last_timestamp)
+        if timestamp not in bars.index:
+            return False
+        return bool(np.isclose(bars.loc[timestamp, 'Close'], state.last_close, rtol=1e-9))
+
+    def _fundamental_metrics(self, info):
+        """Extract the metrics that come from ticker.info"""
+        safe_float = _safe_float
+
+        # Get additional financial metrics
+        dividend_yield = safe_float(info.get('dividendYield'), 0.0) * 100 if info.get('dividendYield') else 0.0
+
+        return {
+            'market_cap': safe_float(info.get('marketCap', 0), 0),
+
+            # Valuation Metrics
+            'pe_ratio': safe_float(info.get('trailingPE'), None),
+            'pb_ratio': safe_float(info.get('priceToBook'), None),
+            'book_value': safe_float(info.get('bookValue'), None),
+            'beta': safe_float(info.get('beta'), None),
+
+            # Financial Health
+            'dividend_yield': dividend_yield,
+            'roe': safe_float(info.get('returnOnEquity'), None),
+            'debt_to_equity': safe_float(info.get('debtToEquity'), None),
+            'current_ratio': safe_float(info.get('currentRatio'), None),
+
+            # Company Info
+            'sector': str(info.get('sector', 'Unknown')),
+            'industry': str(info.get('industry', 'Unknown')),
+            'recommendation': str(info.get('recommendationKey', 'none')),
+            'target_price': safe_float(info.get('targetMeanPrice'), None),
+            'analyst_count': safe_float(info.get('numberOfAnalystOpinions', 0), 0),
+        }
+
     def _calculate_rsi(self, prices, period=14):
         """Calculate Relative Strength Index"""
         try:
@@ -212,19 +341,167 @@ class StockDataCollector:
         except:
             return 50, 50
 
-    def get_multiple_stocks(self, symbols):
+    def get_multiple_stocks(self, symbols, period='1mo', bulk=None):
         """Get data for multiple stocks"""
+        if bulk is None:
+            bulk = Config.USE_BULK_DOWNLOAD
+
+        if bulk:
+            return self._get_multiple_stocks_bulk(symbols, period)
+
         stock_data = []
 
         print(f"Fetching data for {len(symbols)} stocks...")
         for i, symbol in enumerate(symbols):
             print(f"Processing {symbol} ({i+1}/{len(symbols)})")
-            data = self.get_stock_data(symbol)
+            data = self.get_stock_data(symbol, period)
             if data:
                 stock_data.append(data)
 
         return pd.DataFrame(stock_data)
 
+    def _get_multiple_stocks_bulk(self, symbols, period='1mo'):
+        """Get data for multiple stocks using multi-ticker downloads"""
+        symbols = list(dict.fromkeys(symbols))
+        print(f"Bulk fetching data for {len(symbols)} stocks...")
+
+        histories = self._get_histories(symbols, period)
+        price_data = self._price_metrics_batch(histories)
+        infos = self._fetch_infos(list(price_data))
+
+        stock_data = []
+        for symbol in symbols:
+            if symbol in price_data:
+                stock_data.append(self._merge_fundamentals(price_data[symbol], infos.get(symbol, {})))
+
+        print(f"Bulk fetch complete: {len(stock_data)}/{len(symbols)} stocks")
+        return pd.DataFrame(stock_data)
+
+    def _get_histories(self, symbols, period='1mo'):
+        """Get price history from the local store, downloading only new bars"""
+        if not self.price_store.enabled:
+            return self._download_histories(symbols, period)
+
+        # Each stored partition is read once and kept in memory for the rest of the refresh
+        stored = {}
+        backfill = []
+        incremental = {}
+        for symbol in symbols:
+            bars = self.price_store.load(symbol)
+            if bars is not None and not bars.empty:
+                stored[symbol] = bars
+                incremental[symbol] = list(bars.index[-2:])
+            else:
+                backfill.append(symbol)
+
+        # Re-fetch from the second newest stored bar: the newest may have been
+        # partial, and the one before it tells us if Yahoo re-adjusted prices
+        by_start = {}
+        for symbol, stamps in incremental.items():
+            by_start.setdefault(stamps[0].strftime('%Y-%m-%d'), []).append(symbol)
+
+        for start, start_symbols in by_start.items():
+            fresh = self._download_histories(start_symbols, start=start)
+            for symbol in start_symbols:
+                bars = fresh.get(symbol)
+                if bars is None:
+                    continue
+                stamps = incremental[symbol]
+                if self._history_adjusted(symbol, stamps, bars, stored[symbol]):
+                    backfill.append(symbol)
+                    continue
+                stored[symbol] = self.price_store.append(
+                    symbol, bars[bars.index >= stamps[0]], existing=stored[symbol]
+                )
+
+        if backfill:
+            print(f"Backfilling price history for {len(backfill)} stocks...")
+            fresh = self._download_histories(backfill, Config.PRICE_STORE_BACKFILL_PERIOD)
+            for symbol, bars in fresh.items():
+                written = self.price_store.write(symbol, bars)
+                if written is not None:
+                    stored[symbol] = written
+
+        histories = {}
+        for symbol in symbols:
+            bars = stored.get(symbol)
+            if bars is not None:
+                bars = self.price_store.trim(bars, period)
+                if not bars.empty:
+                    histories[symbol] = bars
+
+        return histories
+
+    def _history_adjusted(self, symbol, stamps, bars, stored):
+        """Check if a re-fetched complete bar no longer matches the stored one"""
+        if len(stamps) < 2 or stamps[0] not in bars.index:
+            return False
+
+        stored_close = stored.loc[stamps[0], 'Close']
+        fresh_close = bars.loc[stamps[0], 'Close']
+        if np.isclose(stored_close, fresh_close, rtol=1e-6):
+            return False
+
+        print(f"Price adjustment detected for {symbol}, re-downloading history")
+        return True
+
+    def _download_histories(self, symbols, period='1mo', start=None):
+        """Download OHLCV history for many symbols, one request per batch"""
+        histories = {}
+        window = {'start': start} if start else {'period': period}
+        batch_size = max(1, Config.BULK_DOWNLOAD_BATCH_SIZE)
+
+        for offset in range(0, len(symbols), batch_size):
+            batch = symbols[offset:offset + batch_size]
+            try:
+                data = yf.download(
+                    batch,
+                    **window,
+                    group_by='ticker',
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False
+                )
+            except Exception as e:
+                print(f"Error downloading batch starting at {batch[0]}: {e}")
+                continue
+
+            if data is None or data.empty:
+                continue
+
+            for symbol in batch:
+                try:
+                    if isinstance(data.columns, pd.MultiIndex):
+                        if symbol not in data.columns.get_level_values(0):
+                            continue
+                        hist = data[symbol]
+                    else:
+                        hist = data
+                    hist = hist.dropna(how='all')
+                    if not hist.empty:
+                        histories[symbol] = hist
+                except Exception as e:
+                    print(f"Error reading history for {symbol}: {e}")
+
+        return histories
+
+    def fetch_info(self, symbol):
+        """Fetch ticker info for one symbol, empty on failure"""
+        try:
+            return yf.Ticker(symbol).info or {}
+        except Exception as e:
+            print(f"Error fetching info for {symbol}: {e}")
+            return {}
+
+    def _fetch_infos(self, symbols):
+        """Fetch ticker info for many symbols with a bounded thread pool"""
+        if not symbols:
+            return {}
+
+        workers = max(1, min(Config.INFO_FETCH_WORKERS, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(symbols, executor.map(self.fetch_info, symbols)))
+
     def get_market_overview(self):
         """Get overall Indian market indicators"""
         try:
@@ -264,29 +541,10 @@ class StockDataCollector:
 
         try:
             # Clean data first - replace NaN with defaults
-            df = df.fillna({
-                'market_cap': 0,
-                'volume_ratio': 1.0,
-                'price_change': 0.0,
-                'rsi': 50.0,
-                'current_price': 0.0,
-                'volatility': 0.0
-            })
-
-            # Filter by market cap (keep stocks with valid market cap)
-            df = df[df['market_cap'] >= Config.MIN_MARKET_CAP]
+            df = self._fill_screening_defaults(df)
 
-            # Filter by volume (active stocks)
-            df = df[df['volume_ratio'] >= 0.5]
-
-            # Filter out extreme price movements (potential manipulation)
-            df = df[abs(df['price_change']) <= Config.MAX_PRICE_CHANGE]
-
-            # Filter by RSI (not overbought)
-            df = df[df['rsi'] <= 80]
-
-            # Filter out stocks with zero price (invalid data)
-            df = df[df['current_price'] > 0]
+            for stage in ('fundamentals', 'price'):
+                df, _ = self._apply_screens(df, stage)
 
             print(f"Screening complete: {len(df)} stocks passed filters")
             return df
@@ -294,3 +552,85 @@ class StockDataCollector:
         except Exception as e:
             print(f"Error in screening: {e}")
             return df
+
+    def screen_stocks_staged(self, symbols, period='1mo'):
+        """Screen on price data first and fetch fundamentals only for survivors
+
+        Returns the screened DataFrame and a DataFrame of rejected symbols
+        with the stage ('data', 'price' or 'fundamentals') and rule that
+        rejected them.
+        """
+        # Stage 1: cheap OHLCV-based screens across the whole universe
+        df, rejections = self.screen_prices(symbols, period)
+
+        # Stage 2: ticker.info only for the survivors
+        if not df.empty:
+            infos = self._fetch_infos(df['symbol'].tolist())
+            df = pd.DataFrame([
+                self._merge_fundamentals(row, infos.get(row['symbol'], {}))
+                for row in df.to_dict('records')
+            ])
+            df, rejected = self._apply_screens(self._fill_screening_defaults(df), 'fundamentals')
+            rejections.extend(rejected)
+
+        print(f"Screening complete: {len(df)} stocks passed filters")
+        return df, pd.DataFrame(rejections, columns=['symbol', 'stage', 'reason'])
+
+    def screen_prices(self, symbols, period='1mo'):
+        """Run the price stage of staged screening
+
+        Returns the surviving price rows as a DataFrame and a list of
+        rejection dicts for symbols without data or failing a price screen.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        rejections = []
+
+        price_data = self._price_metrics_batch(self._get_histories(symbols, period))
+        price_rows = []
+        for symbol in symbols:
+            if symbol in price_data:
+                price_rows.append(price_data[symbol])
+            else:
+                rejections.append({'symbol': symbol, 'stage': 'data', 'reason': 'no price data'})
+
+        df = pd.DataFrame(price_rows)
+        if not df.empty:
+            df, rejected = self._apply_screens(self._fill_screening_defaults(df), 'price')
+            rejections.extend(rejected)
+        print(f"Price screening: {len(df)}/{len(symbols)} stocks passed")
+        return df, rejections
+
+    def screen_fundamentals(self, price_row):
+        """Fetch ticker.info for one price-screened row and apply the fundamentals screens
+
+        Returns the merged stock row (None if it was rejected) and its rejections.
+        """
+        info = self.fetch_info(price_row['symbol'])
+        df = pd.DataFrame([self._merge_fundamentals(price_row, info)])
+        df, rejections = self._apply_screens(self._fill_screening_defaults(df), 'fundamentals')
+        row = df.iloc[0].to_dict() if not df.empty else None
+        return row, rejections
+
+    def _fill_screening_defaults(self, df):
+        """Replace NaN in screened columns with neutral defaults"""
+        defaults = {
+            'market_cap': 0,
+            'volume_ratio': 1.0,
+            'price_change': 0.0,
+            'rsi': 50.0,
+            'current_price': 0.0,
+            'volatility': 0.0
+        }
+        return df.fillna({col: value for col, value in defaults.items() if col in df.columns})
+
+    def _apply_screens(self, df, stage):
+        """Apply one stage's screening rules, returning survivors and rejections"""
+        rejections = []
+        for rule_stage, column, check in SCREENING_RULES:
+            if rule_stage != stage or df.empty:
+                continue
+            passed = check(df)
+            for symbol in df.loc[~passed, 'symbol']:
+                rejections.append({'symbol': symbol, 'stage': stage, 'reason': column})
+            df = df[passed]
+        return df, rejections
@@ -1,11 +1,34 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from itertools import product
 from config import Config
 from enhanced_indian_news_collector import EnhancedIndianNewsCollector
 from stock_data import StockDataCollector
 from sentiment_analyzer import SentimentAnalyzer
 from ai_analyzer import AIStockAnalyzer
+from pipeline import AnalysisPipeline
+from article_store import ArticleStore
+from near_duplicates import collapse_near_duplicates
+
+SCORE_COMPONENTS = ['sentiment_component', 'technical_component', 'fundamental_component', 'news_coverage_component']
+
+
+def _build_reasoning_table():
+    """All reasoning strings _get_recommendation can produce, indexed by component signals"""
+    sentiment_parts = ["positive news sentiment", "negative news sentiment", None]
+    technical_parts = ["strong technical indicators", "weak technical indicators", None]
+    fundamental_parts = ["solid fundamentals", None]
+
+    table = []
+    for parts in product(sentiment_parts, technical_parts, fundamental_parts):
+        parts = [part for part in parts if part]
+        table.append("Based on " + ", ".join(parts) if parts else "Mixed signals")
+    return np.array(table, dtype=object)
+
+
+REASONING_TABLE = _build_reasoning_table()
+
 
 class StockFilter:
     def __init__(self):
@@ -13,6 +36,8 @@ class StockFilter:
         self.stock_collector = StockDataCollector()
         self.sentiment_analyzer = SentimentAnalyzer()
         self.ai_analyzer = AIStockAnalyzer() if Config.USE_AI_ANALYSIS else None
+        self.article_store = ArticleStore() if Config.USE_ARTICLE_STORE else None
+        self.last_rejections = pd.DataFrame(columns=['symbol', 'stage', 'reason'])
 
     def analyze_stocks(self, symbols=None):
         """Main function to analyze stocks and generate recommendations"""
@@ -21,17 +46,14 @@ class StockFilter:
 
         print("Starting stock analysis...")
 
-        # Step 1: Collect stock data
-        print("1. Collecting stock data...")
-        stock_df = self.stock_collector.get_multiple_stocks(symbols)
-
-        if stock_df.empty:
-            print("No stock data collected!")
-            return pd.DataFrame()
+        if Config.USE_PIPELINE:
+            stock_df, _, recommendations = self._run_pipeline(symbols)
+            if stock_df.empty:
+                print("No stocks passed screening!")
+            return recommendations
 
-        # Step 2: Screen stocks based on basic criteria
-        print("2. Screening stocks...")
-        stock_df = self.stock_collector.screen_stocks(stock_df)
+        # Steps 1-2: Collect stock data and screen based on basic criteria
+        stock_df = self._collect_and_screen(symbols)
 
         if stock_df.empty:
             print("No stocks passed screening!")
@@ -43,8 +65,8 @@ class StockFilter:
 
         # Step 4: Analyze sentiment
         print("4. Analyzing sentiment...")
+        news_df = self._score_news(news_df, stock_df['symbol'].tolist() + ['MARKET'])
         if not news_df.empty:
-            news_df = self.sentiment_analyzer.analyze_news_batch(news_df)
             sentiment_summary = self.sentiment_analyzer.get_sentiment_summary(news_df)
         else:
             sentiment_summary = {}
@@ -55,12 +77,82 @@ class StockFilter:
 
         return recommendations
 
+    def _score_news(self, news_df, symbols):
+        """Sentiment-scored news for symbols
+
+        Copies of the same story are scored once. With the article store only
+        stories not seen before are scored, and the result is each symbol's
+        NEWS_LOOKBACK_DAYS window from the store.
+        """
+        if self.article_store is None:
+            if news_df.empty:
+                return news_df
+            if Config.USE_NEAR_DUPLICATES:
+                news_df = collapse_near_duplicates(news_df)
+            return self.sentiment_analyzer.analyze_news_batch(news_df)
+
+        pending = self.article_store.ingest(news_df)
+        if not pending.empty:
+            self.article_store.save_sentiment(self.sentiment_analyzer.analyze_news_batch(pending))
+        return self.article_store.window(symbols, Config.NEWS_LOOKBACK_DAYS)
+
+    def _run_pipeline(self, symbols, fallback_sentiment=None):
+        """Run the stage-overlapped pipeline, returning stocks, sentiment and recommendations"""
+        stock_df, sentiment_summary, recommendations, self.last_rejections = AnalysisPipeline(self).run(
+            symbols, fallback_sentiment=fallback_sentiment
+        )
+        if not self.last_rejections.empty:
+            by_stage = self.last_rejections['stage'].value_counts().to_dict()
+            print(f"Rejected by stage: {by_stage}")
+        return stock_df, sentiment_summary, recommendations
+
+    def _collect_and_screen(self, symbols):
+        """Collect stock data and screen it, fetching fundamentals lazily when staged"""
+        if Config.USE_STAGED_SCREENING:
+            print("1. Collecting price data and screening stocks...")
+            stock_df, self.last_rejections = self.stock_collector.screen_stocks_staged(symbols)
+            if not self.last_rejections.empty:
+                by_stage = self.last_rejections['stage'].value_counts().to_dict()
+                print(f"Rejected by stage: {by_stage}")
+            return stock_df
+
+        print("1. Collecting stock data...")
+        stock_df = self.stock_collector.get_multiple_stocks(symbols)
+
+        if stock_df.empty:
+            print("No stock data collected!")
+            return stock_df
+
+        print(f"Collected data for {len(stock_df)} stocks")
+
+        print("2. Screening stocks...")
+        return self.stock_collector.screen_stocks(stock_df)
+
     def _generate_recommendations(self, stock_df, sentiment_summary):
         """Generate buy/sell/hold recommendations"""
+        # Rule-based scores for every stock in one column-wise pass
+        scores = self._score_frame(stock_df, sentiment_summary)
+
+        if not (self.ai_analyzer and Config.USE_AI_ANALYSIS):
+            return self._rule_based_recommendations(stock_df, scores)
+
+        # One batched LLM pass for all stocks instead of a call per stock, or
+        # concurrent per-stock calls within the provider's rate limits
+        batch_results = {}
+        try:
+            if Config.AI_BATCH_ANALYSIS:
+                batch_results = self.ai_analyzer.analyze_stocks_with_ai(stock_df.to_dict('records'), sentiment_summary)
+            else:
+                batch_results = self.ai_analyzer.analyze_stocks_individually(stock_df.to_dict('records'), sentiment_summary)
+        except Exception as e:
+            print(f"Batch AI analysis failed, analyzing stocks individually: {e}")
+
         recommendations = []
 
-        for _, stock in stock_df.iterrows():
+        for i, (_, stock) in enumerate(stock_df.iterrows()):
             symbol = stock['symbol']
+            scored = scores.iloc[i]
+            score_components = {key: scored[key] for key in SCORE_COMPONENTS}
 
             # Get sentiment data with better fallback
             sentiment_data = sentiment_summary.get(symbol, {
@@ -78,51 +170,47 @@ class StockFilter:
             print(f"📊 {symbol} sentiment: score={sentiment_data['sentiment_score']}, articles={sentiment_data['article_count']}")
 
             # Enhanced Hybrid Analysis: AI + Sentiment Fusion
-            if self.ai_analyzer and Config.USE_AI_ANALYSIS:
-                try:
-                    # Get AI analysis with news context
+            try:
+                # Get AI analysis with news context
+                ai_result = batch_results.get(symbol)
+                if ai_result is None:
                     ai_result = self.ai_analyzer.analyze_stock_with_ai(stock.to_dict(), sentiment_data)
 
-                    # Get rule-based components for sentiment integration
-                    score_components = self._calculate_score_components(stock, sentiment_data)
-
-                    # HYBRID FUSION: Combine AI + Sentiment intelligently
-                    ai_score = ai_result.get('ai_score', 50)
-                    sentiment_component = score_components['sentiment_component']
-
-                    # Fusion Algorithm: AI gets 70%, Sentiment gets 30%
-                    composite_score = self._calculate_hybrid_score(ai_score, score_components, sentiment_data)
-
-                    # Enhanced recommendation with both AI and sentiment context
-                    recommendation = self._get_hybrid_recommendation(ai_result, score_components, composite_score)
-
-                    # Additional AI fields with sentiment integration
-                    ai_fields = {
-                        'target_price': ai_result.get('target_price', stock.get('target_price')),
-                        'risk_level': ai_result.get('risk_level', 'Medium'),
-                        'time_horizon': ai_result.get('time_horizon', 'Medium'),
-                        'catalysts': ai_result.get('catalysts', []),
-                        'risks': ai_result.get('risks', []),
-                        'technical_summary': ai_result.get('technical_summary', ''),
-                        'analysis_source': 'AI + Sentiment Fusion',
-                        'ai_base_score': ai_score,
-                        'sentiment_boost': sentiment_component,
-                        'fusion_method': 'hybrid'
-                    }
-
-                except Exception as e:
-                    print(f"AI analysis failed for {symbol}: {e}")
-                    # Fallback to rule-based analysis
-                    score_components = self._calculate_score_components(stock, sentiment_data)
-                    composite_score = self._calculate_composite_score(score_components)
-                    recommendation = self._get_recommendation(composite_score, score_components)
-                    ai_fields = {'analysis_source': 'Rule-based (AI failed)'}
-            else:
-                # Use rule-based analysis
-                score_components = self._calculate_score_components(stock, sentiment_data)
-                composite_score = self._calculate_composite_score(score_components)
-                recommendation = self._get_recommendation(composite_score, score_components)
-                ai_fields = {'analysis_source': 'Rule-based'}
+                # HYBRID FUSION: Combine AI + Sentiment intelligently
+                ai_score = ai_result.get('ai_score', 50)
+                sentiment_component = score_components['sentiment_component']
+
+                # Fusion Algorithm: AI gets 70%, Sentiment gets 30%
+                composite_score = self._calculate_hybrid_score(ai_score, score_components, sentiment_data)
+
+                # Enhanced recommendation with both AI and sentiment context
+                recommendation = self._get_hybrid_recommendation(ai_result, score_components, composite_score)
+
+                # Additional AI fields with sentiment integration
+                ai_fields = {
+                    'target_price': ai_result.get('target_price', stock.get('target_price')),
+                    'risk_level': ai_result.get('risk_level', 'Medium'),
+                    'time_horizon': ai_result.get('time_horizon', 'Medium'),
+                    'catalysts': ai_result.get('catalysts', []),
+                    'risks': ai_result.get('risks', []),
+                    'technical_summary': ai_result.get('technical_summary', ''),
+                    'analysis_source': 'AI + Sentiment Fusion',
+                    'ai_base_score': ai_score,
+                    'sentiment_boost': sentiment_component,
+                    'fusion_method': 'hybrid',
+                    'ai_from_cache': ai_result.get('from_cache', False)
+                }
+
+            except Exception as e:
+                print(f"AI analysis failed for {symbol}: {e}")
+                # Fallback to rule-based analysis
+                composite_score = scored['composite_score']
+                recommendation = {
+                    'action': scored['recommendation'],
+                    'confidence': scored['confidence'],
+                    'reasoning': scored['reasoning']
+                }
+                ai_fields = {'analysis_source': 'Rule-based (AI failed)'}
 
             # Build recommendation entry
             rec_entry = {
@@ -139,16 +227,15 @@ class StockFilter:
                 'recommendation': recommendation['action'],
                 'confidence': recommendation['confidence'],
                 'reasoning': recommendation['reasoning'],
-                'risk_level': ai_fields.get('risk_level', self._assess_risk(stock, sentiment_data)),
+                'risk_level': ai_fields.get('risk_level', scored['risk_level']),
                 'target_price': ai_fields.get('target_price', stock.get('target_price')),
                 'rsi': stock['rsi'],
                 'last_updated': datetime.now().isoformat(),
                 **ai_fields
             }
 
-            # Add score components if using rule-based analysis
-            if 'score_components' in locals():
-                rec_entry.update(score_components)
+            # Add score components
+            rec_entry.update(score_components)
 
             recommendations.append(rec_entry)
 
@@ -158,24 +245,144 @@ class StockFilter:
 
         return recommendations_df
 
+    def _rule_based_recommendations(self, stock_df, scores):
+        """Build rule-based recommendations for all stocks without a per-row loop"""
+        recommendations_df = pd.DataFrame({
+            'symbol': stock_df['symbol'].to_numpy(),
+            'current_price': stock_df['current_price'].to_numpy(),
+            'price_change': stock_df['price_change'].to_numpy(),
+            'volume_ratio': stock_df['volume_ratio'].to_numpy(),
+            'market_cap': stock_df['market_cap'].to_numpy(),
+            'sector': stock_df['sector'].to_numpy(),
+            'sentiment_score': scores['sentiment_score'].to_numpy(),
+            'sentiment': scores['sentiment'].to_numpy(),
+            'article_count': scores['article_count'].to_numpy(),
+            'composite_score': scores['composite_score'].to_numpy(),
+            'recommendation': scores['recommendation'].to_numpy(),
+            'confidence': scores['confidence'].to_numpy(),
+            'reasoning': scores['reasoning'].to_numpy(),
+            'risk_level': scores['risk_level'].to_numpy(),
+            'target_price': stock_df['target_price'].to_numpy() if 'target_price' in stock_df else None,
+            'rsi': stock_df['rsi'].to_numpy(),
+            'last_updated': datetime.now().isoformat(),
+            'analysis_source': 'Rule-based',
+            **{key: scores[key].to_numpy() for key in SCORE_COMPONENTS}
+        })
+
+        print(f"📊 Scored {len(recommendations_df)} stocks with rule-based analysis")
+
+        # Sort by composite score
+        return recommendations_df.sort_values('composite_score', ascending=False)
+
+    def _score_frame(self, stock_df, sentiment_summary):
+        """Rule-based scores for every stock as NumPy array operations
+
+        Produces the same values as _calculate_score_components,
+        _calculate_composite_score, _get_recommendation and _assess_risk
+        applied row by row, one column per output.
+        """
+        n = len(stock_df)
+        default_sentiment = {
+            'overall_sentiment': 'neutral',
+            'sentiment_score': 0.0,
+            'article_count': 0,
+            'confidence': 0.0
+        }
+        sentiments = [sentiment_summary.get(symbol, default_sentiment) for symbol in stock_df['symbol']]
+        sentiment_score = np.array(
+            [0.0 if s.get('sentiment_score') is None else s['sentiment_score'] for s in sentiments], dtype=float
+        )
+        article_count = np.array([s['article_count'] for s in sentiments])
+
+        def column(name):
+            if name not in stock_df:
+                return np.full(n, np.nan)
+            return pd.to_numeric(stock_df[name], errors='coerce').to_numpy(dtype=float)
+
+        rsi = column('rsi')
+        volume_ratio = column('volume_ratio')
+        price_change = column('price_change')
+        market_cap = column('market_cap')
+        pe_ratio = column('pe_ratio')
+        beta = column('beta')
+        volatility = column('volatility')
+
+        # Sentiment score (0-100); NaN ends up at 100 like max(0, min(100, nan))
+        sentiment_component = (sentiment_score + 1) * 50
+        sentiment_component = np.where(np.isnan(sentiment_component), 100, np.clip(sentiment_component, 0, 100))
+
+        # Technical score (0-100)
+        technical_component = (
+            50
+            + np.select([(rsi >= 30) & (rsi <= 70), rsi < 30], [20, 10], -20)
+            + np.where(volume_ratio > Config.MIN_VOLUME_RATIO, 15, 0)
+            + np.select([(price_change > 0) & (price_change < 0.03), price_change < -0.02], [15, 10], 0)
+        )
+
+        # Fundamental score (0-100)
+        fundamental_component = (
+            50
+            + np.select([market_cap > 10e9, market_cap > 2e9], [20, 10], 0)
+            + np.where((pe_ratio >= 10) & (pe_ratio <= 25), 15, 0)
+            + np.where((beta >= 0.8) & (beta <= 1.2), 10, 0)
+        )
+
+        # News coverage score
+        news_coverage_component = np.minimum(100, article_count * 10)
+
+        # Weighted composite, summed in the same order as _calculate_composite_score
+        composite = 0
+        for component, weight in ((sentiment_component, 0.4), (technical_component, 0.3),
+                                  (fundamental_component, 0.2), (news_coverage_component, 0.1)):
+            composite = composite + component * weight
+        composite_score = np.where(np.isnan(composite), 0, np.clip(composite, 0, 100))
+
+        # Action and confidence bands
+        bands = [composite_score >= 70, composite_score >= 55, composite_score >= 45, composite_score >= 30]
+        action = np.select(bands, ['BUY', 'BUY', 'HOLD', 'SELL'], 'SELL')
+        confidence = np.select(bands, ['High', 'Medium', 'Medium', 'Medium'], 'High')
+
+        # Reasoning from a lookup table over the three component signals
+        sentiment_code = np.select([sentiment_component > 60, sentiment_component < 40], [0, 1], 2)
+        technical_code = np.select([technical_component > 60, technical_component < 40], [0, 1], 2)
+        fundamental_code = np.where(fundamental_component > 60, 0, 1)
+        reasoning = REASONING_TABLE[sentiment_code * 6 + technical_code * 2 + fundamental_code]
+
+        # Risk level from the number of risk factors
+        risk_factors = (
+            (volatility > 0.4).astype(int)
+            + (beta > 1.5)
+            + (article_count < Config.MIN_NEWS_ARTICLES)
+            + (np.abs(price_change) > 0.03)
+            + (market_cap < 5e9)
+        )
+        risk_level = np.select([risk_factors >= 3, risk_factors >= 1], ['High', 'Medium'], 'Low')
+
+        return pd.DataFrame({
+            'sentiment_score': [s['sentiment_score'] if s.get('sentiment_score') is not None else 0.0 for s in sentiments],
+            'sentiment': [s['overall_sentiment'] for s in sentiments],
+            'article_count': article_count,
+            'sentiment_component': sentiment_component,
+            'technical_component': technical_component,
+            'fundamental_component': fundamental_component,
+            'news_coverage_component': news_coverage_component,
+            'composite_score': composite_score,
+            'recommendation': action,
+            'confidence': confidence,
+            'reasoning': reasoning,
+            'risk_level': risk_level
+        })
+
     def analyze_sector_stocks(self, sector_name, sector_stocks, refresh=False):
         """Analyze stocks for a specific sector only - optimized for memory"""
         print(f"Analyzing {sector_name} sector with {len(sector_stocks)} stocks...")
 
         try:
-            # Step 1: Collect stock data for this sector only
-            print("1. Collecting stock data...")
-            stock_df = self.stock_collector.get_multiple_stocks(sector_stocks)
-
-            if stock_df.empty:
-                print(f"No stock data available for {sector_name} sector")
-                return pd.DataFrame()
+            if Config.USE_PIPELINE:
+                return self._analyze_sector_pipelined(sector_name, sector_stocks)
 
-            print(f"Collected data for {len(stock_df)} stocks")
-
-            # Step 2: Screen stocks
-            print("2. Screening stocks...")
-            stock_df = self.stock_collector.screen_stocks(stock_df)
+            # Steps 1-2: Collect and screen stock data for this sector only
+            stock_df = self._collect_and_screen(sector_stocks)
 
             if stock_df.empty:
                 print(f"No stocks passed screening for {sector_name} sector")
@@ -199,8 +406,8 @@ class StockFilter:
             # Step 4: Analyze sentiment
             print("4. Analyzing sentiment...")
             try:
+                news_df = self._score_news(news_df, stock_df['symbol'].tolist() + ['MARKET'])
                 if not news_df.empty:
-                    news_df = self.sentiment_analyzer.analyze_news_batch(news_df)
                     sentiment_summary = self.sentiment_analyzer.get_sentiment_summary(news_df)
                     print(f"✅ Sentiment analysis completed for {len(sentiment_summary)} stocks")
                 else:
@@ -234,6 +441,24 @@ class StockFilter:
                 'recommendation', 'confidence', 'reasoning', 'risk_level', 'target_price', 'rsi'
             ])
 
+    def _analyze_sector_pipelined(self, sector_name, sector_stocks):
+        """Pipelined variant of analyze_sector_stocks"""
+        # Mock sentiment goes in before scoring, so no stock is scored (or sent to the AI) twice
+        stock_df, sentiment_summary, recommendations = self._run_pipeline(
+            sector_stocks, fallback_sentiment=self._fallback_mock_sentiment
+        )
+
+        if recommendations.empty:
+            print(f"No recommendations generated for {sector_name}")
+            return pd.DataFrame(columns=[
+                'symbol', 'current_price', 'price_change', 'volume_ratio', 'market_cap',
+                'sector', 'sentiment_score', 'sentiment', 'article_count', 'composite_score',
+                'recommendation', 'confidence', 'reasoning', 'risk_level', 'target_price', 'rsi'
+            ])
+
+        print(f"Analysis complete for {sector_name}. Generated {len(recommendations)} recommendations.")
+        return recommendations
+
     def _calculate_score_components(self, stock, sentiment_data):
         """Calculate individual scoring components"""
 
@@ -303,6 +528,11 @@ class StockFilter:
         composite = sum(components[key] * weights[key] for key in weights)
         return min(100, max(0, composite))
 
+    def _fallback_mock_sentiment(self, symbols):
+        """Mock sentiment for a pipelined sector run that found no news"""
+        print("⚠️  No news data available, generating mock sentiment for demonstration")
+        return self._generate_mock_sentiment(symbols)
+
     def _generate_mock_sentiment(self, symbols):
         """Generate mock sentiment data for demonstration when news collection fails"""
         import random
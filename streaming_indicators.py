@@ -0,0 +1,414 @@
+"""
+Streaming technical indicators with O(1) work per new bar.
+
+Each state object keeps only what it needs to advance by one bar (running
+EMA values, rolling sums over fixed-size windows, monotonic deques for the
+stochastic highs and lows) and can be serialized to a plain dict, so a
+symbol's indicators survive restarts and only new bars are processed.
+Values match the batch calculations in StockDataCollector run over the
+same bars.
+"""
+
+import copy
+import json
+import math
+import os
+from collections import deque
+from config import Config
+
+
+class RollingWindow:
+    """Fixed-size window with running sum and sum of squares"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.pushes = 0
+
+    def push(self, value):
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+        # Re-sum once per window length so rounding errors don't accumulate
+        self.pushes += 1
+        if self.pushes % self.size == 0:
+            self.total = sum(self.values)
+            self.total_sq = sum(v * v for v in self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def full(self):
+        return len(self.values) >= self.size
+
+    def mean(self):
+        return self.total / len(self.values) if self.values else math.nan
+
+    def std(self):
+        """Sample standard deviation (ddof=1)"""
+        n = len(self.values)
+        if n < 2:
+            return math.nan
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def to_dict(self):
+        return {'size': self.size, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data):
+        window = cls(data['size'])
+        for value in data['values']:
+            window.push(value)
+        return window
+
+
+class EMAState:
+    """Exponential moving average, matching pandas ewm(span=...).mean()"""
+
+    def __init__(self, span, adjust=False):
+        self.span = span
+        self.adjust = adjust
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.started = False
+
+    def update(self, value):
+        alpha = 2.0 / (self.span + 1.0)
+        if self.adjust:
+            self.numerator = value + (1 - alpha) * self.numerator
+            self.denominator = 1.0 + (1 - alpha) * self.denominator
+        elif not self.started:
+            self.numerator = value
+            self.denominator = 1.0
+        else:
+            self.numerator = (1 - alpha) * self.numerator + alpha * value
+        self.started = True
+        return self.value
+
+    @property
+    def value(self):
+        return self.numerator / self.denominator if self.started else math.nan
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['span'], data['adjust'])
+        state.__dict__.update(data)
+        return state
+
+
+class RSIState:
+    """RSI from simple rolling means of gains and losses"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+
+    def update(self, close):
+        # The first bar has no change and counts as a zero gain and loss
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.gains.push(max(delta, 0.0))
+        self.losses.push(max(-delta, 0.0))
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self):
+        if not self.gains.full:
+            return math.nan
+        gain = self.gains.mean()
+        loss = self.losses.mean()
+        if loss == 0:
+            return 100.0 if gain > 0 else math.nan
+        return 100 - (100 / (1 + gain / loss))
+
+    def to_dict(self):
+        return {
+            'period': self.period,
+            'prev_close': self.prev_close,
+            'gains': self.gains.to_dict(),
+            'losses': self.losses.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['period'])
+        state.prev_close = data['prev_close']
+        state.gains = RollingWindow.from_dict(data['gains'])
+        state.losses = RollingWindow.from_dict(data['losses'])
+        return state
+
+
+class MACDState:
+    """MACD line, signal and histogram from adjusted EMAs"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMAState(fast, adjust=True)
+        self.slow = EMAState(slow, adjust=True)
+        self.signal = EMAState(signal, adjust=True)
+
+    def update(self, close):
+        line = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(line)
+        return self.value
+
+    @property
+    def value(self):
+        line = self.fast.value - self.slow.value
+        signal = self.signal.value
+        return line, signal, line - signal
+
+    def to_dict(self):
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(), 'signal': self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.fast = EMAState.from_dict(data['fast'])
+        state.slow = EMAState.from_dict(data['slow'])
+        state.signal = EMAState.from_dict(data['signal'])
+        return state
+
+
+class StochasticState:
+    """Stochastic %K/%D using monotonic deques for the rolling high and low"""
+
+    def __init__(self, k_period=14, d_period=3):
+        self.k_period = k_period
+        self.d_period = d_period
+        self.count = 0
+        self.highs = deque()  # (bar number, high), highs decreasing
+        self.lows = deque()   # (bar number, low), lows increasing
+        self.k_values = deque(maxlen=d_period)
+
+    def update(self, high, low, close):
+        n = self.count
+        self.count += 1
+
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((n, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((n, low))
+
+        # Drop entries that slid out of the window
+        while self.highs[0][0] <= n - self.k_period:
+            self.highs.popleft()
+        while self.lows[0][0] <= n - self.k_period:
+            self.lows.popleft()
+
+        k_percent = math.nan
+        if self.count >= self.k_period:
+            price_range = self.highs[0][1] - self.lows[0][1]
+            if price_range != 0:
+                k_percent = 100 * ((close - self.lows[0][1]) / price_range)
+        self.k_values.append(k_percent)
+        return self.value
+
+    @property
+    def value(self):
+        k_percent = self.k_values[-1] if self.k_values else math.nan
+        if len(self.k_values) < self.d_period:
+            return k_percent, math.nan
+        return k_percent, sum(self.k_values) / self.d_period
+
+    def to_dict(self):
+        return {
+            'k_period': self.k_period,
+            'd_period': self.d_period,
+            'count': self.count,
+            'highs': [list(item) for item in self.highs],
+            'lows': [list(item) for item in self.lows],
+            'k_values': list(self.k_values)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['k_period'], data['d_period'])
+        state.count = data['count']
+        state.highs = deque(tuple(item) for item in data['highs'])
+        state.lows = deque(tuple(item) for item in data['lows'])
+        state.k_values = deque(data['k_values'], maxlen=state.d_period)
+        return state
+
+
+class SymbolIndicatorState:
+    """All streaming indicators for one symbol"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bar_count = 0
+        self.last_timestamp = None
+        self.last_close = None
+        self.close_total = 0.0
+
+        self.closes = {20: RollingWindow(20), 50: RollingWindow(50), 200: RollingWindow(200)}
+        self.volumes = RollingWindow(20)
+        self.returns = RollingWindow(20)
+        self.emas = {20: EMAState(20), 50: EMAState(50), 200: EMAState(200)}
+        self.rsi = RSIState()
+        self.macd = MACDState()
+        self.stochastic = StochasticState()
+
+    def update(self, timestamp, high, low, close, volume):
+        """Advance every indicator by one bar"""
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        if self.last_close is not None:
+            self.returns.push(close / self.last_close - 1)
+
+        self.bar_count += 1
+        self.close_total += close
+        for window in self.closes.values():
+            window.push(close)
+        self.volumes.push(volume)
+        for ema in self.emas.values():
+            ema.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.stochastic.update(high, low, close)
+
+        self.last_timestamp = timestamp
+        self.last_close = close
+
+    def peek(self, timestamp, high, low, close, volume):
+        """Metrics as if a bar were added, without committing it
+
+        Used for the latest bar, which may still change until it closes.
+        Copying is bounded by the window sizes, so this stays O(1).
+        """
+        preview = copy.deepcopy(self)
+        preview.update(timestamp, high, low, close, volume)
+        return preview.metrics()
+
+    def metrics(self):
+        """Current indicator values with the same keys and defaults as get_stock_data"""
+        n = self.bar_count
+        current_price = self.last_close if self.last_close is not None else 0.0
+        window_20 = self.closes[20]
+
+        prev_close = window_20.values[-2] if len(window_20) > 1 else current_price
+        price_change = (current_price - prev_close) / prev_close if prev_close else math.nan
+
+        avg_volume = self.volumes.mean()
+        current_volume = self.volumes.values[-1] if self.volumes.values else math.nan
+        volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
+
+        ma_20 = window_20.mean() if n >= 5 else current_price
+        ma_50 = self.closes[50].mean() if n >= 10 else ma_20
+        ma_200 = self.closes[200].mean() if n >= 50 else ma_50
+
+        def ema(period):
+            return self.emas[period].value if n >= period else self.close_total / n if n else math.nan
+
+        if n >= 26:
+            macd_line, macd_signal, macd_histogram = self.macd.value
+        else:
+            macd_line, macd_signal, macd_histogram = 0, 0, 0
+
+        if n >= 20:
+            bb_middle = window_20.mean()
+            bb_std = window_20.std()
+            bb_upper, bb_lower = bb_middle + bb_std * 2, bb_middle - bb_std * 2
+        else:
+            bb_upper = bb_middle = bb_lower = current_price
+
+        stoch_k, stoch_d = self.stochastic.value if n >= 14 else (50, 50)
+
+        def clean(value, default):
+            return default if value is None or math.isnan(value) else float(value)
+
+        return {
+            'current_price': clean(current_price, 0.0),
+            'price_change': clean(price_change, 0.0),
+            'volume_ratio': clean(volume_ratio, 1.0),
+            'volatility': clean(self.returns.std() * math.sqrt(252), 0.0),
+            'ma_20': clean(ma_20, current_price),
+            'ma_50': clean(ma_50, current_price),
+            'ma_200': clean(ma_200, current_price),
+            'ema_20': clean(ema(20), current_price),
+            'ema_50': clean(ema(50), current_price),
+            'ema_200': clean(ema(200), current_price),
+            'rsi': clean(self.rsi.value, 50.0),
+            'macd_line': clean(macd_line, 0.0),
+            'macd_signal': clean(macd_signal, 0.0),
+            'macd_histogram': clean(macd_histogram, 0.0),
+            'bb_upper': clean(bb_upper, current_price),
+            'bb_middle': clean(bb_middle, current_price),
+            'bb_lower': clean(bb_lower, current_price),
+            'stoch_k': clean(stoch_k, 50.0),
+            'stoch_d': clean(stoch_d, 50.0),
+        }
+
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'bar_count': self.bar_count,
+            'last_timestamp': self.last_timestamp,
+            'last_close': self.last_close,
+            'close_total': self.close_total,
+            'closes': {str(k): window.to_dict() for k, window in self.closes.items()},
+            'volumes': self.volumes.to_dict(),
+            'returns': self.returns.to_dict(),
+            'emas': {str(k): ema.to_dict() for k, ema in self.emas.items()},
+            'rsi': self.rsi.to_dict(),
+            'macd': self.macd.to_dict(),
+            'stochastic': self.stochastic.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['symbol'])
+        state.bar_count = data['bar_count']
+        state.last_timestamp = data['last_timestamp']
+        state.last_close = data['last_close']
+        state.close_total = data['close_total']
+        state.closes = {int(k): RollingWindow.from_dict(v) for k, v in data['closes'].items()}
+        state.volumes = RollingWindow.from_dict(data['volumes'])
+        state.returns = RollingWindow.from_dict(data['returns'])
+        state.emas = {int(k): EMAState.from_dict(v) for k, v in data['emas'].items()}
+        state.rsi = RSIState.from_dict(data['rsi'])
+        state.macd = MACDState.from_dict(data['macd'])
+        state.stochastic = StochasticState.from_dict(data['stochastic'])
+        return state
+
+
+class IndicatorStateStore:
+    """JSON files holding each symbol's streaming indicator state"""
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or Config.INDICATOR_STATE_DIR
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _path(self, symbol):
+        safe_symbol = symbol.replace(os.sep, '_').replace('^', '_')
+        return os.path.join(self.base_dir, f"{safe_symbol}.json")
+
+    def load(self, symbol):
+        try:
+            with open(self._path(symbol)) as f:
+                return SymbolIndicatorState.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading indicator state for {symbol}: {e}")
+            return None
+
+    def save(self, state):
+        tmp_path = self._path(state.symbol) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp_path, self._path(state.symbol))
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point every on-disk store at a temporary directory"""
+    for name in ('ARTICLE_STORE_PATH', 'HTTP_CACHE_PATH', 'AI_CACHE_PATH', 'SENTIMENT_CACHE_PATH'):
+        monkeypatch.setattr(Config, name, str(tmp_path / f"{name.lower()}.sqlite"))
+    for name in ('PRICE_STORE_DIR', 'INDICATOR_STATE_DIR', 'SENTIMENT_STATE_DIR'):
+        monkeypatch.setattr(Config, name, str(tmp_path / name.lower()))
+    return tmp_path
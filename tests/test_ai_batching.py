@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+import ai_analyzer
+from config import Config
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def analyzer(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'GROQ_API_KEY', '')
+    monkeypatch.setattr(ai_analyzer, 'model_registry', ModelRegistry())
+    return ai_analyzer.AIStockAnalyzer()
+
+
+def _response(**overrides):
+    entry = {'symbol': 'INFY.NS', 'recommendation': 'buy', 'ai_score': 72}
+    entry.update(overrides)
+    return json.dumps([entry])
+
+
+def test_batch_response_keeps_valid_entries(analyzer):
+    parsed = analyzer._parse_batch_response(_response(), {'INFY.NS'})
+    assert parsed['INFY.NS']['recommendation'] == 'BUY'
+
+
+@pytest.mark.parametrize('score', [True, False, 'high', None, -1, 101, float('nan')])
+def test_batch_response_rejects_invalid_scores(analyzer, score):
+    assert analyzer._parse_batch_response(_response(ai_score=score), {'INFY.NS'}) == {}
+
+
+def test_batch_response_rejects_unknown_symbols_and_recommendations(analyzer):
+    assert analyzer._parse_batch_response(_response(symbol='TCS.NS'), {'INFY.NS'}) == {}
+    assert analyzer._parse_batch_response(_response(recommendation='ACCUMULATE'), {'INFY.NS'}) == {}
+
+
+def _records(count):
+    return {f'S{i}.NS': {'symbol': f'S{i}.NS', 'price': 100.0, 'rsi': 50.0, 'sector': 'IT'} for i in range(count)}
+
+
+def test_batch_size_follows_the_first_model_in_the_chain(analyzer, monkeypatch):
+    records = _records(40)
+    monkeypatch.setattr(Config, 'AI_BATCH_MAX_STOCKS', 100)
+
+    analyzer.groq_models = ['small-model', 'large-model']
+    analyzer.groq_context_tokens = {'small-model': 2000, 'large-model': 32000}
+    small = analyzer._plan_batches(list(records), records)
+
+    analyzer.groq_models = ['large-model', 'small-model']
+    large = analyzer._plan_batches(list(records), records)
+
+    assert len(small) > len(large) == 1
+    assert [symbol for batch in small for symbol in batch] == list(records)
+
+
+def test_batch_size_skips_models_with_open_circuits(analyzer, monkeypatch):
+    records = _records(40)
+    monkeypatch.setattr(Config, 'AI_BATCH_MAX_STOCKS', 100)
+    analyzer.groq_models = ['large-model', 'small-model']
+    analyzer.groq_context_tokens = {'small-model': 2000, 'large-model': 32000}
+
+    ai_analyzer.model_registry.record_failure('large-model', 'decommissioned')
+    assert len(analyzer._plan_batches(list(records), records)) > 1
@@ -0,0 +1,156 @@
+import json
+
+import pytest
+
+import ai_analyzer
+import ai_cache
+from ai_cache import AIResultCache, fingerprint
+from config import Config
+from model_registry import ModelRegistry
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ai_cache, 'time', clock)
+    return clock
+
+
+def _stock(**overrides):
+    stock = {'symbol': 'INFY.NS', 'current_price': 1500.0, 'market_cap': 6e12, 'price_change': 0.011,
+             'rsi': 55.2, 'volume_ratio': 1.3, 'volatility': 0.21, 'stoch_k': 61.0}
+    stock.update(overrides)
+    return stock
+
+
+def _sentiment(**overrides):
+    sentiment = {'overall_sentiment': 'positive', 'article_count': 4, 'sentiment_score': 0.32}
+    sentiment.update(overrides)
+    return sentiment
+
+
+@pytest.mark.parametrize('field, value', [
+    ('rsi', 55.8),                # nearest 2 is still 56
+    ('price_change', 0.0104),     # nearest 0.25% is still 1%
+    ('volume_ratio', 1.24),
+    ('stoch_k', 59.0),
+    ('current_price', 1502.0),    # well inside the same 1% step
+])
+def test_fingerprint_ignores_changes_within_a_bucket(field, value):
+    assert fingerprint(_stock(**{field: value}), _sentiment()) == fingerprint(_stock(), _sentiment())
+
+
+@pytest.mark.parametrize('field, value', [
+    ('rsi', 58.0),
+    ('price_change', 0.02),
+    ('volume_ratio', 1.8),
+    ('stoch_k', 70.0),
+    ('current_price', 1560.0),
+    ('symbol', 'TCS.NS'),
+])
+def test_fingerprint_changes_across_buckets(field, value):
+    assert fingerprint(_stock(**{field: value}), _sentiment()) != fingerprint(_stock(), _sentiment())
+
+
+def test_fingerprint_follows_sentiment():
+    base = fingerprint(_stock(), _sentiment())
+    assert fingerprint(_stock(), _sentiment(sentiment_score=0.34)) == base
+    assert fingerprint(_stock(), _sentiment(sentiment_score=0.5)) != base
+    assert fingerprint(_stock(), _sentiment(article_count=5)) != base
+    assert fingerprint(_stock(), _sentiment(overall_sentiment='negative')) != base
+
+
+def test_entry_expires_after_ttl(data_dir, clock):
+    cache = AIResultCache(ttl_seconds=60)
+    cache.put('key', {'ai_score': 70}, 'INFY.NS')
+
+    clock.now += 59
+    assert cache.get('key') == {'ai_score': 70}
+
+    clock.now += 2
+    assert cache.get('key') is None
+    # Expired entries are dropped from disk too, not reloaded by a new process
+    assert AIResultCache(ttl_seconds=60).get('key') is None
+
+
+def test_entries_survive_a_restart(data_dir, clock):
+    AIResultCache().put('key', {'ai_score': 70}, 'INFY.NS')
+    assert AIResultCache().get('key') == {'ai_score': 70}
+
+
+def test_lru_evicts_least_recently_used_at_capacity(tmp_path, clock):
+    # An unwritable path leaves the in-memory LRU as the only tier
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    cache = AIResultCache(path=str(blocker / 'ai_cache.sqlite'), max_entries=2)
+    assert cache._db is None
+
+    cache.put('a', {'ai_score': 1})
+    cache.put('b', {'ai_score': 2})
+    assert cache.get('a') == {'ai_score': 1}  # 'b' is now the least recently used
+    cache.put('c', {'ai_score': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'ai_score': 1}
+    assert cache.get('c') == {'ai_score': 3}
+
+
+def test_lru_eviction_falls_back_to_sqlite(data_dir, clock):
+    cache = AIResultCache(max_entries=2)
+    for key in 'abc':
+        cache.put(key, {'ai_score': ord(key)})
+
+    assert list(cache._memory) == ['b', 'c']
+    assert cache.get('a') == {'ai_score': ord('a')}
+    assert list(cache._memory) == ['c', 'a']
+
+
+def test_returned_results_are_copies(data_dir, clock):
+    cache = AIResultCache()
+    cache.put('key', {'ai_score': 70})
+    cache.get('key')['ai_score'] = 0
+    assert cache.get('key') == {'ai_score': 70}
+
+
+@pytest.fixture
+def analyzer(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'GROQ_API_KEY', '')
+    monkeypatch.setattr(ai_analyzer, 'model_registry', ModelRegistry())
+    analyzer = ai_analyzer.AIStockAnalyzer()
+    analyzer.available_models = ['groq']
+    analyzer.calls = 0
+
+    def answer(prompt, model):
+        analyzer.calls += 1
+        return json.dumps({'recommendation': 'BUY', 'ai_score': 72})
+
+    analyzer._analyze_with_model = answer
+    return analyzer
+
+
+def test_cached_results_are_marked_from_cache(analyzer):
+    first = analyzer.analyze_stock_with_ai(_stock(), _sentiment())
+    assert first['from_cache'] is False
+
+    again = analyzer.analyze_stock_with_ai(_stock(rsi=55.8), _sentiment())
+    assert again['from_cache'] is True
+    assert again['recommendation'] == 'BUY'
+    assert analyzer.calls == 1
+
+    moved = analyzer.analyze_stock_with_ai(_stock(rsi=70.0), _sentiment())
+    assert moved['from_cache'] is False
+    assert analyzer.calls == 2
+
+
+def test_fallback_analyses_are_not_cached(analyzer):
+    analyzer._analyze_with_model = lambda prompt, model: None
+    assert analyzer.analyze_stock_with_ai(_stock(), _sentiment())['analysis_source'] == 'Rule-based'
+    assert analyzer.result_cache.get(fingerprint(_stock(), _sentiment())) is None
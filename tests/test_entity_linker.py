@@ -0,0 +1,118 @@
+import pytest
+
+from config import Config
+from entity_linker import AhoCorasick, EntityLinker
+
+
+@pytest.fixture(scope='module')
+def linker():
+    return EntityLinker(Config.COMPANY_NAMES)
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick()
+    for pattern in ('he', 'she', 'his', 'hers'):
+        automaton.add(pattern, pattern)
+    found = sorted((start, end, payload) for start, end, payload in automaton.find('ushers'))
+    assert found == [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')]
+
+
+def test_links_names_tickers_and_aliases_in_order(linker):
+    text = "Infosys and TCS lead gains while L&T and Dr Reddy's slip; HDFC Bank flat"
+    assert linker.link(text) == ['INFY.NS', 'TCS.NS', 'LT.NS', 'DRREDDY.NS', 'HDFCBANK.NS']
+
+
+def test_longest_match_wins(linker):
+    assert linker.link('State Bank of India raises deposit rates') == ['SBIN.NS']
+
+
+def test_tickers_need_capitals_and_word_boundaries(linker):
+    assert linker.link('Investors switch to itc-free portfolios') == []
+    assert linker.link('ITC hits record high') == ['ITC.NS']
+    assert linker.link('NTPC Limited to raise funds') == ['NTPC.NS']
+    assert linker.link('the rec room') == []
+
+
+@pytest.mark.parametrize('headline, symbol', [
+    ('Polycab India shares rise on strong demand', 'POLYCAB.NS'),
+    ('Tata Steel output climbs in September', 'TATASTEEL.NS'),
+    ('Coal India dispatches grow 6%', 'COALINDIA.NS'),
+])
+def test_names_from_the_full_universe_map(linker, headline, symbol):
+    assert linker.mentions({'title': headline}, symbol)
+
+
+def test_link_article_reads_title_description_and_content(linker):
+    article = {'title': 'Markets close higher', 'description': None, 'content': 'Wipro gained 2%'}
+    assert linker.link_article(article) == ['WIPRO.NS']
+
+
+def test_each_company_name_maps_to_one_symbol():
+    symbols_by_name = {}
+    for symbol, name in Config.COMPANY_NAMES.items():
+        symbols_by_name.setdefault(name.lower(), []).append(symbol)
+    assert {name: symbols for name, symbols in symbols_by_name.items() if len(symbols) > 1} == {}
+
+
+@pytest.mark.parametrize('headline, symbol', [
+    ('Hindustan Petroleum raises diesel prices', 'HINDPETRO.NS'),
+    ('HPCL refinery shutdown extended', 'HINDPETRO.NS'),
+    ('NALCO posts higher alumina output', 'NATIONALUM.NS'),
+    ('JSPL commissions new blast furnace', 'JINDALSTEL.NS'),
+])
+def test_renamed_tickers_link_to_the_listed_symbol(linker, headline, symbol):
+    assert linker.link(headline) == [symbol]
+
+
+def test_has_name_only_for_named_symbols():
+    linker = EntityLinker({'INFY.NS': 'Infosys'}, symbols=['INFY.NS', 'POLYCAB.NS'], aliases={})
+    assert linker.has_name('INFY.NS')
+    assert not linker.has_name('POLYCAB.NS')
+
+
+class _FakeNewsApi:
+    def __init__(self, titles):
+        self.titles = titles
+
+    def get_everything(self, **kwargs):
+        return {'status': 'ok', 'articles': [
+            {'title': title, 'description': None, 'content': None, 'url': f'https://example.com/{i}',
+             'publishedAt': '2026-10-01T10:00:00Z', 'source': {'name': 'Example'}}
+            for i, title in enumerate(self.titles)
+        ]}
+
+
+@pytest.fixture
+def collector(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'USE_HTTP_CACHE', False)
+    from enhanced_indian_news_collector import EnhancedIndianNewsCollector
+    return EnhancedIndianNewsCollector()
+
+
+def test_newsapi_filter_drops_articles_not_naming_the_company(collector):
+    collector.news_api = _FakeNewsApi(['Infosys wins large deal', 'Sensex ends flat'])
+    articles = collector._get_newsapi_indian('INFY.NS', 7)
+    assert {article['title'] for article in articles} == {'Infosys wins large deal'}
+
+
+def test_newsapi_keeps_name_only_headline_of_symbol_without_name_pattern(collector):
+    # No name is known for this symbol, so only its ticker could be checked
+    collector.entity_linker = EntityLinker({}, symbols=['POLYCAB.NS'], aliases={})
+    collector.news_api = _FakeNewsApi(['Polycab India shares rise'])
+    articles = collector._get_newsapi_indian('POLYCAB.NS', 7)
+    assert [article['title'] for article in articles] == ['Polycab India shares rise'] * 2
+
+
+def test_collector_reads_company_names_from_config(collector):
+    assert collector.indian_company_names is Config.COMPANY_NAMES
+    collector.news_api = _FakeNewsApi(['Polycab India shares rise'])
+    assert len(collector._get_newsapi_indian('POLYCAB.NS', 7)) == 2
+
+
+def test_market_news_is_copied_to_each_linked_symbol(collector):
+    market = [{'title': 'Asian markets mixed; Tata Steel and Polycab India gain', 'description': None,
+               'content': None, 'url': 'https://example.com/m', 'symbol': 'MARKET', 'method': 'NewsAPI Market'}]
+    linked = collector.link_market_news(market)
+    assert [(article['symbol'], article['method']) for article in linked] == [
+        ('TATASTEEL.NS', 'NewsAPI Market (linked)'), ('POLYCAB.NS', 'NewsAPI Market (linked)')
+    ]
@@ -0,0 +1,100 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+import groq_client
+from config import Config
+from model_registry import ModelRegistry
+
+MESSAGES = [{'role': 'system', 'content': 'You are an analyst.'}, {'role': 'user', 'content': 'Analyze INFY.NS'}]
+REPLY = 'x' * 150
+
+
+class FakeGroq:
+    """Local chat-completions endpoint answering from a script of (status, json body)"""
+
+    def __init__(self):
+        self.script = []
+        self.requests = 0
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.url = f'http://127.0.0.1:{self.port}/chat'
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        threading.Thread(target=self._serve, args=(started,), daemon=True).start()
+        started.wait(5)
+
+    def _serve(self, started):
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_post('/chat', self._handle)
+        runner = web.AppRunner(app)
+        self._loop.run_until_complete(runner.setup())
+        self._loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', self.port).start())
+        started.set()
+        self._loop.run_forever()
+
+    async def _handle(self, request):
+        await request.json()
+        self.requests += 1
+        status, body = self.script.pop(0)
+        return web.json_response(body, status=status, headers={'Retry-After': '0'} if status == 429 else None)
+
+
+@pytest.fixture(scope='module')
+def server():
+    return FakeGroq()
+
+
+@pytest.fixture
+def client(server, monkeypatch):
+    monkeypatch.setattr(Config, 'GROQ_MAX_RETRIES', 1)
+    monkeypatch.setattr(Config, 'GROQ_BACKOFF_BASE', 0.01)
+    monkeypatch.setattr(groq_client, 'model_registry', ModelRegistry())
+    server.requests = 0
+    client = groq_client.GroqClient('key', ['model-a'], url=server.url, requests_per_minute=600,
+                                    tokens_per_minute=6000, max_in_flight=2)
+    client.token_bucket.rate = 1e-9  # No refill, so the bucket shows exactly what was kept
+    yield client
+    client.close()
+
+
+def _success(total_tokens):
+    return 200, {'choices': [{'message': {'content': REPLY}}], 'usage': {'total_tokens': total_tokens}}
+
+
+def test_success_keeps_only_the_tokens_used(server, client):
+    server.script = [_success(120)]
+    assert client.complete_sync(MESSAGES, max_tokens=1000) == REPLY
+    assert client.token_bucket._tokens == pytest.approx(6000 - 120)
+
+
+@pytest.mark.parametrize('failure', [
+    (400, {'error': {'message': 'bad request'}}),
+    (200, {'unexpected': True}),
+])
+def test_failed_request_returns_its_reservation(server, client, failure):
+    server.script = [failure]
+    assert client.complete_sync(MESSAGES, max_tokens=1000) is None
+    assert server.requests == 1
+    assert client.token_bucket._tokens == pytest.approx(6000)
+
+
+def test_retried_attempts_return_their_reservations(server, client):
+    server.script = [(503, {}), _success(200)]
+    assert client.complete_sync(MESSAGES, max_tokens=1000) == REPLY
+    assert server.requests == 2
+    assert client.token_bucket._tokens == pytest.approx(6000 - 200)
+
+
+def test_exhausted_retries_return_every_reservation(server, client):
+    server.script = [(429, {}), (429, {})]
+    assert client.complete_sync(MESSAGES, max_tokens=1000) is None
+    assert server.requests == 2
+    assert client.token_bucket._tokens == pytest.approx(6000)
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+pytest.importorskip('lxml')
+
+from benchmarks.html_extract_benchmark import FIXTURES, PAGES, SOUP
+from html_extract import build_articles, extract_links, get_extractor
+
+
+@pytest.mark.parametrize('site', sorted(PAGES))
+def test_extractor_matches_beautifulsoup_on_saved_pages(site):
+    with open(os.path.join(FIXTURES, PAGES[site]), 'rb') as f:
+        content = f.read()
+    expected = SOUP[site](content)
+    assert expected
+    assert get_extractor(site).extract(content) == expected
+
+
+def _page(head, title, prefix=b''):
+    return (prefix + b'<html><head>' + head + b'</head><body>'
+            + b''.join(b'<div class="news_item"><a href="/news/%d">' % i + title + b'</a></div>' for i in range(7))
+            + b'</body></html>')
+
+
+@pytest.mark.parametrize('head, title', [
+    (b'<meta charset="iso-8859-1">', 'Café stocks'.encode('latin-1')),
+    (b'<meta http-equiv="Content-Type" content="text/html; charset=windows-1252">',
+     'Café ‘stocks’'.encode('cp1252')),
+    (b'<meta charset="utf-8">', 'Café stocks'.encode('utf-8')),
+    (b'', 'Café stocks'.encode('utf-8')),
+])
+def test_declared_charset_is_honoured(head, title):
+    content = _page(head, title)
+    links = get_extractor('moneycontrol').extract(content)
+    assert links == SOUP['moneycontrol'](content)
+    assert len(links) == 5
+    assert 'Café' in links[0][0]
+    assert links[0][1] == 'https://www.moneycontrol.com/news/0'
+
+
+def test_utf16_page_with_bom_is_not_forced_to_utf8():
+    content = _page(b'', 'Café stocks'.encode('utf-8')).decode('utf-8').encode('utf-16')
+    assert get_extractor('moneycontrol').extract(content)[0][0] == 'Café stocks'
+
+
+def test_build_articles_from_links():
+    links = extract_links('economictimes', b'<div class="eachStory"><h3><a href="/a">Title</a></h3></div>')
+    articles = build_articles('economictimes', links, 'TCS')
+    assert [(a['title'], a['url'], a['symbol'], a['source']) for a in articles] == [
+        ('Title', 'https://economictimes.indiatimes.com/a', 'TCS', 'Economic Times')
+    ]
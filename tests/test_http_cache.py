@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+import enhanced_indian_news_collector
+from config import Config
+from http_cache import HTTPCache, freshness_seconds
+
+URL = 'https://www.moneycontrol.com/news/tags/tcs.html'
+PAGE = b'<div class="news_item"><a href="/news/1">TCS wins deal</a></div>'
+
+
+class Response:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """Serves queued responses and records the request headers"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(data_dir):
+    return HTTPCache(min_ttl_seconds=0)
+
+
+def _parse_counter():
+    calls = []
+
+    def parse(body):
+        calls.append(body)
+        return [['title', body.decode()]]
+
+    return parse, calls
+
+
+def test_freshness_honours_max_age_floor_and_no_store():
+    assert freshness_seconds({'Cache-Control': 'public, max-age=3600'}, floor=600) == 3600
+    assert freshness_seconds({'Cache-Control': 'no-cache'}, floor=600) == 600
+    assert freshness_seconds({'Cache-Control': 's-maxage="60"'}, floor=0) == 60
+    assert freshness_seconds({'Cache-Control': 'no-store, max-age=3600'}, floor=600) is None
+
+
+def test_fresh_entry_is_served_without_a_request(cache):
+    cache._session = FakeSession(Response(200, PAGE, {'Cache-Control': 'max-age=3600'}))
+    parse, calls = _parse_counter()
+    first = cache.fetch_parsed(URL, parse)
+    assert cache.fetch_parsed(URL, parse) == first
+    assert len(cache._session.requests) == 1
+    assert len(calls) == 1
+    assert cache.stats['fresh'] == 1
+
+
+def test_not_modified_reuses_the_stored_parse(cache):
+    cache._session = FakeSession(Response(200, PAGE, {'ETag': '"v1"', 'Last-Modified': 'Wed, 14 Oct 2026 10:00:00 GMT'}),
+                                 Response(304, headers={'ETag': '"v1"'}))
+    parse, calls = _parse_counter()
+    first = cache.fetch_parsed(URL, parse)
+    assert cache.fetch_parsed(URL, parse) == first
+
+    revalidation = cache._session.requests[1]
+    assert revalidation['If-None-Match'] == '"v1"'
+    assert revalidation['If-Modified-Since'] == 'Wed, 14 Oct 2026 10:00:00 GMT'
+    assert len(calls) == 1
+    assert cache.stats['not_modified'] == 1
+
+
+def test_unchanged_body_is_not_parsed_again(cache):
+    cache._session = FakeSession(Response(200, PAGE), Response(200, PAGE), Response(200, PAGE + b' '))
+    parse, calls = _parse_counter()
+    cache.fetch_parsed(URL, parse)
+    cache.fetch_parsed(URL, parse)
+    assert len(calls) == 1
+    assert cache.stats['unchanged'] == 1
+
+    cache.fetch_parsed(URL, parse)
+    assert len(calls) == 2
+
+
+def test_no_store_response_is_not_kept(cache):
+    cache._session = FakeSession(Response(200, PAGE, {'Cache-Control': 'no-store'}), Response(200, PAGE))
+    parse, calls = _parse_counter()
+    cache.fetch_parsed(URL, parse)
+    cache.fetch_parsed(URL, parse)
+    assert 'If-None-Match' not in cache._session.requests[1]
+    assert len(calls) == 2
+
+
+def test_error_response_returns_none(cache):
+    cache._session = FakeSession(Response(503))
+    parse, calls = _parse_counter()
+    assert cache.fetch_parsed(URL, parse) is None
+    assert calls == []
+
+
+def test_cached_scrape_gets_a_fresh_published_at(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'USE_HTTP_CACHE', True)
+    collector = enhanced_indian_news_collector.EnhancedIndianNewsCollector()
+    collector.rate_limiter.wait = lambda source: None
+    collector.http_cache._session = FakeSession(Response(200, PAGE, {'Cache-Control': 'max-age=3600'}))
+
+    first = collector._scrape_moneycontrol('TCS.NS')
+    time.sleep(0.01)
+    second = collector._scrape_moneycontrol('TCS.NS')
+
+    assert [(a['title'], a['url']) for a in second] == [('TCS wins deal', 'https://www.moneycontrol.com/news/1')]
+    assert second[0]['symbol'] == 'TCS.NS'
+    assert second[0]['published_at'] > first[0]['published_at']
+    assert collector.http_cache.stats['fresh'] == 1
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+import stock_data
+
+LENGTHS = {'ONE': 1, 'FOUR': 4, 'TEN': 10, 'SIXTEEN': 16, 'THIRTY': 30, 'SIXTY': 60, 'YEAR': 260}
+
+
+def _history(seed, length):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2025-09-01', periods=300, freq='B')
+    # Drop a few random trading days so symbols do not share one calendar
+    index = index[np.sort(rng.choice(len(index), length, replace=False))] if length < 300 else index
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+    spread = rng.uniform(0.5, 2.0, length)
+    return pd.DataFrame({
+        'Open': close, 'High': close + spread, 'Low': close - spread, 'Close': close,
+        'Volume': rng.uniform(1e5, 1e6, length)
+    }, index=index)
+
+
+@pytest.fixture
+def histories():
+    return {symbol: _history(seed, length) for seed, (symbol, length) in enumerate(LENGTHS.items())}
+
+
+def test_panel_metrics_match_per_symbol_metrics(histories):
+    collector = object.__new__(stock_data.StockDataCollector)
+    panel = indicators.compute_price_metrics(indicators.build_panels(histories))
+    assert sorted(panel.index) == sorted(histories)
+
+    for symbol, hist in histories.items():
+        expected = collector._price_metrics(symbol, hist)
+        actual = panel.loc[symbol].to_dict()
+        for name, value in actual.items():
+            assert value == pytest.approx(expected[name], rel=1e-9, abs=1e-9), (symbol, name)
+
+
+def test_build_panels_aligns_symbols_on_the_union_of_dates(histories):
+    panels = indicators.build_panels(histories)
+    close = panels['Close']
+    assert close.index.is_monotonic_increasing
+    for symbol, hist in histories.items():
+        pd.testing.assert_series_equal(close[symbol].dropna(), hist['Close'], check_names=False, check_freq=False)
+
+
+def test_empty_panel():
+    assert indicators.compute_price_metrics(indicators.build_panels({})).empty
@@ -0,0 +1,65 @@
+from model_registry import CLOSED, HALF_OPEN, OPEN, ModelRegistry, classify_http_error
+
+
+def _registry():
+    return ModelRegistry(failure_threshold=3, cooldown_seconds=60, permanent_cooldown_seconds=3600)
+
+
+def test_classify_http_error():
+    assert classify_http_error(429) == 'rate_limited'
+    assert classify_http_error(503) == 'server_error'
+    assert classify_http_error(400, '{"error": {"code": "model_decommissioned"}}') == 'decommissioned'
+    assert classify_http_error(404) == 'not_found'
+    assert classify_http_error(400, 'bad request') == 'client_error'
+
+
+def test_consecutive_failures_open_the_circuit():
+    registry = _registry()
+    for _ in range(3):
+        registry.record_failure('m', 'server_error')
+    assert registry._health('m').state == OPEN
+    assert not registry.allow('m')
+    assert registry.order(['m', 'other']) == ['other']
+
+
+def test_rate_limiting_never_opens_the_circuit():
+    registry = _registry()
+    for _ in range(10):
+        registry.record_failure('m', 'rate_limited', 'HTTP 429')
+    health = registry._health('m')
+    assert health.state == CLOSED
+    assert health.consecutive_failures == 0 and health.failures == 0
+    assert health.errors == {'rate_limited': 10}
+    assert registry.allow('m')
+
+
+def test_rate_limiting_does_not_break_a_failure_streak_either():
+    registry = _registry()
+    registry.record_failure('m', 'server_error')
+    registry.record_failure('m', 'rate_limited')
+    registry.record_failure('m', 'server_error')
+    assert registry._health('m').consecutive_failures == 2
+
+
+def test_throttled_probe_frees_the_probe_slot():
+    registry = _registry()
+    for _ in range(3):
+        registry.record_failure('m', 'timeout')
+    health = registry._health('m')
+    health.opened_at -= 61
+    assert registry.allow('m') and health.state == HALF_OPEN
+    assert not registry.allow('m')
+
+    registry.record_failure('m', 'rate_limited')
+    assert health.state == HALF_OPEN
+    assert registry.allow('m')
+
+
+def test_permanent_errors_open_at_once_and_success_closes():
+    registry = _registry()
+    registry.record_failure('m', 'decommissioned')
+    assert registry._health('m').state == OPEN
+    registry._health('m').opened_at -= 3601
+    assert registry.allow('m')
+    registry.record_success('m', 0.5)
+    assert registry._health('m').state == CLOSED
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from article_store import ArticleStore
+from near_duplicates import MinHasher, assign_clusters, cluster_weight, collapse_near_duplicates
+
+STORY = 'Infosys wins a large multi-year digital transformation deal from a European bank worth 1.5 billion dollars'
+COPIES = [
+    STORY,
+    'Infosys wins large multi-year digital transformation deal from European bank worth $1.5 billion dollars',
+    'Infosys wins a large multi-year digital transformation deal from a European bank, worth 1.5 billion dollars - report',
+]
+OTHER = 'HDFC Bank quarterly profit rises as loan growth stays strong and asset quality improves'
+
+
+def _article(symbol, title, url):
+    return {'symbol': symbol, 'title': title, 'description': '', 'url': url,
+            'published_at': '2026-10-15T09:00:00Z', 'source': 'test'}
+
+
+def test_signature_similarity_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    a = ' '.join(f'w{i}' for i in range(100))
+    b = ' '.join(f'w{i}' for i in range(20, 120))  # Jaccard 80 / 120
+    similarity = np.mean(hasher.signature(a) == hasher.signature(b))
+    assert abs(similarity - 80 / 120) < 0.1
+    assert hasher.signature('!!!') is None
+
+
+def test_copies_join_the_first_story():
+    assert assign_clusters(COPIES + [OTHER, '']) == [0, 0, 0, 3, 4]
+
+
+def test_collapse_keeps_one_row_per_story_and_symbol():
+    news = pd.DataFrame(
+        [_article('INFY', title, f'https://news.example/{i}') for i, title in enumerate(COPIES)]
+        + [_article('INFY', OTHER, 'https://news.example/other'),
+           _article('TCS', COPIES[2], 'https://news.example/tcs')]
+    )
+    collapsed = collapse_near_duplicates(news)
+
+    by_symbol = {symbol: rows for symbol, rows in collapsed.groupby('symbol')}
+    assert sorted(by_symbol['INFY']['cluster_size']) == [1, 3]
+    assert list(by_symbol['TCS']['cluster_size']) == [1]
+    # Every copy carries the representative's text, so it is scored once
+    assert by_symbol['TCS']['title'].iloc[0] == STORY
+    assert by_symbol['TCS']['url'].iloc[0] == 'https://news.example/tcs'
+
+
+def test_cluster_weight_grows_with_reach():
+    assert cluster_weight(np.array([1.0]))[0] == 1.0
+    weights = cluster_weight(np.array([1.0, 2.0, 10.0]))
+    assert np.all(np.diff(weights) > 0)
+
+
+def test_store_does_not_score_copies_of_known_stories(data_dir):
+    store = ArticleStore()
+    first = store.ingest(pd.DataFrame([_article('INFY', COPIES[0], 'https://a.example/1')]))
+    assert len(first) == 1
+    store.save_sentiment(first.assign(sentiment='positive', sentiment_score=0.6, confidence=0.9))
+
+    later = store.ingest(pd.DataFrame([_article('INFY', COPIES[1], 'https://b.example/2'),
+                                       _article('INFY', OTHER, 'https://b.example/3')]))
+    assert list(later['title']) == [OTHER]
+
+    window = store.window(['INFY'], days_back=3650)
+    assert list(window['title']) == [STORY]
+    assert list(window['cluster_size']) == [2]
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_data
+import stock_filter
+from config import Config
+from sentiment_analyzer import SentimentAnalyzer
+
+SYMBOLS = [f'S{i}' for i in range(24)]
+
+
+class FakeStockCollector(stock_data.StockDataCollector):
+    """Deterministic prices and fundamentals, no network"""
+
+    indicator_states = None
+
+    def __init__(self):
+        pass
+
+    def _get_histories(self, symbols, period):
+        histories = {}
+        for symbol in symbols:
+            rng = np.random.default_rng(int(symbol[1:]))
+            index = pd.date_range('2026-09-01', periods=25, freq='B')
+            close = 100 + np.cumsum(rng.normal(0, 1, 25))
+            histories[symbol] = pd.DataFrame({
+                'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                'Volume': rng.uniform(1e5, 2e5, 25)
+            }, index=index)
+        return histories
+
+    def fetch_info(self, symbol):
+        return {'marketCap': 5e12, 'trailingPE': 15, 'beta': 1.0, 'sector': 'IT'}
+
+
+class FakeNewsCollector:
+    news_api = None
+
+    def get_stock_news_enhanced(self, symbol, days_back):
+        if int(symbol[1:]) % 3 == 0:
+            return []
+        tone = 'surges on record profit' if int(symbol[1:]) % 2 else 'slumps after weak results'
+        return [{'title': f'{symbol} {tone}', 'description': f'{symbol} {tone}', 'symbol': symbol,
+                 'published_at': '2026-10-01T10:00:00Z', 'url': f'https://example.com/{symbol}'}]
+
+    def collect_all_news_enhanced(self, symbols):
+        return pd.DataFrame([article for symbol in symbols for article in self.get_stock_news_enhanced(symbol, 7)])
+
+
+@pytest.fixture
+def analysis(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'USE_AI_ANALYSIS', False)
+    monkeypatch.setattr(Config, 'USE_DECAYED_SENTIMENT', False)  # Both runs must start from the same state
+    f = object.__new__(stock_filter.StockFilter)
+    f.stock_collector = FakeStockCollector()
+    f.news_collector = FakeNewsCollector()
+    f.sentiment_analyzer = SentimentAnalyzer(use_server=False)
+    f.ai_analyzer = None
+    f.article_store = None
+    f.last_rejections = None
+
+    calls = []
+    score = f.sentiment_analyzer.analyze_news_batch
+
+    def counting(news_df):
+        calls.append(sorted(news_df['symbol'].unique()))
+        return score(news_df)
+
+    monkeypatch.setattr(f.sentiment_analyzer, 'analyze_news_batch', counting)
+    return f, calls
+
+
+def _run(f, monkeypatch, pipeline):
+    monkeypatch.setattr(Config, 'USE_PIPELINE', pipeline)
+    result = f.analyze_stocks(SYMBOLS).drop(columns='last_updated')
+    return result.sort_values('symbol').reset_index(drop=True)
+
+
+def test_pipeline_matches_sequential_analysis(analysis, monkeypatch):
+    f, _ = analysis
+    sequential = _run(f, monkeypatch, False)
+    pipelined = _run(f, monkeypatch, True)
+    assert not pipelined.empty
+    pd.testing.assert_frame_equal(sequential, pipelined)
+
+
+def test_pipeline_scores_sentiment_in_micro_batches(analysis, monkeypatch):
+    f, calls = analysis
+    monkeypatch.setattr(Config, 'PIPELINE_SENTIMENT_BATCH', 8)
+    monkeypatch.setattr(Config, 'PIPELINE_SENTIMENT_MAX_WAIT', 30.0)
+    _run(f, monkeypatch, True)
+
+    with_news = [symbol for symbol in SYMBOLS if int(symbol[1:]) % 3]
+    assert sorted(symbol for batch in calls for symbol in batch) == sorted(with_news)
+    assert len(calls) <= 3
+    assert max(len(batch) for batch in calls) > 1
+
+
+def test_pipeline_flushes_a_partial_batch_after_max_wait(analysis, monkeypatch):
+    f, calls = analysis
+    monkeypatch.setattr(Config, 'PIPELINE_SENTIMENT_BATCH', 1000)
+    monkeypatch.setattr(Config, 'PIPELINE_SENTIMENT_MAX_WAIT', 0.05)
+    assert not _run(f, monkeypatch, True).empty
+    assert sorted(symbol for batch in calls for symbol in batch) == sorted(
+        symbol for symbol in SYMBOLS if int(symbol[1:]) % 3
+    )
+
+
+def test_snapshot_never_uses_mock_sentiment(analysis, monkeypatch):
+    from universe_snapshot import SnapshotManager
+
+    f, _ = analysis
+    monkeypatch.setattr(Config, 'USE_PIPELINE', True)
+    monkeypatch.setattr(Config, 'STOCK_SYMBOLS', SYMBOLS)
+    monkeypatch.setattr(f.news_collector, 'get_stock_news_enhanced', lambda symbol, days_back: [])
+    monkeypatch.setattr(f, '_generate_mock_sentiment', lambda symbols: pytest.fail('mock sentiment used'))
+    snapshot = SnapshotManager(f).build()
+    assert not snapshot.empty
+    assert (snapshot.recommendations['article_count'] == 0).all()
+    assert (snapshot.recommendations['sentiment'] == 'neutral').all()
+
+
+class CountingAI:
+    """AI analyzer stub that records every stock it is asked about"""
+
+    groq_client = None
+
+    def __init__(self):
+        self.seen = []
+
+    def analyze_stocks_with_ai(self, stocks, sentiments=None):
+        self.seen.extend(stock['symbol'] for stock in stocks)
+        return {stock['symbol']: {'ai_score': 60, 'recommendation': 'BUY', 'confidence': 'Medium',
+                                  'reasoning': 'stub'} for stock in stocks}
+
+    def analyze_stock_with_ai(self, stock, sentiment):
+        return self.analyze_stocks_with_ai([stock])[stock['symbol']]
+
+
+def test_sector_without_news_is_scored_once_with_mock_sentiment(analysis, monkeypatch):
+    f, _ = analysis
+    f.ai_analyzer = CountingAI()
+    monkeypatch.setattr(Config, 'USE_PIPELINE', True)
+    monkeypatch.setattr(Config, 'USE_AI_ANALYSIS', True)
+    monkeypatch.setattr(Config, 'AI_BATCH_ANALYSIS', True)
+    monkeypatch.setattr(Config, 'PIPELINE_SENTIMENT_BATCH', 4)
+    monkeypatch.setattr(f.news_collector, 'get_stock_news_enhanced', lambda symbol, days_back: [])
+
+    recommendations = f.analyze_sector_stocks('Test', SYMBOLS)
+
+    assert not recommendations.empty
+    assert sorted(f.ai_analyzer.seen) == sorted(recommendations['symbol'])
+    assert (recommendations['article_count'] > 0).all()
+
+
+def test_symbols_without_news_keep_neutral_sentiment_when_others_have_news(analysis, monkeypatch):
+    f, _ = analysis
+    f.ai_analyzer = CountingAI()
+    monkeypatch.setattr(Config, 'USE_PIPELINE', True)
+    monkeypatch.setattr(Config, 'USE_AI_ANALYSIS', True)
+    monkeypatch.setattr(Config, 'AI_BATCH_ANALYSIS', True)
+
+    recommendations = f.analyze_sector_stocks('Test', SYMBOLS).set_index('symbol')
+
+    assert sorted(f.ai_analyzer.seen) == sorted(recommendations.index)
+    without_news = [symbol for symbol in recommendations.index if int(symbol[1:]) % 3 == 0]
+    assert without_news
+    assert (recommendations.loc[without_news, 'article_count'] == 0).all()
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_data
+from config import Config
+
+BARS = pd.DataFrame(
+    {'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': np.arange(40.0) + 1, 'Volume': 1.0},
+    index=pd.date_range('2026-01-01', periods=40, freq='B')
+)
+
+
+def test_refresh_reads_each_partition_once(data_dir, monkeypatch):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(Config, 'USE_STREAMING_INDICATORS', False)
+    collector = stock_data.StockDataCollector()
+
+    def download(symbols, period='1mo', start=None):
+        return {symbol: BARS if start is None else BARS[BARS.index >= start] for symbol in symbols}
+
+    monkeypatch.setattr(collector, '_download_histories', download)
+    collector.price_store.write('OLD', BARS.iloc[:30])
+
+    reads = []
+    read_parquet = pd.read_parquet
+    monkeypatch.setattr(pd, 'read_parquet', lambda *args, **kwargs: reads.append(args) or read_parquet(*args, **kwargs))
+    histories = collector._get_histories(['OLD', 'NEW'], '1y')
+
+    assert len(reads) == 1
+    for symbol in ('OLD', 'NEW'):
+        pd.testing.assert_series_equal(histories[symbol]['Close'], BARS['Close'], check_freq=False)
+        pd.testing.assert_frame_equal(collector.price_store.load(symbol), histories[symbol], check_freq=False)
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import enhanced_indian_news_collector
+import rate_limit
+from config import Config
+from rate_limit import SourceRateLimiter, TimeoutSession, TokenBucket
+
+
+class FakeClock:
+    """monotonic() and sleep() on a clock that only moves when slept on"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+
+def test_burst_is_available_at_once(clock):
+    bucket = TokenBucket(rate=1.0, capacity=5)
+    assert all(bucket.try_acquire() for _ in range(5))
+    assert not bucket.try_acquire()
+    assert bucket.wait_time() == pytest.approx(1.0)
+
+
+def test_acquire_waits_for_the_refill_rate(clock):
+    bucket = TokenBucket(rate=4.0, capacity=2)
+    start = clock.now
+    for _ in range(10):
+        assert bucket.acquire()
+    # Two from the burst, the other eight at four per second
+    assert clock.now - start == pytest.approx(2.0)
+
+
+def test_refill_never_exceeds_capacity(clock):
+    bucket = TokenBucket(rate=10.0, capacity=3)
+    bucket.acquire(3)
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_acquire_times_out_without_taking_tokens(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    assert bucket.acquire()
+    start = clock.now
+    assert bucket.acquire(timeout=0.5) is False
+    assert clock.now - start == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire()
+
+
+def test_timeout_session_overrides_the_callers_timeout(monkeypatch):
+    seen = []
+    monkeypatch.setattr(requests.Session, 'request', lambda self, *args, **kwargs: seen.append(kwargs['timeout']))
+    TimeoutSession(7).get('https://example.com', timeout=30)
+    assert seen == [7]
+
+
+def test_newsapi_client_uses_the_configured_timeout(data_dir, monkeypatch):
+    if not enhanced_indian_news_collector.NEWSAPI_AVAILABLE:
+        pytest.skip('newsapi-python not installed')
+    monkeypatch.setattr(Config, 'NEWS_API_KEY', 'x' * 32)
+    monkeypatch.setitem(Config.NEWS_SOURCE_LIMITS, 'newsapi', {'rate': 1.0, 'burst': 1, 'concurrency': 1, 'timeout': 3})
+    collector = enhanced_indian_news_collector.EnhancedIndianNewsCollector()
+    assert collector.news_api.request_method.timeout == 3
+
+
+def test_collect_concurrent_keeps_source_order_and_survives_failures(data_dir, monkeypatch):
+    collector = enhanced_indian_news_collector.EnhancedIndianNewsCollector()
+    collector.rate_limiter = SourceRateLimiter({'slow': {'concurrency': 4}, 'fast': {'concurrency': 1},
+                                                'broken': {'concurrency': 1}})
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow(symbol):
+        with lock:
+            in_flight.append(symbol)
+            peak.append(len(in_flight))
+        time.sleep(0.1)
+        with lock:
+            in_flight.remove(symbol)
+        return [{'title': f'slow {symbol}'}]
+
+    def broken(symbol):
+        raise RuntimeError('site down')
+
+    sources = [('slow', slow), ('broken', broken), ('fast', lambda symbol: [{'title': f'fast {symbol}'}])]
+    monkeypatch.setattr(collector, '_news_sources', lambda days_back: sources)
+
+    symbols = ['A', 'B', 'C', 'D']
+    results = collector._collect_concurrent(symbols, 7)
+
+    assert [[a['title'] for a in articles] for articles in results] == [
+        [f'slow {symbol}', f'fast {symbol}'] for symbol in symbols
+    ]
+    assert 1 < max(peak) <= 4
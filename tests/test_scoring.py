@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+import stock_filter
+
+
+def _stocks(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def with_gaps(values):
+        values[rng.random(n) < 0.1] = np.nan
+        return values
+
+    return pd.DataFrame({
+        'symbol': [f'S{i}' for i in range(n)],
+        'current_price': rng.uniform(10, 5000, n),
+        # Values on the band edges as well as in between
+        'rsi': rng.choice([29.9, 30, 50, 70, 70.1, 85], n),
+        'volume_ratio': rng.uniform(0, 3, n),
+        'price_change': rng.choice([-0.05, -0.02, -0.01, 0, 0.01, 0.03, 0.06], n),
+        'market_cap': rng.choice([1e9, 2e9, 5e9, 10e9, 5e10], n),
+        'pe_ratio': with_gaps(rng.choice([5.0, 10.0, 18.0, 25.0, 40.0], n)),
+        'beta': with_gaps(rng.choice([0.5, 0.8, 1.0, 1.2, 1.6], n)),
+        'volatility': rng.uniform(0, 0.8, n),
+        'sector': 'IT',
+        'target_price': rng.uniform(10, 5000, n),
+    })
+
+
+def _sentiment(stocks, seed=1):
+    rng = np.random.default_rng(seed)
+    summary = {}
+    for symbol in stocks['symbol']:
+        if rng.random() < 0.2:
+            continue  # No news: the neutral default applies
+        score = float(rng.choice([-1.0, -0.2, 0.0, 0.2, 0.21, 0.8]))
+        summary[symbol] = {
+            'overall_sentiment': 'positive' if score > 0.1 else 'negative' if score < -0.1 else 'neutral',
+            'sentiment_score': score,
+            'article_count': int(rng.integers(0, 15)),
+            'confidence': 0.5,
+        }
+    return summary
+
+
+def test_vectorized_scores_match_per_row_scoring():
+    f = object.__new__(stock_filter.StockFilter)
+    stocks = _stocks()
+    summary = _sentiment(stocks)
+    scores = f._score_frame(stocks, summary)
+
+    default = {'overall_sentiment': 'neutral', 'sentiment_score': 0.0, 'article_count': 0, 'confidence': 0.0}
+    for i, (_, stock) in enumerate(stocks.iterrows()):
+        sentiment_data = summary.get(stock['symbol'], default)
+        components = f._calculate_score_components(stock, sentiment_data)
+        composite = f._calculate_composite_score(components)
+        recommendation = f._get_recommendation(composite, components)
+        row = scores.iloc[i]
+
+        assert {key: row[key] for key in stock_filter.SCORE_COMPONENTS} == components
+        assert row['composite_score'] == composite
+        assert row['recommendation'] == recommendation['action']
+        assert row['confidence'] == recommendation['confidence']
+        assert row['reasoning'] == recommendation['reasoning']
+        assert row['risk_level'] == f._assess_risk(stock, sentiment_data)
+        assert row['article_count'] == sentiment_data['article_count']
+
+
+def test_rule_based_recommendations_are_sorted_by_score():
+    f = object.__new__(stock_filter.StockFilter)
+    stocks = _stocks(50)
+    recommendations = f._rule_based_recommendations(stocks, f._score_frame(stocks, _sentiment(stocks)))
+    assert list(recommendations['composite_score']) == sorted(recommendations['composite_score'], reverse=True)
+    assert set(recommendations['symbol']) == set(stocks['symbol'])
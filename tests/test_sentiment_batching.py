@@ -0,0 +1,75 @@
+import pytest
+
+from config import Config
+from sentiment_analyzer import SentimentAnalyzer
+
+
+class WordTokenizer:
+    def __call__(self, texts, truncation=True):
+        return {'input_ids': [text.split() for text in texts]}
+
+
+class StubPipeline:
+    """Transformer pipeline stand-in: records batches, scores a text by its id"""
+
+    tokenizer = WordTokenizer()
+
+    def __init__(self, fail=None):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        texts = [texts] if isinstance(texts, str) else texts
+        self.batches.append(list(texts))
+        if self.fail and len(texts) > 1 and any(self.fail in text for text in texts):
+            raise RuntimeError('batch failed')
+        if self.fail and self.fail in texts[0]:
+            raise RuntimeError('item failed')
+        return [{'label': 'positive', 'score': _text_id(text) / 100} for text in texts]
+
+
+def _text_id(text):
+    return int(text.split()[0][1:])
+
+
+def _texts(count):
+    # t<id> followed by a length that jumps around, so sorting reorders them
+    return [f"t{i} " + ' '.join(['word'] * ((i * 7) % 11)) for i in range(count)]
+
+
+@pytest.fixture
+def analyzer(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'SENTIMENT_BATCH_SIZE', 4)
+    analyzer = SentimentAnalyzer(use_server=False)
+    analyzer.sentiment_pipeline = StubPipeline()
+    analyzer.use_transformers = True
+    return analyzer
+
+
+def test_results_come_back_in_input_order(analyzer):
+    texts = _texts(10)
+    results, fallback = analyzer._analyze_transformer_batch(texts)
+
+    assert fallback == set()
+    assert [r['score'] for r in results] == [i / 100 for i in range(10)]
+
+
+def test_batches_respect_the_batch_size_and_group_by_length(analyzer):
+    texts = _texts(10)
+    analyzer._analyze_transformer_batch(texts)
+    batches = analyzer.sentiment_pipeline.batches
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert sorted(text for batch in batches for text in batch) == sorted(texts)
+    lengths = [len(text.split()) for batch in batches for text in batch]
+    assert lengths == sorted(lengths)
+
+
+def test_failed_batch_is_retried_item_by_item(analyzer):
+    analyzer.sentiment_pipeline = StubPipeline(fail='t3 ')
+    texts = _texts(6)
+    results, fallback = analyzer._analyze_transformer_batch(texts)
+
+    assert fallback == {3}
+    assert [r['score'] for k, r in enumerate(results) if k != 3] == [i / 100 for i in (0, 1, 2, 4, 5)]
+    assert all(len(batch) <= 4 for batch in analyzer.sentiment_pipeline.batches)
@@ -0,0 +1,120 @@
+import pytest
+
+from config import Config
+from sentiment_analyzer import SentimentAnalyzer
+from sentiment_cache import SentimentCache
+
+POSITIVE = {'sentiment': 'positive', 'score': 0.9, 'confidence': 0.9}
+NEGATIVE = {'sentiment': 'negative', 'score': -0.8, 'confidence': 0.8}
+
+
+def test_key_depends_on_model_and_text():
+    key = SentimentCache.key('ProsusAI/finbert', 'Profit rises')
+    assert SentimentCache.key('ProsusAI/finbert', 'Profit rises') == key
+    assert SentimentCache.key('ProsusAI/finbert:onnx-int8', 'Profit rises') != key
+    assert SentimentCache.key('textblob', 'Profit rises') != key
+    assert SentimentCache.key('ProsusAI/finbert', 'Profit falls') != key
+
+
+def test_memory_tier_evicts_least_recently_used(data_dir):
+    cache = SentimentCache(max_entries=2)
+    cache.put_many('model', {'a': POSITIVE, 'b': NEGATIVE})
+    assert cache.get_many(['a']) == {'a': POSITIVE}  # 'b' is now the least recently used
+    cache.put_many('model', {'c': POSITIVE})
+
+    assert list(cache._memory) == ['a', 'c']
+    # The evicted entry is still in SQLite and comes back into memory
+    assert cache.get_many(['b']) == {'b': NEGATIVE}
+    assert list(cache._memory) == ['c', 'b']
+
+
+def test_memory_only_cache_forgets_evicted_entries(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    cache = SentimentCache(path=str(blocker / 'sentiment_cache.sqlite'), max_entries=2)
+    assert cache._db is None
+
+    cache.put_many('model', {'a': POSITIVE, 'b': NEGATIVE, 'c': POSITIVE})
+    assert cache.get_many(['a', 'b', 'c']) == {'b': NEGATIVE, 'c': POSITIVE}
+
+
+def test_entries_survive_a_restart(data_dir):
+    SentimentCache().put_many('model', {'a': POSITIVE, 'b': NEGATIVE})
+
+    restarted = SentimentCache()
+    assert not restarted._memory
+    assert restarted.get_many(['a', 'b', 'missing']) == {'a': POSITIVE, 'b': NEGATIVE}
+
+
+def test_returned_results_are_copies(data_dir):
+    cache = SentimentCache()
+    cache.put_many('model', {'a': POSITIVE})
+    cache.get_many(['a'])['a']['score'] = 0.0
+    assert cache.get_many(['a']) == {'a': POSITIVE}
+
+
+class CountingModel:
+    """Stands in for the transformer pipeline and counts the texts it scores"""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, **kwargs):
+        texts = [texts] if isinstance(texts, str) else texts
+        self.texts.extend(texts)
+        return [{'label': 'negative' if 'falls' in text else 'positive', 'score': 0.9} for text in texts]
+
+
+@pytest.fixture
+def analyzer(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'SENTIMENT_CASCADE', False)
+    monkeypatch.setattr(Config, 'USE_DECAYED_SENTIMENT', False)
+    return _analyzer('stub-model')
+
+
+def _analyzer(model_id):
+    analyzer = SentimentAnalyzer(use_server=False)
+    analyzer.sentiment_pipeline = CountingModel()
+    analyzer.use_transformers = True
+    analyzer.model_id = model_id
+    return analyzer
+
+
+def test_model_runs_only_on_misses(analyzer):
+    first = analyzer._analyze_texts(['Profit rises', 'Profit falls', 'Profit rises'])
+    # The duplicate within the call is scored once
+    assert analyzer.sentiment_pipeline.texts == ['Profit rises', 'Profit falls']
+    assert [r['sentiment'] for r in first] == ['positive', 'negative', 'positive']
+
+    analyzer.sentiment_pipeline.texts.clear()
+    second = analyzer._analyze_texts(['Profit falls', 'Orders rise', '', 'Profit rises'])
+    assert analyzer.sentiment_pipeline.texts == ['Orders rise']
+    assert [r['sentiment'] for r in second] == ['negative', 'positive', 'neutral', 'positive']
+
+
+def test_cache_hits_after_a_restart(analyzer):
+    analyzer._analyze_texts(['Profit rises', 'Profit falls'])
+
+    restarted = _analyzer('stub-model')
+    assert [r['sentiment'] for r in restarted._analyze_texts(['Profit falls', 'Profit rises'])] == \
+        ['negative', 'positive']
+    assert restarted.sentiment_pipeline.texts == []
+
+
+def test_another_model_does_not_reuse_cached_scores(analyzer):
+    analyzer._analyze_texts(['Profit rises'])
+
+    other = _analyzer('other-model')
+    other._analyze_texts(['Profit rises'])
+    assert other.sentiment_pipeline.texts == ['Profit rises']
+
+
+def test_textblob_fallbacks_are_not_cached_for_the_model(analyzer):
+    def broken(texts, **kwargs):
+        raise RuntimeError('model crashed')
+
+    analyzer.sentiment_pipeline = broken
+    analyzer._analyze_texts(['Profit rises'])
+
+    key = SentimentCache.key('stub-model', 'Profit rises')
+    assert analyzer.cache.get_many([key]) == {}
@@ -0,0 +1,89 @@
+import re
+
+import pytest
+
+from config import Config
+from sentiment_analyzer import SentimentAnalyzer
+
+CONFIDENT = [f'Excellent results for company {i}' for i in range(20)]   # TextBlob polarity 1.0
+UNCERTAIN = [f'Company {i} reports results' for i in range(10)]         # TextBlob polarity 0.0
+
+
+class StubTransformer:
+    """Stands in for FinBERT: records its texts, labels by the number in them"""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        results = []
+        for text in texts:
+            number = int(re.search(r'\d+', text).group())
+            label = 'negative' if number % 2 else 'positive'
+            results.append({'sentiment': label, 'score': -0.9 if number % 2 else 0.9, 'confidence': 0.9})
+        return results, {j for j, text in enumerate(texts) if text in self.fail}
+
+
+@pytest.fixture
+def cascade(monkeypatch):
+    analyzer = SentimentAnalyzer(use_server=False)
+    transformer = StubTransformer()
+    monkeypatch.setattr(analyzer, '_analyze_transformer_batch', transformer)
+    monkeypatch.setattr(Config, 'SENTIMENT_CASCADE_BAND', 0.3)
+    return analyzer, transformer
+
+
+def test_only_texts_inside_the_band_escalate(cascade, monkeypatch):
+    analyzer, transformer = cascade
+    monkeypatch.setattr(Config, 'SENTIMENT_CASCADE_AUDIT_RATE', 0.0)
+    texts = CONFIDENT[:5] + UNCERTAIN[:5]
+    results, kept = analyzer._cascade_batch(texts)
+
+    assert transformer.calls == [UNCERTAIN[:5]]
+    assert kept == set(range(5))
+    assert [r['sentiment'] for r in results[:5]] == ['positive'] * 5
+    assert results[5:] == transformer(UNCERTAIN[:5])[0]
+    assert analyzer.last_cascade_report == {
+        'texts': 10, 'escalated': 5, 'escalation_rate': 0.5, 'audited': 0, 'label_divergence': None
+    }
+
+
+def test_report_counts_audit_divergence(cascade, monkeypatch):
+    analyzer, transformer = cascade
+    monkeypatch.setattr(Config, 'SENTIMENT_CASCADE_AUDIT_RATE', 0.25)
+    results, kept = analyzer._cascade_batch(CONFIDENT + UNCERTAIN)
+
+    sent = transformer.calls[0]
+    audited = [text for text in sent if text in CONFIDENT]
+    assert len(audited) == 5
+    assert set(sent) - set(audited) == set(UNCERTAIN)
+    # The cascade said positive for every audited text; the stub disagrees on odd numbers
+    differing = sum(1 for text in audited if int(re.search(r'\d+', text).group()) % 2)
+    report = analyzer.last_cascade_report
+    assert (report['texts'], report['escalated'], report['audited']) == (30, 10, 5)
+    assert report['escalation_rate'] == pytest.approx(1 / 3)
+    assert report['label_divergence'] == differing / 5
+    # Audited texts take the transformer's result
+    assert kept == {k for k, text in enumerate(CONFIDENT) if text not in audited}
+
+
+def test_audited_texts_that_fall_back_are_not_compared(cascade, monkeypatch):
+    analyzer, transformer = cascade
+    monkeypatch.setattr(Config, 'SENTIMENT_CASCADE_AUDIT_RATE', 0.25)
+    analyzer._cascade_batch(CONFIDENT + UNCERTAIN)
+    audited = [text for text in transformer.calls[0] if text in CONFIDENT]
+
+    transformer.fail = {audited[0]}
+    analyzer._cascade_batch(CONFIDENT + UNCERTAIN)
+    assert analyzer.last_cascade_report['audited'] == 4
+
+
+def test_repeated_calls_audit_the_same_sample(cascade, monkeypatch):
+    analyzer, transformer = cascade
+    monkeypatch.setattr(Config, 'SENTIMENT_CASCADE_AUDIT_RATE', 0.25)
+    for _ in range(3):
+        analyzer._cascade_batch(CONFIDENT + UNCERTAIN)
+    first, *rest = transformer.calls
+    assert all(call == first for call in rest)
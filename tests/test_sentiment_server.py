@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+import pytest
+
+import sentiment_server
+from config import Config
+
+
+class RecordingAnalyzer:
+    """Scores a text by its length and records the batches the model sees"""
+
+    model_id = 'recording'
+
+    def __init__(self):
+        self.batches = []
+
+    def _analyze_texts(self, texts):
+        self.batches.append(len(texts))
+        time.sleep(0.02)
+        return [{'sentiment': 'neutral', 'score': len(text), 'confidence': 1.0} for text in texts]
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    if not sentiment_server.USE_UNIX_SOCKET:
+        pytest.skip('needs Unix sockets')
+    monkeypatch.setattr(Config, 'SENTIMENT_SERVER_SOCKET', str(tmp_path / 'sentiment.sock'))
+    analyzer = RecordingAnalyzer()
+    server = sentiment_server.SentimentServer(analyzer, max_batch_size=8, max_wait_ms=50)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(Config.SENTIMENT_SERVER_SOCKET) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return server, analyzer
+
+
+def test_results_come_back_in_order(server):
+    client = sentiment_server.SentimentClient()
+    assert client.ping() == 'recording'
+    assert [result['score'] for result in client.analyze(['a', 'bbb', 'cc'])] == [1, 3, 2]
+    client.close()
+
+
+def test_threads_sharing_a_client_share_batches(server):
+    _, analyzer = server
+    client = sentiment_server.SentimentClient()
+    client.ping()
+    analyzer.batches.clear()
+
+    results = {}
+    start = threading.Barrier(6)
+
+    def work(i):
+        start.wait()
+        results[i] = client.analyze(['x' * (i + 1)])
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+
+    assert {i: result[0]['score'] for i, result in results.items()} == {i: i + 1 for i in range(6)}
+    # One client used from six threads still fills batches with several requests
+    assert len(analyzer.batches) < 6
+    assert max(analyzer.batches) > 1
+
+
+def test_model_never_sees_more_than_max_batch_size_texts(server):
+    _, analyzer = server
+    client = sentiment_server.SentimentClient()
+    texts = ['y' * (i + 1) for i in range(20)]
+    assert [result['score'] for result in client.analyze(texts)] == list(range(1, 21))
+    client.close()
+    assert analyzer.batches and max(analyzer.batches) <= 8
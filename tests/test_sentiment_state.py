@@ -0,0 +1,121 @@
+import math
+
+import pandas as pd
+import pytest
+
+from config import Config
+from sentiment_state import DecayedSentimentState, SentimentStateStore, article_id
+
+HOUR = 3600.0
+
+
+def _state():
+    return DecayedSentimentState('TCS.NS', half_life_seconds=HOUR)
+
+
+def test_read_matches_closed_form_decay():
+    state = _state()
+    state.update(0.0, 1.0, 0.5, 'a')
+    state.update(2 * HOUR, -1.0, 1.0, 'b')
+
+    # Weights at t = 2h: 2 ** -2 for the first article, 1 for the second
+    w = 0.25
+    result = state.read(3 * HOUR)
+    assert result['sentiment_score'] == pytest.approx((w * 1.0 - 1.0) / (w + 1))
+    assert result['confidence'] == pytest.approx((w * 0.5 + 1.0) / (w + 1))
+    assert result['effective_articles'] == pytest.approx((w + 1) * 0.5)
+
+
+def test_late_older_article_weighs_as_if_it_came_in_order():
+    in_order = _state()
+    late = _state()
+    articles = [(0.0, 0.8, 0.9, 'a'), (HOUR, -0.2, 0.4, 'b'), (5 * HOUR, 0.5, 0.7, 'c')]
+    for article in articles:
+        in_order.update(*article)
+    for article in (articles[2], articles[0], articles[1]):
+        late.update(*article)
+
+    assert late.reference_time == 5 * HOUR
+    for key, value in in_order.read(6 * HOUR).items():
+        assert late.read(6 * HOUR)[key] == pytest.approx(value)
+
+
+def test_same_article_is_counted_once():
+    state = _state()
+    assert state.update(0.0, 1.0, 1.0, 'a') is True
+    before = state.to_dict()
+    assert state.update(HOUR, -1.0, 1.0, 'a') is False
+    assert state.to_dict() == before
+
+
+def test_missing_score_is_remembered_but_not_weighted():
+    state = _state()
+    assert state.update(0.0, math.nan, 1.0, 'a')
+    assert state.read() == {'sentiment_score': 0.0, 'confidence': 0.0, 'effective_articles': 0.0}
+    assert state.update(0.0, 0.5, 1.0, 'a') is False
+
+
+def test_saved_state_continues_like_one_never_saved(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'SENTIMENT_HALF_LIFE_HOURS', 1)
+    store = SentimentStateStore()
+    kept = _state()
+    saved = store.load('TCS.NS')
+    for state in (kept, saved):
+        state.update(0.0, 0.6, 0.9, 'a')
+        state.update(HOUR, -0.4, 0.3, 'b')
+    store.save(saved)
+
+    restored = store.load('TCS.NS')
+    for state in (kept, restored):
+        state.update(HOUR / 2, 0.9, 0.8, 'c')
+        assert state.update(0.0, 0.6, 0.9, 'a') is False
+    assert restored.read(3 * HOUR) == pytest.approx(kept.read(3 * HOUR))
+
+
+def test_changed_half_life_starts_fresh_state(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'SENTIMENT_HALF_LIFE_HOURS', 1)
+    store = SentimentStateStore()
+    state = store.load('TCS.NS')
+    state.update(0.0, 1.0, 1.0, 'a')
+    store.save(state)
+
+    monkeypatch.setattr(Config, 'SENTIMENT_HALF_LIFE_HOURS', 2)
+    assert store.load('TCS.NS').weight == 0.0
+
+
+def test_prune_forgets_only_old_ids():
+    state = _state()
+    state.update(0.0, 0.1, 0.1, 'old')
+    state.update(30 * HOUR, 0.1, 0.1, 'new')
+    state.prune(30 * HOUR)
+    assert set(state.seen) == {'new'}
+
+
+def test_article_id_prefers_url_over_title():
+    assert article_id({'url': 'https://a.example/1', 'title': 'x'}) == article_id({'url': 'https://a.example/1'})
+    assert article_id({'url': None, 'title': 'x'}) == article_id({'title': 'x'})
+
+
+def test_refreshing_the_same_news_does_not_double_count(data_dir, monkeypatch):
+    from sentiment_analyzer import SentimentAnalyzer
+
+    monkeypatch.setattr(Config, 'USE_DECAYED_SENTIMENT', True)
+    analyzer = SentimentAnalyzer(use_server=False)
+    now = pd.Timestamp.now(tz='UTC')
+    news = pd.DataFrame({
+        'symbol': ['TCS.NS', 'TCS.NS'],
+        'title': ['TCS wins deal', 'TCS misses estimates'],
+        'url': ['https://a.example/1', 'https://a.example/2'],
+        'published_at': [(now - pd.Timedelta(hours=1)).isoformat(), (now - pd.Timedelta(hours=2)).isoformat()],
+        'sentiment': ['positive', 'negative'],
+        'sentiment_score': [0.8, -0.4],
+        'confidence': [0.9, 0.6],
+    })
+    first = analyzer.get_sentiment_summary(news)['TCS.NS']
+    second = analyzer.get_sentiment_summary(news)['TCS.NS']
+    assert second['sentiment_score'] == pytest.approx(first['sentiment_score'])
+    state = analyzer.sentiment_state.load('TCS.NS')
+    assert len(state.seen) == 2
+    # Two articles one and two hours old with the configured half-life, not four
+    half_life = Config.SENTIMENT_HALF_LIFE_HOURS * HOUR
+    assert state.weight == pytest.approx(1 + 2 ** (-HOUR / half_life), rel=1e-3)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import Config
+from sentiment_analyzer import SentimentAnalyzer
+
+
+@pytest.fixture
+def analyzer(data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'USE_DECAYED_SENTIMENT', False)
+    return SentimentAnalyzer(use_server=False)
+
+
+def _news(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(-1, 1, n)
+    # Distinct timestamps, shuffled, as ISO strings like the collectors produce
+    published = pd.Timestamp('2026-10-01T00:00:00Z') + pd.to_timedelta(rng.permutation(n) * 37, unit='min')
+    return pd.DataFrame({
+        'symbol': rng.choice([f'S{i}' for i in range(40)] + ['MARKET'], n),
+        'title': [f'headline {i}' for i in range(n)],
+        'published_at': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'sentiment': np.select([scores > 0.1, scores < -0.1], ['positive', 'negative'], 'neutral'),
+        'sentiment_score': scores,
+        'confidence': rng.uniform(0, 1, n),
+    })
+
+
+def test_summary_matches_per_symbol_sentiment(analyzer):
+    news = _news()
+    summary = analyzer.get_sentiment_summary(news)
+
+    assert 'MARKET' not in summary
+    assert set(summary) == set(news['symbol']) - {'MARKET'}
+    for symbol, result in summary.items():
+        expected = analyzer.calculate_stock_sentiment(news, symbol)
+        assert list(result) == list(expected)
+        assert result['sentiment_score'] == pytest.approx(expected['sentiment_score'], rel=1e-12, abs=1e-15)
+        assert result['confidence'] == pytest.approx(expected['confidence'], rel=1e-12)
+        for key in ('overall_sentiment', 'article_count', 'positive_count', 'negative_count', 'neutral_count'):
+            assert result[key] == expected[key], (symbol, key)
+
+
+def test_summary_of_market_news_only_is_empty(analyzer):
+    news = _news(20)
+    assert analyzer.get_sentiment_summary(news.assign(symbol='MARKET')) == {}
@@ -0,0 +1,113 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_data
+from config import Config
+
+BARS = 30
+
+
+def _history(close, volume=None):
+    index = pd.date_range('2026-09-01', periods=len(close), freq='B')
+    close = np.asarray(close, dtype=float)
+    volume = np.full(len(close), 1e5) if volume is None else np.asarray(volume, dtype=float)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': volume},
+                        index=index)
+
+
+def _calm():
+    return 100 + np.sin(np.arange(BARS))
+
+
+def _quiet():
+    volume = np.full(BARS, 1e5)
+    volume[-1] = 1e4
+    return _history(_calm(), volume)
+
+
+def _jump():
+    close = _calm()
+    close[-1] = close[-2] * 1.1
+    return _history(close)
+
+
+def _overbought():
+    close = 100 + np.arange(BARS) * 0.5
+    close[10] -= 0.2
+    return _history(close)
+
+
+HISTORIES = {
+    'CALM1': lambda: _history(_calm()),
+    'QUIET': _quiet,            # Fails the volume screen
+    'JUMP': _jump,              # Fails the price change screen
+    'HOT': _overbought,         # Fails the RSI screen
+    'SMALL': lambda: _history(_calm() + 5),   # Passes the price screens, fails market cap
+    'CALM2': lambda: _history(_calm() + 10),
+}
+
+
+class StubCollector(stock_data.StockDataCollector):
+    """Synthetic histories and fundamentals that count ticker.info fetches"""
+
+    indicator_states = None
+
+    def __init__(self):
+        self.info_calls = []
+        self._lock = threading.Lock()
+
+    def _get_histories(self, symbols, period):
+        return {symbol: HISTORIES[symbol]() for symbol in symbols if symbol in HISTORIES}
+
+    def fetch_info(self, symbol):
+        with self._lock:
+            self.info_calls.append(symbol)
+        market_cap = 1e9 if symbol == 'SMALL' else 5e12
+        return {'marketCap': market_cap, 'trailingPE': 20, 'sector': 'IT'}
+
+
+SYMBOLS = list(HISTORIES) + ['MISSING']
+
+
+@pytest.fixture
+def collector(data_dir):
+    return StubCollector()
+
+
+def test_info_is_fetched_only_for_price_survivors(collector):
+    df, rejections = collector.screen_stocks_staged(SYMBOLS)
+
+    assert sorted(collector.info_calls) == ['CALM1', 'CALM2', 'SMALL']
+    assert df['symbol'].tolist() == ['CALM1', 'CALM2']
+    assert {(row.symbol, row.stage, row.reason) for row in rejections.itertuples()} == {
+        ('MISSING', 'data', 'no price data'),
+        ('QUIET', 'price', 'volume_ratio'),
+        ('JUMP', 'price', 'price_change'),
+        ('HOT', 'price', 'rsi'),
+        ('SMALL', 'fundamentals', 'market_cap'),
+    }
+
+
+def test_staged_screen_matches_single_pass_screen(collector):
+    staged, _ = collector.screen_stocks_staged(SYMBOLS)
+
+    single = StubCollector()
+    single_pass = single.screen_stocks(single.get_multiple_stocks(SYMBOLS, bulk=True))
+    # The single pass fetches ticker.info for every symbol with price data
+    assert sorted(single.info_calls) == sorted(HISTORIES)
+
+    columns = [column for column in stock_data.STOCK_DATA_COLUMNS if column != 'last_updated']
+    pd.testing.assert_frame_equal(staged[columns].reset_index(drop=True),
+                                  single_pass[columns].reset_index(drop=True))
+
+
+def test_nothing_survives_the_price_stage(collector, monkeypatch):
+    monkeypatch.setattr(Config, 'MAX_PRICE_CHANGE', -1.0)
+    df, rejections = collector.screen_stocks_staged(SYMBOLS)
+
+    assert df.empty
+    assert collector.info_calls == []
+    assert set(rejections['stage']) == {'data', 'price'}
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_data
+from price_store import PriceStore
+from streaming_indicators import IndicatorStateStore, SymbolIndicatorState
+
+LENGTHS = [1, 4, 10, 16, 30, 60, 260]
+
+
+def _history(seed, length):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+    spread = rng.uniform(0.5, 2.0, length)
+    return pd.DataFrame({
+        'Open': close, 'High': close + spread, 'Low': close - spread, 'Close': close,
+        'Volume': rng.uniform(1e5, 1e6, length)
+    }, index=pd.date_range('2025-09-01', periods=length, freq='B'))
+
+
+def _feed(state, bars):
+    for timestamp, high, low, close, volume in bars[['High', 'Low', 'Close', 'Volume']].itertuples(name=None):
+        state.update(timestamp.isoformat(), high, low, close, volume)
+    return state
+
+
+def _assert_metrics_equal(actual, expected):
+    for name, value in actual.items():
+        assert value == pytest.approx(expected[name], rel=1e-9, abs=1e-9), name
+
+
+@pytest.mark.parametrize('length', LENGTHS)
+def test_streaming_state_matches_batch_metrics(length):
+    hist = _history(length, length)
+    collector = object.__new__(stock_data.StockDataCollector)
+    state = _feed(SymbolIndicatorState('TEST'), hist)
+    _assert_metrics_equal(state.metrics(), collector._price_metrics('TEST', hist))
+
+
+def test_restored_state_continues_like_an_uninterrupted_one():
+    hist = _history(7, 120)
+    uninterrupted = _feed(SymbolIndicatorState('TEST'), hist)
+
+    saved = json.loads(json.dumps(_feed(SymbolIndicatorState('TEST'), hist.iloc[:70]).to_dict()))
+    resumed = _feed(SymbolIndicatorState.from_dict(saved), hist.iloc[70:])
+
+    assert resumed.bar_count == uninterrupted.bar_count
+    _assert_metrics_equal(resumed.metrics(), uninterrupted.metrics())
+
+
+def test_peek_does_not_commit_the_bar():
+    hist = _history(3, 40)
+    state = _feed(SymbolIndicatorState('TEST'), hist.iloc[:-1])
+    before = state.to_dict()
+
+    latest = hist.iloc[-1]
+    preview = state.peek(hist.index[-1].isoformat(), latest['High'], latest['Low'], latest['Close'], latest['Volume'])
+
+    assert state.to_dict() == before
+    _assert_metrics_equal(preview, _feed(SymbolIndicatorState('TEST'), hist).metrics())
+
+
+def test_collector_refresh_matches_batch_after_new_bars(data_dir):
+    pytest.importorskip('pyarrow')
+    collector = object.__new__(stock_data.StockDataCollector)
+    collector.price_store = PriceStore()
+    collector.indicator_states = IndicatorStateStore()
+
+    hist = _history(11, 80)
+    collector.price_store.write('TEST', hist.iloc[:60])
+    collector._streaming_price_metrics(['TEST'])
+    collector.price_store.append('TEST', hist.iloc[60:])
+    refreshed = collector._streaming_price_metrics(['TEST'])['TEST']
+
+    assert collector.indicator_states.load('TEST').bar_count == 79  # The newest bar is only previewed
+    _assert_metrics_equal({k: v for k, v in refreshed.items() if k != 'symbol'},
+                          collector._price_metrics('TEST', hist))
@@ -0,0 +1,53 @@
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from config import Config
+from universe_snapshot import SnapshotManager
+
+
+class SlowFilter:
+    """Stock filter whose analysis blocks until released"""
+
+    last_rejections = None
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def analyze_stocks(self, symbols):
+        self.calls += 1
+        self.release.wait(5)
+        return pd.DataFrame({'symbol': [Config.STOCK_SYMBOLS[0]], 'composite_score': [float(self.calls)]})
+
+
+def test_first_request_waits_for_the_warm_up_build():
+    f = SlowFilter()
+    manager = SnapshotManager(f)
+    thread = manager.refresh_in_background()
+    assert manager.refresh_in_background() is None  # Already building
+
+    threading.Timer(0.05, f.release.set).start()
+    snapshot = manager.get()
+    thread.join(5)
+    assert snapshot.version == 1
+    assert f.calls == 1
+
+
+def test_stale_snapshot_is_served_while_rebuilding():
+    f = SlowFilter()
+    f.release.set()
+    manager = SnapshotManager(f)
+    first = manager.get()
+    first.built_at = datetime.now() - timedelta(seconds=manager.max_age_seconds + 1)
+
+    f.release.clear()
+    assert manager.get() is first  # Returns at once, rebuild runs in the background
+    f.release.set()
+    for _ in range(100):
+        if manager.current is not first:
+            break
+        threading.Event().wait(0.05)
+    assert manager.current.version == 2
+    assert manager.get() is manager.current
@@ -0,0 +1,120 @@
+"""
+Versioned snapshot of a full-universe analysis run.
+
+The pipeline runs once over every unique symbol in Config.STOCK_SYMBOLS and
+each sector view is served as an indexed slice of that one result, so stocks
+listed in several sectors are fetched and analysed only once.
+"""
+
+import threading
+from datetime import datetime
+import pandas as pd
+from config import Config
+
+
+class UniverseSnapshot:
+    """Immutable recommendations for the whole universe with a per-sector index"""
+
+    def __init__(self, version, recommendations, built_at=None, rejections=None):
+        self.version = version
+        self.built_at = built_at or datetime.now()
+        self.recommendations = recommendations.reset_index(drop=True) if recommendations is not None else pd.DataFrame()
+        self.rejections = rejections if rejections is not None else pd.DataFrame()
+
+        # Row positions of every sector's symbols, in score order
+        positions = {}
+        if not self.recommendations.empty:
+            positions = {symbol: i for i, symbol in enumerate(self.recommendations['symbol'])}
+        self._sector_rows = {
+            sector: sorted(positions[symbol] for symbol in set(stocks) if symbol in positions)
+            for sector, stocks in Config.STOCK_SECTORS.items()
+        }
+
+    @property
+    def empty(self):
+        return self.recommendations.empty
+
+    def sector(self, sector_name):
+        """Recommendations for one sector, sorted like the full snapshot"""
+        rows = self._sector_rows.get(sector_name, [])
+        return self.recommendations.iloc[rows]
+
+    def sectors(self):
+        """Iterate over (sector name, recommendations) pairs"""
+        for sector_name in self._sector_rows:
+            yield sector_name, self.sector(sector_name)
+
+
+class SnapshotManager:
+    """Builds universe snapshots and hands out the current one
+
+    A snapshot is rebuilt when it is older than Config.SNAPSHOT_MAX_AGE_SECONDS
+    or when a refresh is forced. A stale snapshot keeps being served while
+    its replacement is built in the background; only requests that arrive
+    before the first snapshot exists wait, and they wait for one build
+    instead of starting their own.
+    """
+
+    def __init__(self, stock_filter, max_age_seconds=None):
+        self.stock_filter = stock_filter
+        self.max_age_seconds = max_age_seconds or Config.SNAPSHOT_MAX_AGE_SECONDS
+        self.current = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _is_stale(self, snapshot):
+        if snapshot is None:
+            return True
+        return (datetime.now() - snapshot.built_at).total_seconds() > self.max_age_seconds
+
+    def get(self, force_refresh=False):
+        """Return the current snapshot, building a new one if needed"""
+        snapshot = self.current
+        if not force_refresh and not self._is_stale(snapshot):
+            return snapshot
+
+        if not force_refresh and snapshot is not None:
+            # Serve the stale snapshot rather than make this request wait
+            self.refresh_in_background()
+            return snapshot
+
+        with self._lock:
+            # Another request may have finished a build while we waited
+            if self.current is not snapshot and not self._is_stale(self.current):
+                return self.current
+            return self.build()
+
+    def refresh_in_background(self):
+        """Build a new snapshot in a background thread unless one is being built"""
+        # Taken here rather than in the thread, so a second caller sees the build at once
+        if not self._lock.acquire(blocking=False):
+            return None
+        thread = threading.Thread(target=self._refresh, name='snapshot-refresh', daemon=True)
+        thread.start()
+        return thread
+
+    def _refresh(self):
+        """Build in the background while holding the lock taken by refresh_in_background()"""
+        try:
+            # A build that finished meanwhile makes this one unnecessary
+            if self._is_stale(self.current):
+                self.build()
+        except Exception as e:
+            print(f"❌ Background snapshot build failed: {e}")
+        finally:
+            self._lock.release()
+
+    def build(self):
+        """Run the analysis pipeline once over the whole universe"""
+        print(f"Building universe snapshot for {len(Config.STOCK_SYMBOLS)} stocks...")
+        # Real sentiment only: stocks without scored news stay neutral, never mock data
+        recommendations = self.stock_filter.analyze_stocks(Config.STOCK_SYMBOLS)
+
+        self._version += 1
+        self.current = UniverseSnapshot(
+            self._version,
+            recommendations,
+            rejections=getattr(self.stock_filter, 'last_rejections', None)
+        )
+        print(f"Universe snapshot v{self._version} ready with {len(self.current.recommendations)} stocks")
+        return self.current